@@ -0,0 +1,121 @@
+import logging
+
+from agg_core.repo_comparison import HISTORY_COLUMNS
+from agg_core.types import RepoComparisonAggData
+from dts_utils.s3_utils import save_data_to_s3
+
+
+# Version of the compact outputs, bumped on incompatible changes so clients can tell the layouts apart
+COMPACT_FORMAT_VERSION = 1
+
+
+def delta_encode(values: list[int | None]) -> list[int | None]:
+    """
+    Keeps the first value and the differences to the previous value. Slowly growing series become small numbers.
+    Missing values (None) stay None and are skipped, the next value is relative to the last present one.
+    """
+    deltas = []
+    previous = 0
+    for value in values:
+        if value is None:
+            deltas.append(None)
+            continue
+        deltas.append(value - previous)
+        previous = value
+    return deltas
+
+
+def delta_decode(deltas: list[int | None]) -> list[int | None]:
+    values = []
+    total = 0
+    for delta in deltas:
+        if delta is None:
+            values.append(None)
+            continue
+        total += delta
+        values.append(total)
+    return values
+
+
+def encode_series(values: list[int | None], delta: bool) -> list[int | None]:
+    return delta_encode(values) if delta else values
+
+
+def decode_series(values: list[int | None], delta: bool) -> list[int | None]:
+    return delta_decode(values) if delta else values
+
+
+def to_compact_period_counts(data: list[dict], delta: bool = True) -> dict:
+    """
+    Converts a [{"date": period, "counts": {name: count}}] series (repo counts, primary language counts)
+    into a shared date axis and one count array per name aligned with it.
+    A name missing from a period is null there.
+    """
+    dates = [entry["date"] for entry in data]
+    names = sorted({name for entry in data for name in entry["counts"]})
+    series = {
+        name: encode_series([entry["counts"].get(name) for entry in data], delta)
+        for name in names
+    }
+    return {"version": COMPACT_FORMAT_VERSION, "delta": delta, "dates": dates, "series": series}
+
+
+def from_compact_period_counts(compact: dict) -> list[dict]:
+    """Restores the record shape of to_compact_period_counts."""
+    series = {name: decode_series(values, compact["delta"]) for name, values in compact["series"].items()}
+    return [
+        {"date": date, "counts": {name: values[i] for name, values in series.items() if values[i] is not None}}
+        for i, date in enumerate(compact["dates"])
+    ]
+
+
+def to_compact_repo_comparison(data: RepoComparisonAggData, delta: bool = True) -> dict:
+    """
+    Converts the repo comparison data into a shared, sorted date axis and parallel integer arrays per repo.
+    "date_index" holds the positions of the repo's history dates on the axis, so repos that appear later
+    or skip periods need no placeholders. With {delta} the positions and values are delta encoded.
+    """
+    dates = sorted({record["date"] for repo in data.values() for record in repo["history"]})
+    date_positions = {date: i for i, date in enumerate(dates)}
+
+    repos = {}
+    for repo_id, repo in data.items():
+        history = repo["history"]
+        compact_repo = {
+            "name": repo["name"],
+            "date_index": encode_series([date_positions[record["date"]] for record in history], delta),
+        }
+        for column in HISTORY_COLUMNS:
+            compact_repo[column] = encode_series([record[column] for record in history], delta)
+        repos[str(repo_id)] = compact_repo
+
+    return {"version": COMPACT_FORMAT_VERSION, "delta": delta, "dates": dates, "repos": repos}
+
+
+def from_compact_repo_comparison(compact: dict) -> RepoComparisonAggData:
+    """Restores the record shape of to_compact_repo_comparison (repo ids as strings, like the saved JSON)."""
+    delta = compact["delta"]
+    dates = compact["dates"]
+    data = {}
+    for repo_id, compact_repo in compact["repos"].items():
+        columns = {column: decode_series(compact_repo[column], delta) for column in HISTORY_COLUMNS}
+        history = [
+            {"date": dates[position], **{column: values[i] for column, values in columns.items()}}
+            for i, position in enumerate(decode_series(compact_repo["date_index"], delta))
+        ]
+        data[repo_id] = {"name": compact_repo["name"], "history": history}
+    return data
+
+
+def save_compact_outputs(s3_client, settings, interval, repo_counts_data, primary_langs_data, repo_comparison_data):
+    """Saves the compact variants next to the record shaped outputs, which stay the default."""
+    delta = settings.compact_delta_encoding
+    encodings = settings.output_encodings
+    logging.info(f"Saving compact outputs for interval '{interval}'.")
+    outputs = [
+        (settings.get_compact_repo_counts_path(interval), to_compact_period_counts(repo_counts_data, delta)),
+        (settings.get_compact_primary_langs_path(interval), to_compact_period_counts(primary_langs_data, delta)),
+        (settings.get_compact_repo_comparison_path(interval), to_compact_repo_comparison(repo_comparison_data, delta)),
+    ]
+    for output_path, data in outputs:
+        save_data_to_s3(s3_client, settings.bucket, output_path, data, encodings)
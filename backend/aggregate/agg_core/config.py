@@ -1,14 +1,37 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
+from agg_core.types import Interval
+
 
 class Settings(BaseSettings):
     bucket: str
 
     aggregated_data_prefix: str = "aggregated_data"
     github_data_prefix: str = "github_data"
+    history_prefix: str = "history"
     profile: str = "default"
     region: str = "eu-central-1"
     logging_level: str = "INFO"
+    # Daily outputs are supported but large, the coarser intervals are rolled up from the daily snapshots either way
+    aggregation_intervals: list[Interval] = ["weekly", "monthly", "quarterly", "yearly"]
+    incremental_aggregation: bool = True
+    s3_list_workers: int = 8
+    s3_fetch_workers: int = 16
+    s3_max_pool_connections: int = 32
+    parquet_footer_read_size: int = 64 * 1024
+    use_disk_cache: bool = True
+    disk_cache_dir: str = "/tmp/s3_cache"
+    disk_cache_max_bytes: int = 256 * 1024 * 1024
+    repo_comparison_shard_count: int = 64
+    # Struct of arrays variants of the time series outputs, served by the API on request
+    save_compact_outputs: bool = True
+    compact_delta_encoding: bool = True
+    # Pre-compressed variants ("gzip" / "br") of the outputs the API serves, "br" needs the brotli package
+    output_encodings: list[Literal["gzip", "br"]] = ["gzip", "br"]
+    compact_history: bool = True
+    history_row_group_size: int = 100_000
 
 
     def get_repo_counts_path(self, interval: str) -> str:
@@ -20,5 +43,33 @@ class Settings(BaseSettings):
     def get_repo_comparison_path(self, interval: str) -> str:
         return f"{self.aggregated_data_prefix}/repo_comparison/{interval}.json"
 
+    def get_repo_comparison_shard_path(self, interval: str, shard: int, shard_count: int) -> str:
+        # The shard count is part of the path, so every index only points to shards of its own generation
+        return f"{self.aggregated_data_prefix}/repo_comparison_shards/{interval}/shard_{shard:04}_of_{shard_count:04}.json"
+
+    def get_repo_comparison_index_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/repo_comparison_shards/{interval}/index.json"
+
+    def get_language_bytes_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/language_bytes/{interval}.json"
+
+    def get_compact_repo_counts_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/compact/repo_counts/{interval}.json"
+
+    def get_compact_primary_langs_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/compact/primary_langs_counts/{interval}.json"
+
+    def get_compact_repo_comparison_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/compact/repo_comparison/{interval}.json"
+
+    def get_manifest_path(self, interval: str) -> str:
+        return f"{self.aggregated_data_prefix}/manifest/{interval}.json"
+
+    def get_history_partition_path(self, year: int, month: int) -> str:
+        return f"{self.history_prefix}/repos/year={year}/month={month:02}/part-0.parquet"
+
+    def get_history_manifest_path(self) -> str:
+        return f"{self.history_prefix}/repos/_manifest.json"
+
     def get_repo_list_path(self) -> str:
         return f"{self.aggregated_data_prefix}/repo_list/repo_list.json"
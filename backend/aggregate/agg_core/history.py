@@ -0,0 +1,158 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agg_core.utils import filter_object_keys, get_date_from_key, read_parquet_columns
+from agg_core.snapshot_cache import REPOS_COLUMNS
+from dts_utils.s3_utils import (
+    S3RangeFile, get_dated_objects, get_json_object, get_months, get_object_tail, iter_mapped_objects, save_data_to_s3
+)
+
+
+HISTORY_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("date", pa.date32()),
+    ("name", pa.string()),
+    ("stars", pa.int64()),
+    ("forks", pa.int64()),
+    ("size", pa.int64()),
+    ("open_issues", pa.int64()),
+    ("main_language", pa.string()),
+])
+
+Month = tuple[int, int]
+
+
+def get_month_key(month: Month) -> str:
+    return f"{month[0]}-{month[1]:02}"
+
+
+def group_snapshots_by_month(objects: list[dict]) -> dict[Month, dict[str, str]]:
+    """Groups the repos snapshots into {(year, month): {key: etag}}."""
+    etags = {obj["Key"]: obj["ETag"] for obj in objects}
+    months = defaultdict(dict)
+    for key in filter_object_keys(list(etags), "repos.parquet"):
+        snapshot_date = get_date_from_key(key)
+        months[(snapshot_date.year, snapshot_date.month)][key] = etags[key]
+    return months
+
+
+def build_history_table(snapshots: list[tuple[date, pd.DataFrame]]) -> pa.Table:
+    """Concatenates daily snapshots with their date, sorted by repo id and date."""
+    frames = [df[REPOS_COLUMNS].assign(date=snapshot_date) for snapshot_date, df in snapshots]
+    table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+    table = table.select(HISTORY_SCHEMA.names).cast(HISTORY_SCHEMA)
+    return table.sort_by([("id", "ascending"), ("date", "ascending")])
+
+
+def compact_month(s3_client, settings, month: Month, snapshots: dict[str, str], disk_cache=None) -> int:
+    """Rewrites the history partition of the month from all its daily snapshots. Returns the number of rows."""
+    def read_snapshot(key: str) -> pd.DataFrame:
+        return read_parquet_columns(
+            s3_client, settings.bucket, key, REPOS_COLUMNS, settings.parquet_footer_read_size, etag=snapshots[key], disk_cache=disk_cache
+        )
+
+    dfs = dict(iter_mapped_objects(read_snapshot, sorted(snapshots), settings.s3_fetch_workers))
+    table = build_history_table([(get_date_from_key(key), dfs[key]) for key in sorted(dfs)])
+
+    buffer = BytesIO()
+    pq.write_table(table, buffer, row_group_size=settings.history_row_group_size, compression="snappy", write_statistics=True)
+    buffer.seek(0)
+    path = settings.get_history_partition_path(*month)
+    logging.info(f"Uploading history partition ({table.num_rows} rows from {len(snapshots)} snapshots) to {path}.")
+    s3_client.upload_fileobj(Bucket=settings.bucket, Key=path, Fileobj=buffer)
+    return table.num_rows
+
+
+def get_unlisted_objects(s3_client, settings, manifest: dict, listed_from: date) -> list[dict]:
+    """
+    Lists the repos snapshots compaction needs that are dated before {listed_from}: the rest of the month of
+    {listed_from} and every month since the latest compacted one. A failed compaction leaves the months after
+    the latest one in the manifest unfinished, they are listed again even once {listed_from} moved past them.
+    Without a compacted month everything before {listed_from} is listed.
+    """
+    start_date = None
+    if manifest:
+        year, month = map(int, max(manifest).split("-"))
+        start_date = min(listed_from.replace(day=1), date(year, month, 1))
+        if start_date == listed_from:
+            return []
+    return get_dated_objects(
+        s3_client, settings.bucket, settings.github_data_prefix, start_date=start_date,
+        end_date=listed_from - timedelta(days=1), max_workers=settings.s3_list_workers
+    )
+
+
+def compact_history(s3_client, settings, objects: list[dict], listed_from: date | None = None, disk_cache=None) -> list[str]:
+    """
+    Folds the daily repos snapshots into the monthly partitions of the history dataset.
+    A partition is rewritten from all snapshots of its month whenever the month's snapshot set (keys and ETags)
+    differs from the one in the compaction manifest, so re-running is idempotent and a failed run is redone.
+    With {objects} listed from {listed_from} the older snapshots of the months to check are listed here,
+    see get_unlisted_objects.
+    Returns the compacted months.
+    """
+    manifest_path = settings.get_history_manifest_path()
+    try:
+        manifest = get_json_object(s3_client, settings.bucket, manifest_path)
+    except s3_client.exceptions.NoSuchKey:
+        manifest = {}
+
+    if listed_from is not None:
+        objects = get_unlisted_objects(s3_client, settings, manifest, listed_from) + objects
+    months = group_snapshots_by_month(objects)
+
+    if listed_from is None:
+        # With a full listing, partitions of months without snapshots anymore are removed
+        for month_key in sorted(set(manifest) - {get_month_key(month) for month in months}):
+            year, month = map(int, month_key.split("-"))
+            logging.info(f"Removing history partition of {month_key}, its snapshots are gone.")
+            s3_client.delete_object(Bucket=settings.bucket, Key=settings.get_history_partition_path(year, month))
+            del manifest[month_key]
+            save_data_to_s3(s3_client, settings.bucket, manifest_path, manifest)
+
+    compacted = []
+    for month in sorted(months):
+        month_key = get_month_key(month)
+        if manifest.get(month_key) == months[month]:
+            continue
+        compact_month(s3_client, settings, month, months[month], disk_cache)
+        # The manifest is updated after every partition so a failed run keeps the finished months
+        manifest[month_key] = months[month]
+        save_data_to_s3(s3_client, settings.bucket, manifest_path, manifest)
+        compacted.append(month_key)
+
+    logging.info(f"Compacted history months: {compacted}.")
+    return compacted
+
+
+
+def read_history(
+    s3_client, settings, start_date: date, end_date: date, repo_ids: list[int] | None = None, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Reads the history rows between the dates (optionally only of {repo_ids}) from the history dataset.
+    Only the month partitions of the date range are opened, and within them the filters are pushed down to the
+    row group statistics (rows are sorted by id), so only the matching row groups and columns are downloaded.
+    """
+    filters = [("date", ">=", start_date), ("date", "<=", end_date)]
+    if repo_ids is not None:
+        filters.append(("id", "in", list(repo_ids)))
+
+    tables = []
+    for month in get_months(start_date, end_date):
+        path = settings.get_history_partition_path(*month)
+        try:
+            tail, size = get_object_tail(s3_client, settings.bucket, path, settings.parquet_footer_read_size)
+        except s3_client.exceptions.NoSuchKey:
+            continue
+        source = BytesIO(tail) if len(tail) == size else pa.PythonFile(S3RangeFile(s3_client, settings.bucket, path, size, tail=tail), mode="r")
+        tables.append(pq.read_table(source, columns=columns, filters=filters, pre_buffer=True))
+
+    schema = HISTORY_SCHEMA if columns is None else pa.schema([HISTORY_SCHEMA.field(column) for column in columns])
+    return pa.concat_tables(tables).to_pandas() if tables else schema.empty_table().to_pandas()
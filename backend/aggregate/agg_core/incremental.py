@@ -0,0 +1,223 @@
+import logging
+from dataclasses import dataclass
+from datetime import date
+
+from agg_core.utils import (
+    filter_object_keys, group_keys_by_interval, pick_latest_key_per_period, get_period_start_date, get_period, get_date_from_key
+)
+from agg_core.types import Interval, PeriodSnapshots, RepoComparisonAggData
+from agg_core.repo_counts import aggregate_repo_counts, save_agg_repo_counts
+from agg_core.process_repos import process_repos_data, save_processed_repos_data
+from agg_core.language_bytes import aggregate_language_bytes, save_agg_language_bytes
+from agg_core.compact import save_compact_outputs
+from agg_core.snapshot_cache import SnapshotCache
+from dts_utils.s3_utils import get_json_object, save_data_to_s3, get_dated_objects
+
+
+SNAPSHOT_SUFFIXES = {"repo_counts": "repo_counts.json", "repos": "repos.parquet", "languages": "languages.parquet"}
+
+
+def get_daily_snapshots(objects: list[dict]) -> dict[str, PeriodSnapshots]:
+    """
+    Returns the key and ETag of the latest snapshot of each day for every snapshot type.
+    This is the finest grain, all intervals are rolled up from it without looking at the objects again.
+    """
+    etags = {obj["Key"]: obj["ETag"] for obj in objects}
+    daily_snapshots = {}
+    for name, suffix in SNAPSHOT_SUFFIXES.items():
+        top_keys = pick_latest_key_per_period(group_keys_by_interval(filter_object_keys(list(etags), suffix), "daily"))
+        daily_snapshots[name] = {day: {"key": key, "etag": etags[key]} for day, key in sorted(top_keys.items())}
+    return daily_snapshots
+
+
+def roll_up_snapshots(daily_snapshots: PeriodSnapshots, interval: Interval) -> PeriodSnapshots:
+    """
+    Derives the latest snapshot of each period of a coarser interval from the daily snapshots,
+    the same latest key per period rule as pick_latest_key_per_period. Periods are in chronological order.
+    """
+    period_snapshots = {}
+    for day in sorted(daily_snapshots):
+        # Later days overwrite earlier ones of the same period
+        period_snapshots[get_period(date.fromisoformat(day), interval)] = daily_snapshots[day]
+    return period_snapshots
+
+
+def get_changed_periods(snapshots: PeriodSnapshots, processed_snapshots: PeriodSnapshots) -> set[str]:
+    """Returns the periods whose latest snapshot differs from the one they were last aggregated from."""
+    return {period for period, snapshot in snapshots.items() if processed_snapshots.get(period) != snapshot}
+
+
+def get_removed_periods(snapshots: PeriodSnapshots, processed_snapshots: PeriodSnapshots) -> set[str]:
+    return set(processed_snapshots) - set(snapshots)
+
+
+def carry_over_unlisted_periods(
+    snapshots: PeriodSnapshots, processed_snapshots: PeriodSnapshots, interval: str, listed_from: date
+) -> PeriodSnapshots:
+    """Adds the processed snapshots of periods that start before the listed date range, they are assumed unchanged."""
+    carried = {
+        period: snapshot for period, snapshot in processed_snapshots.items()
+        if period not in snapshots and get_period_start_date(period, interval) < listed_from
+    }
+    return {**carried, **snapshots}
+
+
+def is_manifest_complete(manifest: dict) -> bool:
+    """A manifest written before a snapshot type was aggregated requires a full rebuild."""
+    return set(SNAPSHOT_SUFFIXES) <= set(manifest)
+
+
+def get_listing_start_date(s3_client, settings, intervals: list[str]) -> date | None:
+    """
+    Returns the date of the latest snapshot processed by all interval manifests.
+    New snapshots are dated after it, so older snapshots can't change the outputs of an incremental run
+    and don't need to be listed. The listing cost stays the same for coarse intervals like yearly.
+    Returns None (list everything) if incremental aggregation is off or a manifest is missing.
+    Snapshots backfilled into older periods are only picked up by a run with incremental aggregation off.
+    """
+    if not settings.incremental_aggregation:
+        return None
+
+    latest_dates = []
+    for interval in intervals:
+        manifest = load_optional_json(s3_client, settings.bucket, settings.get_manifest_path(interval))
+        if manifest is None or not is_manifest_complete(manifest):
+            return None
+        for name in SNAPSHOT_SUFFIXES:
+            if not manifest[name]:
+                return None
+            latest_dates.append(max(get_date_from_key(snapshot["key"]) for snapshot in manifest[name].values()))
+    return min(latest_dates)
+
+
+def merge_period_series(existing: list[dict], new: list[dict], replaced_periods: set[str]) -> list[dict]:
+    """Replaces the entries of the replaced periods in a [{"date": period, ...}] series. Keeps the series sorted by period."""
+    merged = [entry for entry in existing if entry["date"] not in replaced_periods] + new
+    return sorted(merged, key=lambda entry: entry["date"])
+
+
+def merge_repo_comparison_data(existing: RepoComparisonAggData, new: RepoComparisonAggData, replaced_periods: set[str]) -> RepoComparisonAggData:
+    """Replaces the history records of the replaced periods. Repos left without history are dropped."""
+    # Repo ids are strings in the saved JSON
+    merged = {}
+    for repo_id, repo in existing.items():
+        history = [record for record in repo["history"] if record["date"] not in replaced_periods]
+        merged[str(repo_id)] = {"name": repo["name"], "history": history}
+
+    for repo_id, repo in new.items():
+        repo_id = str(repo_id)
+        if repo_id not in merged:
+            merged[repo_id] = {"name": repo["name"], "history": []}
+        merged[repo_id]["history"] = sorted(merged[repo_id]["history"] + repo["history"], key=lambda record: record["date"])
+
+    return {repo_id: repo for repo_id, repo in merged.items() if repo["history"]}
+
+
+def load_optional_json(s3_client, bucket: str, path: str):
+    """Loads a JSON object from S3 or returns None if it doesn't exist."""
+    try:
+        return get_json_object(s3_client, bucket, path)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+
+@dataclass
+class IntervalPlan:
+    """What an aggregation run has to compute for one interval."""
+    interval: str
+    # Latest snapshot of every period per snapshot type ("repo_counts" / "repos"), saved as the new manifest
+    snapshots: dict[str, PeriodSnapshots]
+    # Saved repo counts, primary languages, repo comparison and language bytes outputs, None for a full rebuild
+    existing_outputs: list | None
+    changed_periods: dict[str, set[str]]
+    removed_periods: dict[str, set[str]]
+
+    @property
+    def full_rebuild(self) -> bool:
+        return self.existing_outputs is None
+
+    def get_period_snapshots(self, name: str) -> PeriodSnapshots:
+        """Returns the snapshots to aggregate, all of them for a full rebuild and only the changed ones otherwise."""
+        if self.full_rebuild:
+            return self.snapshots[name]
+        return {period: snapshot for period, snapshot in self.snapshots[name].items() if period in self.changed_periods[name]}
+
+    def get_needed_snapshots(self) -> list[dict[str, str]]:
+        return [snapshot for name in self.snapshots for snapshot in self.get_period_snapshots(name).values()]
+
+
+def plan_interval(
+    s3_client, settings, objects: list[dict], interval: Interval, listed_from: date | None = None,
+    daily_snapshots: dict[str, PeriodSnapshots] | None = None
+) -> IntervalPlan:
+    """
+    Finds the periods of the interval that have to be aggregated.
+    In incremental mode only periods whose latest snapshot changed since the last run (per the manifest)
+    are recomputed and merged into the existing outputs. Falls back to a full rebuild without a manifest.
+    {objects} may only cover snapshots dated from {listed_from}, earlier periods are then taken from the manifest.
+    Periods are rolled up from {daily_snapshots} (computed from {objects} if not given).
+    """
+    manifest = load_optional_json(s3_client, settings.bucket, settings.get_manifest_path(interval)) if settings.incremental_aggregation else None
+    existing_outputs = None
+    if manifest is not None and is_manifest_complete(manifest):
+        existing_outputs = [
+            load_optional_json(s3_client, settings.bucket, settings.get_repo_counts_path(interval)),
+            load_optional_json(s3_client, settings.bucket, settings.get_primary_langs_path(interval)),
+            load_optional_json(s3_client, settings.bucket, settings.get_repo_comparison_path(interval)),
+            load_optional_json(s3_client, settings.bucket, settings.get_language_bytes_path(interval)),
+        ]
+        if any(output is None for output in existing_outputs):
+            existing_outputs = None
+
+    if existing_outputs is None and listed_from is not None:
+        logging.info(f"Full aggregation for interval '{interval}' needs the whole history, listing all snapshots.")
+        objects = get_dated_objects(s3_client, settings.bucket, settings.github_data_prefix, max_workers=settings.s3_list_workers)
+        listed_from = None
+        daily_snapshots = None
+
+    daily_snapshots = daily_snapshots or get_daily_snapshots(objects)
+    snapshots = {name: roll_up_snapshots(daily_snapshots[name], interval) for name in SNAPSHOT_SUFFIXES}
+    if existing_outputs is None:
+        logging.info(f"Planning full aggregation for interval '{interval}'.")
+        return IntervalPlan(interval, snapshots, None, {}, {})
+
+    if listed_from is not None:
+        snapshots = {
+            name: carry_over_unlisted_periods(period_snapshots, manifest[name], interval, listed_from)
+            for name, period_snapshots in snapshots.items()
+        }
+    changed_periods = {name: get_changed_periods(snapshots[name], manifest[name]) for name in snapshots}
+    removed_periods = {name: get_removed_periods(snapshots[name], manifest[name]) for name in snapshots}
+    logging.info(
+        f"Planning incremental aggregation for interval '{interval}'. "
+        f"Changed periods: repo counts {sorted(changed_periods['repo_counts'])}, repos {sorted(changed_periods['repos'])}, "
+        f"languages {sorted(changed_periods['languages'])}."
+    )
+    return IntervalPlan(interval, snapshots, existing_outputs, changed_periods, removed_periods)
+
+
+def run_interval_plan(s3_client, settings, plan: IntervalPlan, snapshot_cache: SnapshotCache) -> None:
+    """Aggregates the planned periods from the snapshot cache, saves the outputs and then the manifest."""
+    interval = plan.interval
+    repo_counts_data = aggregate_repo_counts(snapshot_cache, plan.get_period_snapshots("repo_counts"), interval)
+    primary_langs_data, repo_comparison_data = process_repos_data(snapshot_cache, plan.get_period_snapshots("repos"), interval)
+    language_bytes_data = aggregate_language_bytes(snapshot_cache, plan.get_period_snapshots("languages"), interval)
+
+    if not plan.full_rebuild:
+        existing_repo_counts, existing_primary_langs, existing_repo_comparison, existing_language_bytes = plan.existing_outputs
+        replaced_counts = plan.changed_periods["repo_counts"] | plan.removed_periods["repo_counts"]
+        replaced_repos = plan.changed_periods["repos"] | plan.removed_periods["repos"]
+        repo_counts_data = merge_period_series(existing_repo_counts, repo_counts_data, replaced_counts)
+        primary_langs_data = merge_period_series(existing_primary_langs, primary_langs_data, replaced_repos)
+        repo_comparison_data = merge_repo_comparison_data(existing_repo_comparison, repo_comparison_data, replaced_repos)
+        replaced_languages = plan.changed_periods["languages"] | plan.removed_periods["languages"]
+        language_bytes_data = merge_period_series(existing_language_bytes, language_bytes_data, replaced_languages)
+
+    save_agg_repo_counts(s3_client, settings, interval, repo_counts_data)
+    save_processed_repos_data(s3_client, settings, interval, primary_langs_data, repo_comparison_data)
+    save_agg_language_bytes(s3_client, settings, interval, language_bytes_data)
+    if settings.save_compact_outputs:
+        save_compact_outputs(s3_client, settings, interval, repo_counts_data, primary_langs_data, repo_comparison_data)
+    # Manifest is saved last so a failed run is recomputed by the next one
+    save_data_to_s3(s3_client, settings.bucket, settings.get_manifest_path(interval), plan.snapshots)
+
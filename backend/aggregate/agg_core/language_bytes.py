@@ -0,0 +1,46 @@
+import logging
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from agg_core.types import PeriodSnapshots
+from dts_utils.s3_utils import save_data_to_s3
+
+
+# Languages snapshot columns read for the language byte shares
+LANGUAGE_BYTES_COLUMNS = ["repo_id", "language", "bytes"]
+
+
+def get_language_byte_stats(table: pa.Table) -> dict[str, list]:
+    """
+    Computes the byte total, byte share and number of repos of every language in a long format
+    (repo_id, language, bytes) snapshot with one Arrow group by.
+    A snapshot has one row per repo and language, so the row count of a language is its repo count.
+    Returns a compact series of parallel lists sorted by bytes (descending).
+    """
+    table = table.filter(pc.is_valid(table["language"]))
+    grouped = table.group_by("language").aggregate([("bytes", "sum"), ("repo_id", "count")])
+    grouped = grouped.sort_by([("bytes_sum", "descending"), ("language", "ascending")])
+
+    total_bytes = pc.sum(grouped["bytes_sum"]).as_py() or 0
+    shares = pc.round(pc.divide(pc.cast(grouped["bytes_sum"], pa.float64()), total_bytes or 1), 6)
+    return {
+        "languages": grouped["language"].to_pylist(),
+        "bytes": grouped["bytes_sum"].to_pylist(),
+        "shares": shares.to_pylist(),
+        "repo_counts": grouped["repo_id_count"].to_pylist(),
+    }
+
+
+def aggregate_language_bytes(snapshot_cache, period_snapshots: PeriodSnapshots, interval) -> list[dict]:
+    """Collects the language byte stats of each period from its latest languages snapshot."""
+    logging.info(f"Aggregating language bytes for interval '{interval}'.")
+    return [
+        {"date": period, **snapshot_cache.get_derived(snapshot, "language_byte_stats", get_language_byte_stats)}
+        for period, snapshot in period_snapshots.items()
+    ]
+
+
+def save_agg_language_bytes(s3_client, settings, interval, data):
+    output_path = settings.get_language_bytes_path(interval)
+    save_data_to_s3(s3_client, settings.bucket, output_path, data, settings.output_encodings)
@@ -3,6 +3,10 @@ import pandas as pd
 from dts_utils.s3_utils import save_data_to_s3
 
 
+# Snapshot columns read for the primary language counts
+PRIMARY_LANGUAGE_COLUMNS = ["main_language"]
+
+
 def get_primary_lang_counts(df: pd.DataFrame) -> dict[str, int]:
     counts_dict = df["main_language"].value_counts().to_dict()
     return counts_dict
@@ -10,4 +14,4 @@ def get_primary_lang_counts(df: pd.DataFrame) -> dict[str, int]:
 
 def save_agg_primary_lang_counts(s3_client, settings, interval, data):
     output_path = settings.get_primary_langs_path(interval)
-    save_data_to_s3(s3_client, settings.bucket, output_path, data)
+    save_data_to_s3(s3_client, settings.bucket, output_path, data, settings.output_encodings)
@@ -1,32 +1,26 @@
 import logging
 
-from agg_core.utils import (
-    filter_object_keys, group_keys_by_interval, pick_latest_key_per_period, parse_parquet
-)
-from dts_utils.s3_utils import get_object
 from agg_core.primary_languages import get_primary_lang_counts, save_agg_primary_lang_counts
-from agg_core.repo_comparison import get_repo_comparison_data, save_agg_repo_comparison_data
-from agg_core.types import RepoComparisonAggData
+from agg_core.repo_comparison import build_repo_comparison_data, save_agg_repo_comparison_data, save_agg_repo_comparison_shards
+from agg_core.types import PeriodSnapshots, RepoComparisonAggData
 
 
-def process_repos_data(s3_client, settings, keys, interval):
+def process_repos_data(snapshot_cache, period_snapshots: PeriodSnapshots, interval) -> tuple[list[dict], RepoComparisonAggData]:
+    """Builds primary language counts and repo comparison data from the latest repos snapshot of each period."""
     logging.info(f"Processing repos data for interval '{interval}'.")
 
-    repos_keys = filter_object_keys(keys, "repos.parquet")
-    grouped_repos_keys = group_keys_by_interval(repos_keys, interval)
-    top_repos_keys = pick_latest_key_per_period(grouped_repos_keys)
+    period_dfs = [(period, snapshot_cache.get(snapshot)) for period, snapshot in period_snapshots.items()]
 
-    primary_langs_agg_data = []
-    repo_comparison_agg_data: RepoComparisonAggData = {}
-    
-    for key, value in top_repos_keys.items():
-        date = key
+    primary_langs_agg_data = [
+        {"date": period, "counts": snapshot_cache.get_derived(snapshot, "primary_lang_counts", get_primary_lang_counts)}
+        for period, snapshot in period_snapshots.items()
+    ]
+    repo_comparison_agg_data: RepoComparisonAggData = build_repo_comparison_data(period_dfs)
 
-        obj = get_object(s3_client, settings.bucket, value)
-        repos_df = parse_parquet(obj)
+    return primary_langs_agg_data, repo_comparison_agg_data
 
-        get_repo_comparison_data(repo_comparison_agg_data, repos_df, date)
-        primary_langs_agg_data.append({"date": date, "counts": get_primary_lang_counts(repos_df)})
 
+def save_processed_repos_data(s3_client, settings, interval, primary_langs_agg_data, repo_comparison_agg_data):
     save_agg_primary_lang_counts(s3_client, settings, interval, primary_langs_agg_data)
     save_agg_repo_comparison_data(s3_client, settings, interval, repo_comparison_agg_data)
+    save_agg_repo_comparison_shards(s3_client, settings, interval, repo_comparison_agg_data)
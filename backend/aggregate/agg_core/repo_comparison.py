@@ -1,6 +1,11 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-from dts_utils.s3_utils import save_data_to_s3
+from dts_utils.s3_utils import get_json_object, save_data_to_s3
+from dts_utils.repo_shards import get_repo_shard
 from agg_core.types import RepoComparisonAggData, RepoComparisonHistoryRecord, RepoId
 
 
@@ -27,6 +32,98 @@ def get_repo_comparison_data(repo_comparison_agg_data: RepoComparisonAggData, df
         append_to_repo_history(repo_comparison_agg_data, repo_id, repo_name, record)
 
 
+HISTORY_COLUMNS = ["stars", "forks", "size", "open_issues"]
+# Snapshot columns read for the repo comparison data
+REPO_COMPARISON_COLUMNS = ["id", "name", *HISTORY_COLUMNS]
+
+
+def build_repo_comparison_data(period_dfs: list[tuple[str, pd.DataFrame]]) -> RepoComparisonAggData:
+    """
+    Vectorized equivalent of calling get_repo_comparison_data for each (date, df) in order.
+    The period columns are concatenated with a period index and grouped by repo id in one stable pass:
+    repos keep their first appearance order, histories keep the period order and names come from the first appearance.
+    """
+    if not period_dfs:
+        return {}
+
+    def concat_column(column: str) -> np.ndarray:
+        return np.concatenate([df[column].to_numpy() for _, df in period_dfs])
+
+    dates = np.array([date for date, _ in period_dfs], dtype=object)
+    period_index = np.repeat(np.arange(len(period_dfs)), [len(df) for _, df in period_dfs])
+
+    # Factorize numbers the repo ids by first appearance, the stable sort groups the rows without reordering them
+    codes, repo_ids = pd.factorize(concat_column("id"))
+    order = np.argsort(codes, kind="stable")
+    group_sizes = np.bincount(codes, minlength=len(repo_ids))
+    group_ends = np.cumsum(group_sizes)
+    group_starts = group_ends - group_sizes
+
+    # tolist() converts to Python scalars, the same types itertuples yields
+    columns = [dates[period_index[order]].tolist()] + [concat_column(column)[order].tolist() for column in HISTORY_COLUMNS]
+    records = [
+        {"date": date, "stars": stars, "forks": forks, "size": size, "open_issues": open_issues}
+        for date, stars, forks, size, open_issues in zip(*columns)
+    ]
+    names = concat_column("name")[order[group_starts]].tolist()
+
+    return {
+        repo_id: {"name": name, "history": records[start:end]}
+        for repo_id, name, start, end in zip(repo_ids.tolist(), names, group_starts.tolist(), group_ends.tolist())
+    }
+
+
 def save_agg_repo_comparison_data(s3_client, settings, interval, data):
     output_path = settings.get_repo_comparison_path(interval)
-    save_data_to_s3(s3_client, settings.bucket, output_path, data)
+    save_data_to_s3(s3_client, settings.bucket, output_path, data, settings.output_encodings)
+
+
+def split_repo_comparison_data(data: RepoComparisonAggData, shard_count: int) -> dict[int, RepoComparisonAggData]:
+    """Buckets the repo comparison data into {shard_count} shards by repo id hash. Empty shards are included."""
+    shards = {shard: {} for shard in range(shard_count)}
+    for repo_id, repo in data.items():
+        shards[get_repo_shard(repo_id, shard_count)][repo_id] = repo
+    return shards
+
+
+def get_repo_comparison_index(shards: dict[int, RepoComparisonAggData]) -> dict:
+    """
+    The index holds the shard count readers need to locate a repo's shard with get_repo_shard.
+    It doesn't list the repos, so its size doesn't grow with the number of tracked repos.
+    """
+    return {
+        "shard_count": len(shards),
+        "repo_count": sum(len(shard_data) for shard_data in shards.values()),
+    }
+
+
+def save_agg_repo_comparison_shards(s3_client, settings, interval, data: RepoComparisonAggData):
+    """
+    Saves the repo comparison data as per repo hash buckets plus an index, so readers only download the shards
+    of the repos they need. Every shard is rewritten (a shard without repos is saved empty) and the index is saved last.
+    Shard paths include the shard count, so an index never points to shards of another count. After a change of
+    {repo_comparison_shard_count} the shards of the previous count are deleted once the new index is saved.
+    """
+    shard_count = settings.repo_comparison_shard_count
+    index_path = settings.get_repo_comparison_index_path(interval)
+    try:
+        previous_shard_count = get_json_object(s3_client, settings.bucket, index_path)["shard_count"]
+    except s3_client.exceptions.NoSuchKey:
+        previous_shard_count = None
+
+    shards = split_repo_comparison_data(data, shard_count)
+    logging.info(f"Saving repo comparison data of {len(data)} repos in {len(shards)} shards.")
+
+    def save_shard(shard: int):
+        save_data_to_s3(s3_client, settings.bucket, settings.get_repo_comparison_shard_path(interval, shard, shard_count), shards[shard])
+
+    with ThreadPoolExecutor(max_workers=settings.s3_fetch_workers) as executor:
+        list(executor.map(save_shard, shards))
+    save_data_to_s3(s3_client, settings.bucket, index_path, get_repo_comparison_index(shards))
+
+    if previous_shard_count is not None and previous_shard_count != shard_count:
+        logging.info(f"Deleting the {previous_shard_count} repo comparison shards of the previous shard count.")
+        for shard in range(previous_shard_count):
+            s3_client.delete_object(
+                Bucket=settings.bucket, Key=settings.get_repo_comparison_shard_path(interval, shard, previous_shard_count)
+            )
@@ -1,8 +1,8 @@
 import logging
 import pandas as pd
 
-from agg_core.utils import get_latest_date_key, parse_parquet
-from dts_utils.s3_utils import get_object, save_data_to_s3
+from agg_core.utils import get_latest_date_key
+from dts_utils.s3_utils import save_data_to_s3
 
 
 COLUMNS_TO_KEEP = ["id", "name", "stars"]
@@ -14,12 +14,17 @@ def get_repo_list_dict(df: pd.DataFrame, columns: list[str]) -> list[dict[str, s
     return repo_list
 
 
-def get_repo_list(s3_client, bucket, keys: list[str]) -> list[dict[str, str | int]]:
+def get_latest_repos_snapshot(objects: list[dict]) -> dict[str, str]:
+    """Returns the key and ETag of the latest repos snapshot."""
+    etags = {obj["Key"]: obj["ETag"] for obj in objects}
+    latest_repos_key = get_latest_date_key(list(etags), "repos.parquet")
+    return {"key": latest_repos_key, "etag": etags[latest_repos_key]}
+
+
+def get_repo_list(snapshot_cache, latest_repos_snapshot: dict[str, str]) -> list[dict[str, str | int]]:
     """Builds a list of tuples of repo names and IDs where last seen is the highest last seen"""
     logging.info("Generating repo list.")
-    latest_repos_key = get_latest_date_key(keys, "repos.parquet")
-    repo_obj = get_object(s3_client, bucket, latest_repos_key)
-    df = parse_parquet(repo_obj)
+    df = snapshot_cache.get(latest_repos_snapshot)
     
     repo_list = get_repo_list_dict(df, COLUMNS_TO_KEEP)
     
@@ -28,4 +33,4 @@ def get_repo_list(s3_client, bucket, keys: list[str]) -> list[dict[str, str | in
 
 def save_repo_list(s3_client, settings, data):
     output_path = settings.get_repo_list_path()
-    save_data_to_s3(s3_client, settings.bucket, output_path, data)
\ No newline at end of file
+    save_data_to_s3(s3_client, settings.bucket, output_path, data, settings.output_encodings)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import logging
+
+from agg_core.utils import read_parquet_columns, read_parquet_table
+from agg_core.language_bytes import LANGUAGE_BYTES_COLUMNS
+from agg_core.primary_languages import PRIMARY_LANGUAGE_COLUMNS
+from agg_core.repo_comparison import REPO_COMPARISON_COLUMNS
+from agg_core.repo_list import COLUMNS_TO_KEEP
+from dts_utils import json_codec
+from dts_utils.s3_utils import get_object_body, iter_mapped_objects
+
+
+# Union of the repos snapshot columns read by the aggregators
+REPOS_COLUMNS = list(dict.fromkeys(REPO_COMPARISON_COLUMNS + PRIMARY_LANGUAGE_COLUMNS + COLUMNS_TO_KEEP))
+
+
+class SnapshotCache:
+    """
+    Parsed snapshots of an aggregation run memoized by key and ETag.
+    The latest snapshot of a month is usually also the latest of a week, so all intervals share one cache
+    and every snapshot is downloaded and parsed once per run.
+    Snapshots are {"key", "etag"} records, repo_counts JSON is cached as a dict, repos parquet as a DataFrame
+    and languages parquet as an Arrow table.
+    With a DiskCache, snapshots downloaded by earlier invocations of a warm container are read from disk.
+    """
+    def __init__(self, s3_client, settings, disk_cache=None):
+        self.s3_client = s3_client
+        self.settings = settings
+        self.disk_cache = disk_cache
+        self._entries = {}
+        self._derived = {}
+
+    def _read(self, key: str, etag: str):
+        bucket = self.settings.bucket
+        if key.endswith("languages.parquet"):
+            return read_parquet_table(
+                self.s3_client, bucket, key, LANGUAGE_BYTES_COLUMNS, self.settings.parquet_footer_read_size, etag=etag, disk_cache=self.disk_cache
+            )
+        if key.endswith(".parquet"):
+            return read_parquet_columns(
+                self.s3_client, bucket, key, REPOS_COLUMNS, self.settings.parquet_footer_read_size, etag=etag, disk_cache=self.disk_cache
+            )
+        return json_codec.loads(get_object_body(self.s3_client, bucket, key, etag=etag, disk_cache=self.disk_cache))
+
+    def load(self, snapshots: list[dict[str, str]]) -> None:
+        """Downloads and parses the snapshots that aren't cached yet in parallel."""
+        etags = {snapshot["key"]: snapshot["etag"] for snapshot in snapshots if (snapshot["key"], snapshot["etag"]) not in self._entries}
+        if not etags:
+            return
+        logging.info(f"Loading {len(etags)} snapshots.")
+        def read(key: str):
+            return self._read(key, etags[key])
+
+        for key, value in iter_mapped_objects(read, sorted(etags), self.settings.s3_fetch_workers):
+            self._entries[(key, etags[key])] = value
+
+    def get(self, snapshot: dict[str, str]):
+        cache_key = (snapshot["key"], snapshot["etag"])
+        if cache_key not in self._entries:
+            self.load([snapshot])
+        return self._entries[cache_key]
+
+    def get_derived(self, snapshot: dict[str, str], name: str, compute):
+        """
+        Returns {compute}(snapshot data), computed once per snapshot.
+        A snapshot is the latest of a period in several intervals (a year's last day also ends its month and quarter),
+        the per snapshot aggregates of the coarser intervals are rolled up from the same results.
+        """
+        cache_key = (snapshot["key"], snapshot["etag"], name)
+        if cache_key not in self._derived:
+            self._derived[cache_key] = compute(self.get(snapshot))
+        return self._derived[cache_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
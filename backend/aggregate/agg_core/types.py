@@ -1,4 +1,4 @@
-from typing import TypedDict, Dict
+from typing import TypedDict, Dict, Literal
 
 RepoId = int
 
@@ -16,3 +16,10 @@ class RepoComparison(TypedDict):
 
 
 RepoComparisonAggData = Dict[RepoId, RepoComparison]
+
+
+# {period: {"key": snapshot key, "etag": snapshot ETag}}
+PeriodSnapshots = Dict[str, Dict[str, str]]
+
+
+Interval = Literal["daily", "weekly", "monthly", "quarterly", "yearly"]
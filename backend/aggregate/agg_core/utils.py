@@ -1,14 +1,14 @@
 from datetime import datetime, date
 from collections import defaultdict
 import logging
-from typing import Literal
 from io import BytesIO
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-
-def get_object_keys(objects: list[dict]) -> list:
-    return [obj["Key"] for obj in objects]
+from agg_core.types import Interval
+from dts_utils.s3_utils import S3RangeFile, get_object_tail
 
 
 def filter_object_keys(keys: list[str], suffix: str) -> list[str]:
@@ -27,19 +27,45 @@ def get_iso_year_week(date: date) -> str:
     return year_period
 
 
-def group_keys_by_interval(keys: list[str], interval: Literal["weekly", "monthly"]) -> dict[str, list[str]]:
-    """Groups S3 keys by period (month / week)"""
+def get_period(date: date, interval: Interval) -> str:
+    """Formats a date into its period of the interval (2025-11-28 / 2025-W48 / 2025-11 / 2025-Q4 / 2025)."""
+    if interval == "daily":
+        return date.isoformat()
+    if interval == "weekly":
+        return get_iso_year_week(date)
+    if interval == "monthly":
+        return f"{date.year}-{date.month:02}"
+    if interval == "quarterly":
+        return f"{date.year}-Q{(date.month - 1) // 3 + 1}"
+    if interval == "yearly":
+        return str(date.year)
+    raise Exception(f"Unknown interval '{interval}'!")
+
+
+def group_keys_by_interval(keys: list[str], interval: Interval) -> dict[str, list[str]]:
+    """Groups S3 keys by period (day / week / month / quarter / year)"""
     grouped_dates = defaultdict(list)
     for key in keys:
-        date = get_date_from_key(key)
-        if interval == "weekly":
-            year_period = get_iso_year_week(date)
-        elif interval == "monthly":
-            year_period = f"{date.year}-{date.month:02}"
-        grouped_dates[year_period].append(key)
+        grouped_dates[get_period(get_date_from_key(key), interval)].append(key)
     return grouped_dates
 
 
+def get_period_start_date(period: str, interval: Interval) -> date:
+    """Returns the first day of a period (2025-11-28 / 2025-W48 / 2025-11 / 2025-Q4 / 2025)."""
+    if interval == "daily":
+        return date.fromisoformat(period)
+    if interval == "weekly":
+        year, week = period.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1)
+    if interval == "quarterly":
+        year, quarter = period.split("-Q")
+        return date(int(year), 3 * int(quarter) - 2, 1)
+    if interval == "yearly":
+        return date(int(period), 1, 1)
+    year, month = period.split("-")
+    return date(int(year), int(month), 1)
+
+
 def pick_latest_key_per_period(grouped_keys: dict[str, list[str]]) -> dict[str, str]:
     """Picks keys with the latest date for each group"""
     latest_key_per_period = {}
@@ -49,11 +75,48 @@ def pick_latest_key_per_period(grouped_keys: dict[str, list[str]]) -> dict[str,
     return latest_key_per_period
 
 
-def parse_parquet(obj) -> pd.DataFrame:
-    """Reads parquet S3 object and returns table as pandas DataFrame"""
-    logging.debug("Parsing parquet object.")
-    body = obj["Body"].read()
-    return pd.read_parquet(BytesIO(body))
+def read_parquet_columns(
+    s3_client, bucket: str, key: str, columns: list[str], footer_read_size: int = 64 * 1024, etag: str | None = None, disk_cache=None
+) -> pd.DataFrame:
+    """Reads only {columns} of a parquet S3 object as pandas DataFrame (see read_parquet_table)."""
+    return read_parquet_table(s3_client, bucket, key, columns, footer_read_size, etag, disk_cache).to_pandas()
+
+
+def read_parquet_table(
+    s3_client, bucket: str, key: str, columns: list[str], footer_read_size: int = 64 * 1024, etag: str | None = None, disk_cache=None
+) -> pa.Table:
+    """
+    Reads only {columns} of a parquet S3 object with byte-range requests.
+    The last {footer_read_size} bytes usually hold the whole footer, objects smaller than that are read in that one request.
+    Otherwise pyarrow reads the footer and pre-buffers the chunks of the needed columns into coalesced ranged GETs,
+    the chunks of other columns are never downloaded.
+    With a DiskCache the projected table is cached as a parquet file under the object's {etag}.
+    """
+    if disk_cache is not None:
+        etag = etag or s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+        variant = "columns=" + ",".join(columns)
+        path = disk_cache.get_path(bucket, key, etag, variant)
+        if path is not None:
+            try:
+                table = pq.read_table(path, columns=columns)
+                logging.debug(f"Read {columns} of '{key}' from the disk cache.")
+                return table
+            except FileNotFoundError:
+                disk_cache.record_evicted_read()
+
+    tail, size = get_object_tail(s3_client, bucket, key, footer_read_size)
+    if len(tail) == size:
+        table = pq.read_table(BytesIO(tail), columns=columns)
+    else:
+        range_file = S3RangeFile(s3_client, bucket, key, size, tail=tail)
+        table = pq.read_table(pa.PythonFile(range_file, mode="r"), columns=columns, pre_buffer=True)
+        logging.debug(f"Read {columns} of '{key}' ({size} bytes) with {range_file.range_requests + 1} ranged requests.")
+
+    if disk_cache is not None:
+        buffer = BytesIO()
+        pq.write_table(table, buffer)
+        disk_cache.put(bucket, key, etag, buffer.getvalue(), variant)
+    return table
 
 
 def get_latest_date_key(keys: list[str], suffix: str) -> str:
@@ -1,15 +1,14 @@
 import logging
 
 from dts_utils.s3_utils import (
-    running_on_lambda, setup_logging, create_s3_client, get_all_objects
+    running_on_lambda, setup_logging, create_s3_client, get_dated_objects
 )
 from agg_core.config import Settings
-from agg_core.utils import (
-    get_object_keys, filter_object_keys
-)
-from agg_core.repo_counts import aggregate_repo_counts, save_agg_repo_counts
-from agg_core.repo_list import get_repo_list, save_repo_list
-from agg_core.process_repos import process_repos_data
+from agg_core.repo_list import get_latest_repos_snapshot, get_repo_list, save_repo_list
+from agg_core.incremental import get_daily_snapshots, get_listing_start_date, plan_interval, run_interval_plan
+from agg_core.snapshot_cache import SnapshotCache
+from agg_core.history import compact_history
+from dts_utils.disk_cache import DiskCache
 
 if not running_on_lambda():
     from dotenv import load_dotenv
@@ -17,27 +16,41 @@ if not running_on_lambda():
 
 settings = Settings()
 setup_logging(settings.logging_level)
+# Module level so warm containers reuse the snapshots downloaded by earlier invocations
+disk_cache = DiskCache(settings.disk_cache_dir, settings.disk_cache_max_bytes) if settings.use_disk_cache else None
 
 
 def lambda_handler(event, context):
     logging.info("Starting aggregation lambda.")
-    s3_client = create_s3_client(settings.profile, settings.region)
-
-    objects = get_all_objects(s3_client, settings.bucket, settings.github_data_prefix)
-    keys = get_object_keys(objects)
-
-    repo_list = get_repo_list(s3_client, settings.bucket, keys)
+    s3_client = create_s3_client(settings.profile, settings.region, max_pool_connections=settings.s3_max_pool_connections)
+
+    intervals = settings.aggregation_intervals
+    listed_from = get_listing_start_date(s3_client, settings, intervals)
+    logging.info(f"Listing snapshots from {listed_from or 'the beginning'}.")
+    objects = get_dated_objects(
+        s3_client, settings.bucket, settings.github_data_prefix, start_date=listed_from, max_workers=settings.s3_list_workers
+    )
+
+    # Plan all intervals first so every snapshot they need is downloaded and parsed once.
+    # Every interval is rolled up from the latest snapshot of each day.
+    daily_snapshots = get_daily_snapshots(objects)
+    plans = [plan_interval(s3_client, settings, objects, interval, listed_from, daily_snapshots) for interval in intervals]
+    latest_repos_snapshot = get_latest_repos_snapshot(objects)
+    snapshot_cache = SnapshotCache(s3_client, settings, disk_cache=disk_cache)
+    snapshot_cache.load([latest_repos_snapshot] + [snapshot for plan in plans for snapshot in plan.get_needed_snapshots()])
+
+    repo_list = get_repo_list(snapshot_cache, latest_repos_snapshot)
     save_repo_list(s3_client, settings, repo_list)
 
-    intervals = ["weekly", "monthly"]
-    for interval in intervals:
-        logging.info(f"Processing interval '{interval}'.")
-        repo_count_keys = filter_object_keys(keys, "repo_counts.json")
-        repo_counts_data = aggregate_repo_counts(s3_client, repo_count_keys, interval, settings)
-        save_agg_repo_counts(s3_client, settings, interval, repo_counts_data)
-
-        process_repos_data(s3_client, settings, keys, interval)
+    for plan in plans:
+        logging.info(f"Processing interval '{plan.interval}'.")
+        run_interval_plan(s3_client, settings, plan, snapshot_cache)
     
+    if settings.compact_history:
+        compact_history(s3_client, settings, objects, listed_from, disk_cache)
+
+    if disk_cache is not None:
+        logging.info(f"Disk cache: {disk_cache.hits} hits, {disk_cache.misses} misses, {disk_cache.get_size()} bytes.")
     logging.info("Aggregation lambda finished.")
 
 
@@ -10,6 +10,12 @@ class Settings(BaseSettings):
     logging_level: str = "INFO"
     allowed_origins: str = "http://127.0.0.1:5500"
     api_prefix: str = ""
+    max_selected_repos: int = 5
+    # Pre-compressed output variants served as stored, in order of preference
+    content_encodings: list[str] = ["br", "gzip"]
+    use_disk_cache: bool = True
+    disk_cache_dir: str = "/tmp/s3_cache"
+    disk_cache_max_bytes: int = 256 * 1024 * 1024
 
 
     def get_repo_list_path(self):
@@ -22,4 +28,22 @@ class Settings(BaseSettings):
         return f"{self.aggregated_data_prefix}/primary_langs_counts/{interval}.json"
     
     def get_repo_counts_path(self, interval):
-        return f"{self.aggregated_data_prefix}/repo_counts/{interval}.json"
\ No newline at end of file
+        return f"{self.aggregated_data_prefix}/repo_counts/{interval}.json"
+
+    def get_language_bytes_path(self, interval):
+        return f"{self.aggregated_data_prefix}/language_bytes/{interval}.json"
+
+    def get_compact_repo_counts_path(self, interval):
+        return f"{self.aggregated_data_prefix}/compact/repo_counts/{interval}.json"
+
+    def get_compact_primary_languages_path(self, interval):
+        return f"{self.aggregated_data_prefix}/compact/primary_langs_counts/{interval}.json"
+
+    def get_compact_repo_comparison_path(self, interval):
+        return f"{self.aggregated_data_prefix}/compact/repo_comparison/{interval}.json"
+
+    def get_repo_comparison_shard_path(self, interval, shard, shard_count):
+        return f"{self.aggregated_data_prefix}/repo_comparison_shards/{interval}/shard_{shard:04}_of_{shard_count:04}.json"
+
+    def get_repo_comparison_index_path(self, interval):
+        return f"{self.aggregated_data_prefix}/repo_comparison_shards/{interval}/index.json"
\ No newline at end of file
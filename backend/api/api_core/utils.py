@@ -22,4 +22,40 @@ def get_seconds_until_midnight():
     tz = timezone(timedelta(hours=1))
     now_tz = now.astimezone(tz)
     midnight = (now_tz + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-    return int((midnight - now_tz).total_seconds())
\ No newline at end of file
+    return int((midnight - now_tz).total_seconds())
+
+
+# Media type clients send in the Accept header to get the compact (struct of arrays) outputs
+COMPACT_MEDIA_TYPE = "application/vnd.dts.compact+json"
+
+
+def is_compact_requested(output_format: str | None, accept: str | None) -> bool:
+    """The format query parameter wins over the Accept header, records stay the default."""
+    if output_format is not None:
+        return output_format == "compact"
+    return accept is not None and COMPACT_MEDIA_TYPE in accept
+
+
+def get_accepted_encodings(accept_encoding: str | None, encodings: list[str]) -> list[str]:
+    """
+    Orders the pre-compressed variants a client accepts per its Accept-Encoding header ("br;q=1.0, gzip;q=0.8, *;q=0.1").
+    Higher quality values come first, ties keep the order of {encodings}. Encodings with q=0 are left out.
+    """
+    if not accept_encoding:
+        return []
+
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    accepted = [(qualities.get(encoding, qualities.get("*", 0.0)), encoding) for encoding in encodings]
+    # sorted is stable, equal qualities stay in server preference order
+    return [encoding for quality, encoding in sorted(accepted, key=lambda item: -item[0]) if quality > 0]
@@ -1,14 +1,26 @@
 import logging
 from typing import Literal
 
-from fastapi import FastAPI, APIRouter, Response
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from mangum import Mangum
+from botocore.exceptions import ClientError
 
 from api_core.config import Settings
-from api_core.utils import timer, get_seconds_until_midnight
-from dts_utils.s3_utils import create_s3_client, running_on_lambda, get_json_object, setup_logging
+from api_core.utils import timer, get_seconds_until_midnight, is_compact_requested, get_accepted_encodings
+from dts_utils.s3_utils import (
+    create_s3_client, running_on_lambda, get_json_object, get_object_body, setup_logging, iter_mapped_objects
+)
+from dts_utils import json_codec
+from dts_utils.compression import get_encoded_path
+from dts_utils.repo_shards import get_repo_shard
+from dts_utils.disk_cache import DiskCache
+
+# Intervals the aggregation can produce, which of them exist depends on its aggregation_intervals setting
+Interval = Literal["daily", "weekly", "monthly", "quarterly", "yearly"]
+# "records" is the original shape, "compact" a shared date axis with parallel (delta encoded) arrays
+OutputFormat = Literal["records", "compact"]
 
 is_lambda_env = running_on_lambda()
 
@@ -28,57 +40,144 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Only compresses outputs saved without pre-compressed variants, responses with a Content-Encoding are passed through
 app.add_middleware(GZipMiddleware, minimum_size=10000)
 
 s3_client = create_s3_client(settings.profile, settings.region)
+# Warm containers validate cached outputs with a HEAD request instead of downloading them again
+disk_cache = DiskCache(settings.disk_cache_dir, settings.disk_cache_max_bytes) if settings.use_disk_cache else None
+
+
+def is_missing_key(error: ClientError) -> bool:
+    # A missing key is NoSuchKey for GET and a bare 404 for the HEAD request of the disk cache
+    return error.response["Error"]["Code"] in ("NoSuchKey", "404")
+
+
+def get_output(data_path: str):
+    """Loads an aggregated output. Outputs of intervals the aggregation doesn't produce are a 404."""
+    try:
+        return get_json_object(s3_client, settings.bucket, data_path, disk_cache=disk_cache)
+    except ClientError as error:
+        if not is_missing_key(error):
+            raise
+        raise HTTPException(status_code=404, detail=f"No data found for '{data_path}'.")
+
+
+def get_output_body(data_path: str) -> bytes:
+    """Downloads the stored bytes of an output, a missing output is a 404."""
+    try:
+        return get_object_body(s3_client, settings.bucket, data_path, disk_cache=disk_cache)
+    except ClientError as error:
+        if not is_missing_key(error):
+            raise
+        raise HTTPException(status_code=404, detail=f"No data found for '{data_path}'.")
+
+
+def get_cache_headers(vary: list[str] = ()) -> dict[str, str]:
+    headers = {"Cache-Control": f"public, max-age={get_seconds_until_midnight()}"}
+    if vary:
+        # The body depends on these request headers, shared caches must key on them
+        headers["Vary"] = ", ".join(vary)
+    return headers
+
+
+def get_output_response(data_path: str, accept_encoding: str | None, vary: list[str] = ()) -> Response:
+    """
+    Serves the stored bytes of an output without parsing or re-encoding them.
+    The first pre-compressed variant the client accepts is returned with its Content-Encoding, which
+    the GZip middleware leaves alone. Outputs saved without variants fall back to the plain JSON bytes.
+    """
+    for encoding in get_accepted_encodings(accept_encoding, settings.content_encodings):
+        try:
+            body = get_object_body(s3_client, settings.bucket, get_encoded_path(data_path, encoding), disk_cache=disk_cache)
+        except ClientError as error:
+            if not is_missing_key(error):
+                raise
+            logging.debug(f"No '{encoding}' variant of '{data_path}'.")
+            continue
+        headers = {**get_cache_headers([*vary, "Accept-Encoding"]), "Content-Encoding": encoding}
+        return Response(body, media_type="application/json", headers=headers)
+    # The GZip middleware adds Accept-Encoding to Vary of the responses it handles
+    return Response(get_output_body(data_path), media_type="application/json", headers=get_cache_headers(vary))
 
 
 @router.get("/repo-counts")
 @timer
-def get_repo_counts(interval: Literal["weekly", "monthly"], response: Response):
-    logging.info(f"Fetching repo counts for interval '{interval}'.")
-    data_path = settings.get_repo_counts_path(interval)
-    content = get_json_object(s3_client, settings.bucket, data_path)
-
-    max_age = get_seconds_until_midnight()
-    response.headers["Cache-Control"] = f"public, max-age={max_age}"
-    return content
+def get_repo_counts(
+    interval: Interval, format: OutputFormat | None = None, accept: str | None = Header(None),
+    accept_encoding: str | None = Header(None)
+):
+    compact = is_compact_requested(format, accept)
+    logging.info(f"Fetching {'compact ' if compact else ''}repo counts for interval '{interval}'.")
+    data_path = settings.get_compact_repo_counts_path(interval) if compact else settings.get_repo_counts_path(interval)
+    return get_output_response(data_path, accept_encoding, vary=["Accept"] if format is None else [])
 
 
 @router.get("/primary-languages")
 @timer
-def get_primary_languages(interval: Literal["weekly", "monthly"], response: Response):
-    logging.info(f"Fetching primary languages for interval '{interval}'.")
-    data_path = settings.get_primary_languages_path(interval)
-    content = get_json_object(s3_client, settings.bucket, data_path)
+def get_primary_languages(
+    interval: Interval, format: OutputFormat | None = None, accept: str | None = Header(None),
+    accept_encoding: str | None = Header(None)
+):
+    compact = is_compact_requested(format, accept)
+    logging.info(f"Fetching {'compact ' if compact else ''}primary languages for interval '{interval}'.")
+    data_path = settings.get_compact_primary_languages_path(interval) if compact else settings.get_primary_languages_path(interval)
+    return get_output_response(data_path, accept_encoding, vary=["Accept"] if format is None else [])
 
-    max_age = get_seconds_until_midnight()
-    response.headers["Cache-Control"] = f"public, max-age={max_age}"
-    return content
+
+@router.get("/language-bytes")
+@timer
+def get_language_bytes(interval: Interval, accept_encoding: str | None = Header(None)):
+    logging.info(f"Fetching language bytes for interval '{interval}'.")
+    data_path = settings.get_language_bytes_path(interval)
+    return get_output_response(data_path, accept_encoding)
 
 
 @router.get("/repo-list")
 @timer
-def get_repo_list(response: Response):
+def get_repo_list(accept_encoding: str | None = Header(None)):
     logging.info("Fetching repo list.")
     repo_list_path = settings.get_repo_list_path()
-    content = get_json_object(s3_client, settings.bucket, repo_list_path)
-    
-    max_age = get_seconds_until_midnight()
-    response.headers["Cache-Control"] = f"public, max-age={max_age}"
-    return content
+    return get_output_response(repo_list_path, accept_encoding)
 
 
 @router.get("/repo-comparison")
 @timer
-def get_repo_comparison_data(interval: Literal["weekly", "monthly"], response: Response):
-    logging.info(f"Fetching repo comparison data for interval '{interval}'.")
-    repo_comparison_path = settings.get_repo_comparison_path(interval)
-    content = get_json_object(s3_client, settings.bucket, repo_comparison_path)
-
-    max_age = get_seconds_until_midnight()
-    response.headers["Cache-Control"] = f"public, max-age={max_age}"
-    return content
+def get_repo_comparison_data(
+    interval: Interval, format: OutputFormat | None = None, accept: str | None = Header(None),
+    accept_encoding: str | None = Header(None)
+):
+    compact = is_compact_requested(format, accept)
+    logging.info(f"Fetching {'compact ' if compact else ''}repo comparison data for interval '{interval}'.")
+    if compact:
+        repo_comparison_path = settings.get_compact_repo_comparison_path(interval)
+    else:
+        repo_comparison_path = settings.get_repo_comparison_path(interval)
+    return get_output_response(repo_comparison_path, accept_encoding, vary=["Accept"] if format is None else [])
+
+
+@router.get("/repo-comparison/repos")
+@timer
+def get_selected_repo_comparison_data(
+    interval: Interval, repo_ids: list[int] = Query(min_length=1, max_length=settings.max_selected_repos)
+):
+    """
+    Repo comparison data of the selected repos only, read from the shards that contain them.
+    Encoded with the shared JSON codec and returned as a raw Response, skipping FastAPI's jsonable_encoder.
+    """
+    logging.info(f"Fetching repo comparison data of repos {repo_ids} for interval '{interval}'.")
+    index = get_output(settings.get_repo_comparison_index_path(interval))
+    shard_count = index["shard_count"]
+    shards = {get_repo_shard(repo_id, shard_count) for repo_id in repo_ids}
+    shard_paths = [settings.get_repo_comparison_shard_path(interval, shard, shard_count) for shard in sorted(shards)]
+
+    shard_data = {}
+    for _, content in iter_mapped_objects(get_output, shard_paths, max_workers=len(shard_paths) or 1):
+        shard_data.update(content)
+    # Unknown repos are left out, the order follows the request
+    content = {str(repo_id): shard_data[str(repo_id)] for repo_id in repo_ids if str(repo_id) in shard_data}
+
+    return Response(json_codec.dumps(content), media_type="application/json", headers=get_cache_headers())
 
 
 app.include_router(router)
@@ -0,0 +1,62 @@
+import logging
+import threading
+from urllib import parse
+
+from dts_utils.s3_utils import get_json_object, save_data_to_s3
+
+
+class CheckpointStore:
+    """
+    Partial extraction results saved under a run scoped S3 prefix.
+    A re-invocation for the same run date loads them instead of fetching the data again.
+    """
+    def __init__(self, s3_client, bucket: str, prefix: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.keys = set()
+        self._lock = threading.Lock()
+
+    def get_topic_key(self, topic: str) -> str:
+        return f"{self.prefix}/topics/{parse.quote(topic, safe='')}.json"
+
+    def get_language_batch_key(self, batch_index: int) -> str:
+        return f"{self.prefix}/languages/batch_{batch_index:05}.json"
+
+    def _load(self, key: str):
+        try:
+            data = get_json_object(self.s3_client, self.bucket, key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        with self._lock:
+            self.keys.add(key)
+        return data
+
+    def _save(self, key: str, data) -> None:
+        save_data_to_s3(self.s3_client, self.bucket, key, data)
+        with self._lock:
+            self.keys.add(key)
+
+    def load_topic(self, topic: str) -> dict | None:
+        return self._load(self.get_topic_key(topic))
+
+    def save_topic(self, topic: str, checkpoint: dict) -> None:
+        self._save(self.get_topic_key(topic), checkpoint)
+
+    def load_language_batch(self, batch_index: int) -> list[dict] | None:
+        return self._load(self.get_language_batch_key(batch_index))
+
+    def save_language_batch(self, batch_index: int, language_data: list[dict]) -> None:
+        self._save(self.get_language_batch_key(batch_index), language_data)
+
+    def clear(self) -> None:
+        """Deletes all checkpoints loaded or saved during the run once the final outputs are written."""
+        keys = sorted(self.keys)
+        logging.info(f"Deleting {len(keys)} checkpoints under '{self.prefix}'.")
+        # delete_objects accepts up to 1000 keys per call
+        for i in range(0, len(keys), 1000):
+            self.s3_client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True}
+            )
+        self.keys.clear()
@@ -0,0 +1,92 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from extract_core.rate_limit import RequestScheduler, is_graphql_rate_limited
+from extract_core.utils import make_get_request, make_request
+
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+
+def get_headers() -> dict:
+    """Default headers of the session. The Authorization header is set per request from the token pool."""
+    return {
+        "User-Agent": "data-tech-stats",
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip"
+    }
+
+
+def create_session(settings) -> requests.Session:
+    """Creates a keep-alive session with a connection pool of {http_pool_size} connections per host."""
+    session = requests.Session()
+    # Retries are handled by make_get_request so they go through the scheduler
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.http_pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.headers.update(get_headers())
+    return session
+
+
+class GitHubClient:
+    """Pooled HTTP session and request scheduler shared by all GitHub API calls of an extraction run."""
+    def __init__(self, settings, scheduler: RequestScheduler | None = None):
+        self.session = create_session(settings)
+        self.scheduler = scheduler or RequestScheduler(settings)
+        self.timeout = (settings.connect_timeout, settings.read_timeout)
+
+    def get(self, url: str, resource: str = "core", headers: dict | None = None) -> requests.Response:
+        return make_get_request(
+            url=url, session=self.session, scheduler=self.scheduler, resource=resource, headers=headers, timeout=self.timeout
+        )
+
+    def post_graphql(self, query: str, variables: dict, max_retries: int = 5) -> dict:
+        """
+        Runs a GraphQL query and returns its data. Fails if the query returned errors without data.
+        Rate limited queries (RATE_LIMITED errors) are retried up to {max_retries} times after the scheduler's wait.
+        """
+        for attempt in range(max_retries + 1):
+            response = make_request(
+                "POST", url=GITHUB_GRAPHQL_URL, session=self.session, scheduler=self.scheduler, resource="graphql",
+                json={"query": query, "variables": variables}, timeout=self.timeout
+            )
+            payload = response.json()
+            if not is_graphql_rate_limited(payload):
+                break
+            if attempt == max_retries:
+                raise Exception(f"Max retries ({max_retries}) reached for the rate limited GraphQL query!")
+            logging.warning(f"GraphQL query was rate limited. Errors: {payload['errors']}. Retrying.")
+            self.scheduler.handle_graphql_rate_limit(response, attempt)
+
+        if payload.get("data") is None:
+            raise Exception(f"GraphQL query failed! Errors: {payload.get('errors')}")
+        if payload.get("errors"):
+            logging.warning(f"GraphQL query returned partial data. Errors: {payload['errors']}")
+        return payload["data"]
+
+    def get_connection_stats(self) -> dict[str, int]:
+        """Counts requests made and connections opened by the session's pools."""
+        pools = [
+            adapter.poolmanager.pools[key]
+            for adapter in set(self.session.adapters.values())
+            for key in adapter.poolmanager.pools.keys()
+        ]
+        requests_made = sum(pool.num_requests for pool in pools)
+        new_connections = sum(pool.num_connections for pool in pools)
+        return {
+            "requests": requests_made,
+            "new_connections": new_connections,
+            "reused_connections": requests_made - new_connections
+        }
+
+    def log_connection_stats(self) -> None:
+        stats = self.get_connection_stats()
+        logging.info(
+            f"GitHub requests: {stats['requests']}, new connections: {stats['new_connections']}, "
+            f"reused connections: {stats['reused_connections']}."
+        )
+
+    def close(self) -> None:
+        self.log_connection_stats()
+        self.session.close()
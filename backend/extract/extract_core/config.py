@@ -1,27 +1,72 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    github_api_token: str
     bucket: str
+    github_api_token: str | None = None
+    github_api_tokens: list[str] = []
 
     github_data_prefix: str = "github_data"
     reference_data_prefix: str = "reference_data"
     config_files_prefix: str = "config_files"
+    checkpoints_prefix: str = "checkpoints"
+    shards_prefix: str = "shards"
+    shard_count: int = 1
+    extraction_backend: Literal["rest", "graphql"] = "rest"
     results_per_page: int = 100
     pages_per_topic: int = 10
     languages_per_topic: int = 50
+    use_etag_cache: bool = True
+    topic_fetch_workers: int = 4
+    language_fetch_workers: int = 8
+    use_checkpoints: bool = True
+    language_batch_size: int = 100
+    search_requests_per_minute: int = 30
+    core_requests_per_second: float = 10.0
+    graphql_requests_per_second: float = 2.0
+    secondary_rate_limit_cooldown: float = 60.0
+    http_pool_size: int = 16
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    parquet_row_group_size: int = 10000
+    export_registry_json: bool = False
     profile: str = "default"
     region: str = "eu-central-1"
     logging_level: str = "INFO"
     
     
+    def get_github_api_tokens(self) -> list[str]:
+        """Returns the token pool. A single github_api_token is used as a pool of one."""
+        tokens = list(self.github_api_tokens)
+        if self.github_api_token and self.github_api_token not in tokens:
+            tokens.insert(0, self.github_api_token)
+        return tokens
+
     def get_search_queries_path(self) -> str:
         return f"{self.config_files_prefix}/search_queries.json"
 
     def get_repo_registry_path(self) -> str:
         return f"{self.reference_data_prefix}/repo_registry.json"
 
+    def get_repo_registry_parquet_path(self) -> str:
+        return f"{self.reference_data_prefix}/repo_registry.parquet"
+
+    def get_etag_cache_path(self) -> str:
+        return f"{self.reference_data_prefix}/languages_etag_cache.json"
+
+    def get_shard_etag_cache_path(self, run_datetime, shard_name: str) -> str:
+        # Shards save the entries they used here, the merge stage folds them into the shared cache
+        return f"{self.shards_prefix.rstrip('/')}/{run_datetime.strftime('%Y/%m/%d')}/{shard_name}_etag_cache.json"
+
+    def get_checkpoints_prefix(self, run_datetime, shard_name: str | None = None) -> str:
+        prefix = f"{self.checkpoints_prefix.rstrip('/')}/{run_datetime.strftime('%Y/%m/%d')}"
+        return f"{prefix}/{shard_name}" if shard_name else prefix
+
+    def get_shard_result_path(self, run_datetime, shard_name: str) -> str:
+        return f"{self.shards_prefix.rstrip('/')}/{run_datetime.strftime('%Y/%m/%d')}/{shard_name}.json"
+
     def get_repos_path(self, run_datetime) -> str:
         return f"{self.github_data_prefix.rstrip('/')}/{run_datetime.strftime('%Y/%m/%d')}/repos.parquet"
 
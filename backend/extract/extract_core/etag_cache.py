@@ -0,0 +1,90 @@
+import logging
+import threading
+
+import requests
+
+from dts_utils.s3_utils import get_json_object, save_data_to_s3
+
+
+class ETagCache:
+    """
+    Thread safe cache of response validators (ETag / Last-Modified) and parsed bodies keyed by URL.
+    Only entries used during the current run are exported, so URLs which are no longer requested drop out.
+    """
+    def __init__(self, entries: dict[str, dict] | None = None):
+        self.entries = entries or {}
+        self.used_urls = set()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_conditional_headers(self, url: str) -> dict[str, str]:
+        entry = self.entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def resolve(self, url: str, response: requests.Response):
+        """Returns the cached body for a 304 response, otherwise stores and returns the new body."""
+        with self._lock:
+            self.used_urls.add(url)
+            if response.status_code == 304 and url in self.entries:
+                self.hits += 1
+                return self.entries[url]["body"]
+
+            self.misses += 1
+            body = response.json()
+            self.entries[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body": body
+            }
+            return body
+
+    def mark_used(self, urls: list[str]) -> None:
+        """Keeps the entries of {urls} in the export without resolving them (e.g. results resumed from a checkpoint)."""
+        with self._lock:
+            self.used_urls.update(urls)
+
+    def to_dict(self) -> dict[str, dict]:
+        return {url: entry for url, entry in self.entries.items() if url in self.used_urls}
+
+
+def load_etag_cache(s3_client, bucket: str, path: str) -> ETagCache:
+    """Loads the ETag cache from S3. Starts with an empty cache if the object doesn't exist yet."""
+    try:
+        entries = get_json_object(s3_client, bucket, path)
+    except s3_client.exceptions.NoSuchKey:
+        logging.info(f"No ETag cache found at '{path}'. Starting with an empty cache.")
+        entries = {}
+    return ETagCache(entries)
+
+
+def save_etag_cache(s3_client, bucket: str, path: str, etag_cache: ETagCache) -> None:
+    logging.info(f"ETag cache hits: {etag_cache.hits}, misses: {etag_cache.misses}.")
+    save_data_to_s3(s3_client, bucket, path, etag_cache.to_dict())
+
+
+def merge_etag_caches(s3_client, bucket: str, shard_paths: list[str], path: str) -> None:
+    """
+    Saves the union of the shard caches at {shard_paths} as the shared cache at {path}.
+    Every shard starts from the shared cache, so its entries don't depend on the shard count.
+    The shared cache is kept as is if no shard saved a cache.
+    """
+    entries = {}
+    merged_shards = 0
+    for shard_path in shard_paths:
+        try:
+            entries.update(get_json_object(s3_client, bucket, shard_path))
+            merged_shards += 1
+        except s3_client.exceptions.NoSuchKey:
+            logging.warning(f"No shard ETag cache found at '{shard_path}'. Its entries are dropped from the shared cache.")
+    if merged_shards == 0:
+        return
+    logging.info(f"Merged {len(entries)} ETag cache entries of {merged_shards} shards.")
+    save_data_to_s3(s3_client, bucket, path, entries)
@@ -2,16 +2,16 @@ import time
 import logging
 from collections import defaultdict
 from urllib import parse
+from concurrent.futures import ThreadPoolExecutor
 
-from extract_core.utils import make_get_request, get_scaled_delay
+from extract_core.client import GitHubClient
+from extract_core.etag_cache import ETagCache
+from extract_core.checkpoint import CheckpointStore
 
 
-def get_headers(token: str) -> dict:
-    return {
-        "User-Agent": "data-tech-stats",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {token}"
-    }
+# The search API returns at most 1000 results per query
+MAX_SEARCH_RESULTS = 1000
+
 
 def parse_repo_data(data: list[dict], topic_queried: str) -> list[dict]:
     """Parses repo data and keeps and renames specific keys."""
@@ -36,30 +36,41 @@ def parse_repo_data(data: list[dict], topic_queried: str) -> list[dict]:
     return parsed_data
 
 
-def get_repos_from_page(topic: str, page: int, settings) -> dict:
+def get_repos_from_page(topic: str, page: int, settings, client: GitHubClient) -> dict:
     """Builds an API url and makes a request. Returns the data from the API as a dict."""
     params = f"repositories?q=topic:{topic}&page={page}&sort=stars&per_page={settings.results_per_page}"
     url = parse.urljoin(base="https://api.github.com/search/", url=params)
     logging.debug(f"Getting data from '{url}'.")
     
-    response = make_get_request(url=url, headers=get_headers(settings.github_api_token))
+    response = client.get(url, resource="search")
         
     return response.json()
 
 
-def get_languages(languages_url: str, settings) -> dict[str, int]:
-    """Fetches languages data from the repo languages API and returns the result as a dict."""
+def get_languages(languages_url: str, settings, client: GitHubClient, etag_cache: ETagCache | None = None) -> dict[str, int]:
+    """
+    Fetches languages data from the repo languages API and returns the result as a dict.
+    With an ETag cache the request is conditional and unchanged (304) responses reuse the cached languages.
+    """
     logging.debug(f"Fetching languages from '{languages_url}'.")
-    response = make_get_request(url=languages_url, headers=get_headers(settings.github_api_token))
+    if etag_cache is None:
+        return client.get(languages_url).json()
+
+    response = client.get(languages_url, headers=etag_cache.get_conditional_headers(languages_url))
+    return etag_cache.resolve(languages_url, response)
 
-    return response.json()
 
+def is_last_page(page_items: int, fetched_items: int, total_count: int, results_per_page: int) -> bool:
+    """Checks whether there are no more search results after the current page."""
+    return page_items < results_per_page or fetched_items >= min(total_count, MAX_SEARCH_RESULTS)
 
-def fetch_repos_per_topic(topic: str, settings) -> tuple[list[dict], int]:
-    """Fetches total repo counts and repo data for all pages for a topic"""
+
+def fetch_repos_per_topic(topic: str, settings, client: GitHubClient) -> tuple[list[dict], int]:
+    """Fetches total repo counts and repo data for up to {pages_per_topic} pages for a topic. Stops after the last result."""
+    start = time.perf_counter()
     topic_repo_data = []
     for page in range(1, settings.pages_per_topic+1):
-        repos_page_data = get_repos_from_page(topic, page, settings)
+        repos_page_data = get_repos_from_page(topic, page, settings, client)
 
         parsed_page_data = parse_repo_data(repos_page_data["items"], topic)
         topic_repo_data.extend(parsed_page_data)
@@ -67,40 +78,68 @@ def fetch_repos_per_topic(topic: str, settings) -> tuple[list[dict], int]:
         if page == 1:
             repo_counts = repos_page_data["total_count"]
 
-        if page != settings.pages_per_topic: # Don't sleep after last page
-            time.sleep(get_scaled_delay(settings.results_per_page))
-        
-    logging.info(f"Scraped repo data from {settings.pages_per_topic} pages for topic '{topic}'.")
+        if is_last_page(len(parsed_page_data), len(topic_repo_data), repo_counts, settings.results_per_page):
+            break
+
+    duration = time.perf_counter() - start
+    logging.info(
+        f"Scraped repo data from {page} pages for topic '{topic}' in {duration:.2f}s. "
+        f"Skipped {settings.pages_per_topic - page} pages."
+    )
     return topic_repo_data, repo_counts
 
 
-def fetch_language_data(repo_data: list[dict], settings) -> list[dict]:
-    """Fetches language data for each repo on the first page of repos for each topic"""
+def fetch_language_data(repo_data: list[dict], settings, client: GitHubClient, etag_cache: ETagCache | None = None, checkpoints: CheckpointStore | None = None) -> list[dict]:
+    """
+    Fetches language data for each repo on the first page of repos for each topic.
+    Requests run concurrently on up to {language_fetch_workers} threads, results keep the order of repo_data.
+    Every {language_batch_size} repos are checkpointed, batches found in the checkpoints aren't fetched again.
+    """
     total = len(repo_data)
     processed = 0
-    log_every = total // 10
+    log_every = max(1, total // 10)
 
     language_data = []
-    for repo in repo_data:
-        repo_languages = get_languages(repo["languages_url"], settings)
-        language_data.append({
-            "repo_id": repo["id"], 
-            "repo_name": repo["name"], 
-            "languages": repo_languages
-        })
-        processed += 1
-        if processed % log_every == 0 or processed == total:
-            logging.info(f"Successfully fetched language data for {processed}/{total} repos.")
+    with ThreadPoolExecutor(max_workers=settings.language_fetch_workers) as executor:
+        for batch_index, batch_start in enumerate(range(0, total, settings.language_batch_size)):
+            batch = repo_data[batch_start:batch_start + settings.language_batch_size]
+
+            batch_language_data = checkpoints.load_language_batch(batch_index) if checkpoints else None
+            if batch_language_data is not None and [row["repo_id"] for row in batch_language_data] == [repo["id"] for repo in batch]:
+                processed += len(batch)
+                logging.info(f"Resumed language data for {processed}/{total} repos from checkpoint.")
+                if etag_cache is not None:
+                    etag_cache.mark_used([repo["languages_url"] for repo in batch])
+                language_data.extend(batch_language_data)
+                continue
+
+            batch_language_data = []
+            languages_urls = [repo["languages_url"] for repo in batch]
+            results = executor.map(lambda url: get_languages(url, settings, client, etag_cache), languages_urls)
+
+            for repo, repo_languages in zip(batch, results):
+                batch_language_data.append({
+                    "repo_id": repo["id"], 
+                    "repo_name": repo["name"], 
+                    "languages": repo_languages
+                })
+                processed += 1
+                if processed % log_every == 0 or processed == total:
+                    logging.info(f"Successfully fetched language data for {processed}/{total} repos.")
+
+            if checkpoints:
+                checkpoints.save_language_batch(batch_index, batch_language_data)
+            language_data.extend(batch_language_data)
     return language_data
 
 
-def deduplicate_repo_data(repo_data: list[dict]) -> list[dict]:
+def deduplicate_repo_data(repo_data: list[dict], key: str = "id") -> list[dict]:
     """Deduplicates repo data by keeping the first occurance of a repo"""
     seen_ids = set()
     deduplicated = []
     for repo in repo_data:
-        if repo["id"] not in seen_ids:
-            seen_ids.add(repo["id"])
+        if repo[key] not in seen_ids:
+            seen_ids.add(repo[key])
             deduplicated.append(repo)
     return deduplicated
 
@@ -117,23 +156,41 @@ def keep_n_repos_per_topic(repo_data: list[dict], n: int = 50) -> list[dict]:
     return n_repos
 
 
-def get_languages_data(repo_data: list[dict], settings) -> list[dict]:
+def get_languages_data(repo_data: list[dict], settings, client: GitHubClient, etag_cache: ETagCache | None = None, checkpoints: CheckpointStore | None = None) -> list[dict]:
     """Gets deduplicated languages data for the first {languages_per_topic} repos for each topic."""
     language_repos = keep_n_repos_per_topic(repo_data, settings.languages_per_topic)
     
     # Deduplicate languages after getting first N to avoid skewed data
     language_repos = deduplicate_repo_data(language_repos)
-    language_data = fetch_language_data(language_repos, settings)
+    language_data = fetch_language_data(language_repos, settings, client, etag_cache, checkpoints)
     return language_data
 
 
-def get_all_repos_data(topics: list[str], settings) -> tuple[list[dict], dict, list[dict]]:
-    """Gets total repo counts and repo data per topic from all pages."""
+def fetch_repos_per_topic_checkpointed(topic: str, settings, client: GitHubClient, checkpoints: CheckpointStore | None = None) -> tuple[list[dict], int]:
+    """Loads the topic from the checkpoints if it was already fetched in this run, otherwise fetches and checkpoints it."""
+    checkpoint = checkpoints.load_topic(topic) if checkpoints else None
+    if checkpoint is not None:
+        logging.info(f"Resumed repo data for topic '{topic}' from checkpoint.")
+        return checkpoint["repos"], checkpoint["repo_count"]
+
+    topic_repo_data, topic_repo_counts = fetch_repos_per_topic(topic, settings, client)
+    if checkpoints:
+        checkpoints.save_topic(topic, {"repos": topic_repo_data, "repo_count": topic_repo_counts})
+    return topic_repo_data, topic_repo_counts
+
+
+def get_all_repos_data(topics: list[str], settings, client: GitHubClient, checkpoints: CheckpointStore | None = None) -> tuple[list[dict], dict, list[dict]]:
+    """
+    Gets total repo counts and repo data per topic from all pages.
+    Topics are fetched concurrently on up to {topic_fetch_workers} threads, the search quota is paced by the client.
+    """
     repo_counts = {}
     repos_data = []
-    for topic in topics:
-        topic_repo_data, topic_repo_counts = fetch_repos_per_topic(topic, settings)
-        repos_data.extend(topic_repo_data)
-        repo_counts[topic] = topic_repo_counts
+    with ThreadPoolExecutor(max_workers=settings.topic_fetch_workers) as executor:
+        results = executor.map(lambda topic: fetch_repos_per_topic_checkpointed(topic, settings, client, checkpoints), topics)
+
+        for topic, (topic_repo_data, topic_repo_counts) in zip(topics, results):
+            repos_data.extend(topic_repo_data)
+            repo_counts[topic] = topic_repo_counts
         
-    return repos_data, repo_counts
\ No newline at end of file
+    return repos_data, repo_counts
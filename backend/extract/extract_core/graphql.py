@@ -0,0 +1,157 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from extract_core.client import GitHubClient
+from extract_core.checkpoint import CheckpointStore
+from extract_core.extract import parse_repo_data, keep_n_repos_per_topic, deduplicate_repo_data, get_languages
+
+
+MAX_NODES_PER_QUERY = 100
+
+SEARCH_REPOS_QUERY = """
+query($query: String!, $first: Int!, $after: String, $withLanguages: Boolean!) {
+  search(query: $query, type: REPOSITORY, first: $first, after: $after) {
+    repositoryCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on Repository {
+        databaseId
+        name
+        nameWithOwner
+        diskUsage
+        stargazerCount
+        forkCount
+        primaryLanguage { name }
+        licenseInfo { spdxId }
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        repositoryTopics(first: 100) { nodes { topic { name } } }
+        languages(first: 100, orderBy: {field: SIZE, direction: DESC}) @include(if: $withLanguages) {
+          pageInfo { hasNextPage }
+          edges {
+            size
+            node { name }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def to_rest_repo_item(node: dict) -> dict:
+    """Maps a GraphQL repository node to the shape of a REST search item so parse_repo_data can parse it."""
+    license_info = node["licenseInfo"]
+    return {
+        "id": node["databaseId"],
+        "name": node["name"],
+        "languages_url": f"https://api.github.com/repos/{node['nameWithOwner']}/languages",
+        "size": node["diskUsage"],
+        "stargazers_count": node["stargazerCount"],
+        "language": node["primaryLanguage"]["name"] if node["primaryLanguage"] else None,
+        "forks_count": node["forkCount"],
+        "license": {"spdx_id": license_info["spdxId"]} if license_info else None,
+        # REST open_issues_count includes open pull requests
+        "open_issues_count": node["issues"]["totalCount"] + node["pullRequests"]["totalCount"],
+        "topics": [topic_node["topic"]["name"] for topic_node in node["repositoryTopics"]["nodes"]]
+    }
+
+
+def get_language_dict(node: dict) -> dict[str, int]:
+    """Returns the languages of a GraphQL repository node in the format of the REST languages API."""
+    return {edge["node"]["name"]: edge["size"] for edge in node["languages"]["edges"]}
+
+
+def get_node_languages(node: dict, settings, client: GitHubClient) -> dict[str, int]:
+    """
+    Returns the languages of a GraphQL repository node. The query returns the first 100 languages,
+    repos with more are fetched from the REST languages API, which returns all of them.
+    """
+    if node["languages"]["pageInfo"]["hasNextPage"]:
+        logging.info(f"Repo '{node['nameWithOwner']}' has more than 100 languages, fetching them from the REST API.")
+        return get_languages(to_rest_repo_item(node)["languages_url"], settings, client)
+    return get_language_dict(node)
+
+
+def fetch_repos_per_topic_graphql(topic: str, settings, client: GitHubClient) -> tuple[list[dict], int, dict[int, dict[str, int]]]:
+    """
+    Fetches the same repos as fetch_repos_per_topic in batches of up to 100 nodes per query.
+    Languages are only requested for the first {languages_per_topic} repos.
+    """
+    start = time.perf_counter()
+    max_results = settings.pages_per_topic * settings.results_per_page
+    topic_repo_data = []
+    topic_languages = {}
+    repo_counts = 0
+    cursor = None
+    queries = 0
+
+    while len(topic_repo_data) < max_results:
+        variables = {
+            "query": f"topic:{topic} sort:stars",
+            "first": min(MAX_NODES_PER_QUERY, max_results - len(topic_repo_data)),
+            "after": cursor,
+            "withLanguages": len(topic_repo_data) < settings.languages_per_topic
+        }
+        search = client.post_graphql(SEARCH_REPOS_QUERY, variables)["search"]
+        queries += 1
+
+        nodes = [node for node in search["nodes"] if node]
+        topic_repo_data.extend(parse_repo_data([to_rest_repo_item(node) for node in nodes], topic))
+        for node in nodes:
+            if "languages" in node:
+                topic_languages[node["databaseId"]] = get_node_languages(node, settings, client)
+        repo_counts = search["repositoryCount"]
+
+        if not search["pageInfo"]["hasNextPage"]:
+            break
+        cursor = search["pageInfo"]["endCursor"]
+
+    duration = time.perf_counter() - start
+    logging.info(f"Scraped repo data with {queries} GraphQL queries for topic '{topic}' in {duration:.2f}s.")
+    return topic_repo_data, repo_counts, topic_languages
+
+
+def fetch_repos_per_topic_graphql_checkpointed(topic: str, settings, client: GitHubClient, checkpoints: CheckpointStore | None = None) -> tuple[list[dict], int, dict[int, dict[str, int]]]:
+    """Loads the topic from the checkpoints if it was already fetched in this run, otherwise fetches and checkpoints it."""
+    checkpoint = checkpoints.load_topic(topic) if checkpoints else None
+    if checkpoint is not None:
+        logging.info(f"Resumed repo data for topic '{topic}' from checkpoint.")
+        # JSON object keys are strings
+        topic_languages = {int(repo_id): languages for repo_id, languages in checkpoint["languages"].items()}
+        return checkpoint["repos"], checkpoint["repo_count"], topic_languages
+
+    topic_repo_data, topic_repo_counts, topic_languages = fetch_repos_per_topic_graphql(topic, settings, client)
+    if checkpoints:
+        checkpoints.save_topic(topic, {"repos": topic_repo_data, "repo_count": topic_repo_counts, "languages": topic_languages})
+    return topic_repo_data, topic_repo_counts, topic_languages
+
+
+def get_all_repos_data_graphql(topics: list[str], settings, client: GitHubClient, checkpoints: CheckpointStore | None = None) -> tuple[list[dict], dict, list[dict]]:
+    """
+    Gets repo data, total repo counts and language data for all topics from the GraphQL API.
+    The output matches get_all_repos_data followed by get_languages_data.
+    """
+    repo_counts = {}
+    repos_data = []
+    languages = {}
+    with ThreadPoolExecutor(max_workers=settings.topic_fetch_workers) as executor:
+        results = executor.map(lambda topic: fetch_repos_per_topic_graphql_checkpointed(topic, settings, client, checkpoints), topics)
+
+        for topic, (topic_repo_data, topic_repo_counts, topic_languages) in zip(topics, results):
+            repos_data.extend(topic_repo_data)
+            repo_counts[topic] = topic_repo_counts
+            languages.update(topic_languages)
+
+    language_repos = keep_n_repos_per_topic(repos_data, settings.languages_per_topic)
+    language_repos = deduplicate_repo_data(language_repos)
+    language_data = [
+        {"repo_id": repo["id"], "repo_name": repo["name"], "languages": languages[repo["id"]]}
+        for repo in language_repos
+    ]
+    return repos_data, repo_counts, language_data
@@ -0,0 +1,224 @@
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+
+
+RATE_LIMIT_STATUS_CODES = {403, 429}
+
+
+def get_retry_after(response: requests.Response) -> float | None:
+    """Returns the Retry-After header value in seconds or None if it is missing."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        return None
+
+
+def is_secondary_rate_limited(response: requests.Response) -> bool:
+    """Checks whether the response was rejected by GitHub's secondary rate limit."""
+    if response.status_code not in RATE_LIMIT_STATUS_CODES:
+        return False
+    if get_retry_after(response) is not None:
+        return True
+    return "secondary rate limit" in response.text.lower()
+
+
+def is_primary_rate_limited(response: requests.Response) -> bool:
+    """Checks whether the response was rejected because the quota of the resource is used up."""
+    return (
+        response.status_code in RATE_LIMIT_STATUS_CODES
+        and response.headers.get("X-RateLimit-Remaining") == "0"
+    )
+
+
+def is_graphql_rate_limited(payload: dict) -> bool:
+    """GraphQL reports rate limiting as a 200 response with RATE_LIMITED errors."""
+    return any(error.get("type") == "RATE_LIMITED" for error in payload.get("errors") or [])
+
+
+def is_retryable(response: requests.Response) -> bool:
+    """
+    Too many requests (429), server error (5xx) and rate limited 403 responses are retryable, other errors are not.
+    A 403 is only rate limited with a Retry-After header, the secondary rate limit message or an exhausted quota.
+    """
+    if response.status_code == 429 or response.status_code >= 500:
+        return True
+    return is_secondary_rate_limited(response) or is_primary_rate_limited(response)
+
+
+def get_backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
+    """Returns an exponential backoff delay with full jitter for the attempt (starting at 0)."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class TokenBucket:
+    """Thread safe token bucket which refills {rate} tokens per second up to {capacity} tokens."""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+@dataclass
+class RateLimitQuota:
+    """Primary rate limit state of one GitHub API resource as reported by the response headers."""
+    limit: int | None = None
+    remaining: int | None = None
+    reset: float = 0.0
+
+    def update(self, headers) -> None:
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0))
+        self.remaining = int(headers["X-RateLimit-Remaining"])
+        self.reset = float(headers.get("X-RateLimit-Reset", self.reset))
+
+    def expire(self, now: float) -> None:
+        """Forgets the remaining count once the reset time has passed, the next response reports the new quota."""
+        if self.remaining is not None and now >= self.reset:
+            self.remaining = None
+
+    def seconds_until_available(self, now: float) -> float:
+        """Returns 0 while the quota has requests left, otherwise the seconds until it resets."""
+        self.expire(now)
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+        return max(0.0, self.reset - now)
+
+
+class TokenPool:
+    """
+    GitHub API tokens with a quota per resource read from the response headers.
+    Requests go to the token with the most remaining quota, exhausted or paused tokens are skipped until they reset.
+    """
+    def __init__(self, tokens: list[str], resources: list[str]):
+        if not tokens:
+            raise ValueError("At least one GitHub API token is required!")
+        self.tokens = tokens
+        self.quotas = {token: {resource: RateLimitQuota() for resource in resources} for token in tokens}
+        self.paused_until = {token: 0.0 for token in tokens}
+
+    def select(self, resource: str, now: float, monotonic_now: float) -> tuple[str | None, float]:
+        """
+        Returns the available token with the most headroom for the resource and 0.
+        If no token is available, returns None and the seconds until the first one is.
+        """
+        best_token = None
+        best_remaining = -1
+        wait = math.inf
+        for token in self.tokens:
+            quota = self.quotas[token][resource]
+            token_wait = max(quota.seconds_until_available(now), self.paused_until[token] - monotonic_now)
+            if token_wait > 0:
+                wait = min(wait, token_wait)
+                continue
+            # Tokens without a response yet have an unknown quota, try them first to learn it
+            remaining = math.inf if quota.remaining is None else quota.remaining
+            if remaining > best_remaining:
+                best_token, best_remaining = token, remaining
+        if best_token is not None:
+            return best_token, 0.0
+        if not math.isfinite(wait):
+            raise Exception(f"No GitHub API token can become available for the '{resource}' resource!")
+        return None, wait
+
+
+class RequestScheduler:
+    """
+    Central pacing for GitHub API requests shared by all threads of an extraction run.
+    Each resource (search / core / graphql) has its own token bucket, scaled by the number of tokens.
+    Each token has its own quota per resource read from the response headers and is paused
+    on its own when it hits the secondary rate limit.
+    The rates are split evenly between {concurrent_runs} runs using the same tokens at the same time (e.g. shards).
+    """
+    def __init__(self, settings, concurrent_runs: int = 1):
+        tokens = settings.get_github_api_tokens()
+        share = len(tokens) / concurrent_runs
+        search_rate = settings.search_requests_per_minute / 60 * share
+        core_rate = settings.core_requests_per_second * share
+        graphql_rate = settings.graphql_requests_per_second * share
+        self.buckets = {
+            "search": TokenBucket(search_rate, max(1.0, settings.search_requests_per_minute * share)),
+            "core": TokenBucket(core_rate, max(1.0, core_rate)),
+            "graphql": TokenBucket(graphql_rate, max(1.0, graphql_rate)),
+        }
+        self.token_pool = TokenPool(tokens, list(self.buckets))
+        self.default_cooldown = settings.secondary_rate_limit_cooldown
+        self._lock = threading.Lock()
+
+    def acquire(self, resource: str) -> str:
+        """Blocks until a request to {resource} can be made without getting throttled. Returns the token to use."""
+        while True:
+            with self._lock:
+                token, delay = self.token_pool.select(resource, time.time(), time.monotonic())
+                if token is not None:
+                    # Count the request against the quota so concurrent threads don't overshoot it
+                    quota = self.token_pool.quotas[token][resource]
+                    if quota.remaining is not None:
+                        quota.remaining -= 1
+                    break
+            logging.info(f"Waiting {delay:.1f}s for the '{resource}' rate limit to reset.")
+            time.sleep(delay)
+        self.buckets[resource].acquire()
+        return token
+
+    def update(self, resource: str, response: requests.Response, token: str) -> None:
+        """Updates the tracked quota of the token from the response headers."""
+        resource = response.headers.get("X-RateLimit-Resource", resource)
+        if resource not in self.buckets:
+            return
+        with self._lock:
+            self.token_pool.quotas[token][resource].update(response.headers)
+
+    def pause(self, token: str, seconds: float) -> None:
+        """Pauses requests made with the token for {seconds}."""
+        logging.warning(f"Secondary rate limit hit. Pausing requests with token {self.token_pool.tokens.index(token)} for {seconds:.0f}s.")
+        with self._lock:
+            self.token_pool.paused_until[token] = max(self.token_pool.paused_until[token], time.monotonic() + seconds)
+
+    def handle_graphql_rate_limit(self, response: requests.Response, attempt: int) -> None:
+        """Waits before a GraphQL query rejected with RATE_LIMITED errors is retried."""
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            # Quota was updated from the headers, the next acquire waits for its reset
+            return
+        time.sleep(get_backoff_delay(attempt))
+
+    def handle_retry(self, response: requests.Response, attempt: int, token: str) -> None:
+        """Waits as long as the response asks for before the request is retried."""
+        if is_secondary_rate_limited(response):
+            retry_after = get_retry_after(response)
+            self.pause(token, self.default_cooldown if retry_after is None else retry_after)
+        elif is_primary_rate_limited(response):
+            # Quota was updated from the headers, the next acquire skips the token until its reset
+            return
+        else:
+            time.sleep(get_backoff_delay(attempt))
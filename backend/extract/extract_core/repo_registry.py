@@ -1,6 +1,21 @@
 import logging
+from io import BytesIO
 from datetime import datetime
 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from dts_utils.s3_utils import get_object, get_json_object, save_data_to_s3
+
+
+REGISTRY_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("name", pa.string()),
+    ("first_seen", pa.date32()),
+    ("last_seen", pa.date32()),
+])
+
 
 def upsert_repo_registry(run_date: datetime, repos, repo_registry_data: dict[str, dict[str, str]]) -> dict[str, dict[str, str]]:
     logging.info(f"Upserting repo registry with {len(repos)} repositories.")
@@ -10,11 +25,83 @@ def upsert_repo_registry(run_date: datetime, repos, repo_registry_data: dict[str
     for repo in repos:
         repo_id = str(repo["id"])
         if repo_id in repo_registry_data:
-            repo_registry_data[repo_id]["last_seen"] = run_date_str
+            # Replace the entry instead of mutating it, the copy above is shallow
+            repo_registry_data[repo_id] = {**repo_registry_data[repo_id], "last_seen": run_date_str}
         else:
             repo_registry_data[repo_id] = {
                 "name": repo["name"],
                 "first_seen": run_date_str,
                 "last_seen": run_date_str
             }
-    return repo_registry_data
\ No newline at end of file
+    return repo_registry_data
+
+
+def upsert_repo_registry_table(run_date: datetime, repos: list[dict], registry: pa.Table) -> pa.Table:
+    """
+    Vectorized upsert of the registry table keyed by repo id.
+    Sets last_seen of known repos to the run date and appends unknown repos with first_seen = last_seen = run date.
+    """
+    logging.info(f"Upserting repo registry table ({registry.num_rows} rows) with {len(repos)} repositories.")
+    run_date_scalar = pa.scalar(run_date.date(), type=pa.date32())
+    seen_ids = pa.array([repo["id"] for repo in repos], type=pa.int64())
+    seen_names = pa.array([repo["name"] for repo in repos], type=pa.string())
+
+    is_seen = pc.fill_null(pc.is_in(registry["id"], value_set=seen_ids), False)
+    last_seen = pc.if_else(is_seen, run_date_scalar, registry["last_seen"])
+    registry = registry.set_column(REGISTRY_SCHEMA.get_field_index("last_seen"), "last_seen", last_seen)
+
+    is_new = pc.invert(pc.is_in(seen_ids, value_set=registry["id"].combine_chunks()))
+    new_ids = seen_ids.filter(is_new)
+    new_rows = pa.table({
+        "id": new_ids,
+        "name": seen_names.filter(is_new),
+        "first_seen": pa.repeat(run_date_scalar, len(new_ids)),
+        "last_seen": pa.repeat(run_date_scalar, len(new_ids)),
+    }, schema=REGISTRY_SCHEMA)
+    return pa.concat_tables([registry, new_rows]).combine_chunks()
+
+
+def registry_dict_to_table(repo_registry_data: dict[str, dict[str, str]]) -> pa.Table:
+    """Converts the JSON registry format ({id: {name, first_seen, last_seen}}) to a registry table."""
+    table = pa.table({
+        "id": pa.array([int(repo_id) for repo_id in repo_registry_data], type=pa.int64()),
+        "name": [entry["name"] for entry in repo_registry_data.values()],
+        "first_seen": [entry["first_seen"] for entry in repo_registry_data.values()],
+        "last_seen": [entry["last_seen"] for entry in repo_registry_data.values()],
+    })
+    return table.cast(REGISTRY_SCHEMA)
+
+
+def registry_table_to_dict(registry: pa.Table) -> dict[str, dict[str, str]]:
+    """Converts a registry table to the compact JSON registry format."""
+    ids = registry["id"].to_pylist()
+    names = registry["name"].to_pylist()
+    first_seen = pc.strftime(registry["first_seen"], format="%Y-%m-%d").to_pylist()
+    last_seen = pc.strftime(registry["last_seen"], format="%Y-%m-%d").to_pylist()
+    return {
+        str(repo_id): {"name": name, "first_seen": first, "last_seen": last}
+        for repo_id, name, first, last in zip(ids, names, first_seen, last_seen)
+    }
+
+
+def load_repo_registry(s3_client, bucket: str, parquet_path: str, json_path: str) -> pa.Table:
+    """Loads the parquet registry. Falls back to converting the JSON registry if the parquet one doesn't exist yet."""
+    try:
+        obj = get_object(s3_client, bucket, parquet_path)
+        return pq.read_table(BytesIO(obj["Body"].read())).cast(REGISTRY_SCHEMA)
+    except s3_client.exceptions.NoSuchKey:
+        logging.info(f"No parquet registry found at '{parquet_path}'. Converting JSON registry from '{json_path}'.")
+        return registry_dict_to_table(get_json_object(s3_client, bucket, json_path))
+
+
+def save_repo_registry(s3_client, bucket: str, parquet_path: str, registry: pa.Table, json_path: str | None = None) -> None:
+    """Saves the registry as parquet and optionally exports it to the JSON registry format."""
+    buffer = BytesIO()
+    pq.write_table(registry, buffer, compression="snappy")
+    buffer.seek(0)
+
+    logging.info(f"Uploading repo registry ({registry.num_rows} rows) to {parquet_path}.")
+    s3_client.upload_fileobj(Bucket=bucket, Key=parquet_path, Fileobj=buffer)
+
+    if json_path is not None:
+        save_data_to_s3(s3_client, bucket, json_path, registry_table_to_dict(registry))
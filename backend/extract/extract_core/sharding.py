@@ -0,0 +1,55 @@
+import logging
+
+from dts_utils.s3_utils import get_json_object, save_data_to_s3
+from extract_core.extract import deduplicate_repo_data
+
+
+def split_into_shards(search_queries: list[str], shard_count: int) -> list[list[str]]:
+    """
+    Splits the search queries into {shard_count} contiguous shards of nearly equal size.
+    Contiguous shards keep the query order when the shard results are concatenated.
+    """
+    shard_size, remainder = divmod(len(search_queries), shard_count)
+    shards = []
+    start = 0
+    for shard_index in range(shard_count):
+        end = start + shard_size + (1 if shard_index < remainder else 0)
+        shards.append(search_queries[start:end])
+        start = end
+    return shards
+
+
+def get_shard_name(shard_index: int, shard_count: int) -> str:
+    return f"shard_{shard_index:03}_of_{shard_count:03}"
+
+
+def merge_shard_results(shard_results: list[dict]) -> tuple[list[dict], dict, list[dict]]:
+    """
+    Concatenates shard results in shard order.
+    Language data is deduplicated across shards, repo data is deduplicated when the snapshot is saved.
+    """
+    data = []
+    repo_counts = {}
+    language_data = []
+    for shard_result in shard_results:
+        data.extend(shard_result["repos"])
+        repo_counts.update(shard_result["repo_counts"])
+        language_data.extend(shard_result["languages"])
+
+    return data, repo_counts, deduplicate_repo_data(language_data, key="repo_id")
+
+
+def save_shard_result(s3_client, bucket: str, path: str, data: list[dict], repo_counts: dict, language_data: list[dict]) -> None:
+    save_data_to_s3(s3_client, bucket, path, {"repos": data, "repo_counts": repo_counts, "languages": language_data})
+
+
+def load_shard_results(s3_client, bucket: str, paths: list[str]) -> list[dict]:
+    """Loads the results of all shards. Fails if a shard hasn't finished yet."""
+    shard_results = []
+    for path in paths:
+        try:
+            shard_results.append(get_json_object(s3_client, bucket, path))
+        except s3_client.exceptions.NoSuchKey:
+            raise Exception(f"Shard result '{path}' is missing! All shards must finish before the merge.")
+    logging.info(f"Loaded {len(shard_results)} shard results.")
+    return shard_results
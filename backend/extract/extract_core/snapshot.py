@@ -0,0 +1,68 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+REPOS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("name", pa.string()),
+    ("languages_url", pa.string()),
+    ("size", pa.int64()),
+    ("stars", pa.int64()),
+    ("main_language", pa.string()),
+    ("forks", pa.int64()),
+    ("license", pa.string()),
+    ("open_issues", pa.int64()),
+    ("topics", pa.list_(pa.string())),
+    ("topic_queried", pa.string()),
+])
+REPOS_DICTIONARY_COLUMNS = ["main_language", "license", "topic_queried"]
+
+LANGUAGES_SCHEMA = pa.schema([
+    ("repo_id", pa.int64()),
+    ("repo_name", pa.string()),
+    ("language", pa.string()),
+    ("bytes", pa.int64()),
+])
+LANGUAGES_DICTIONARY_COLUMNS = ["language"]
+
+
+class ParquetSnapshotWriter:
+    """
+    Streams rows into a parquet file with a fixed schema.
+    Rows are buffered per column and written as a row group every {row_group_size} rows,
+    so only one row group is held as Python objects at a time.
+    """
+    def __init__(self, sink, schema: pa.Schema, dictionary_columns: list[str], row_group_size: int):
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._columns = {name: [] for name in schema.names}
+        self._buffered = 0
+        self._writer = pq.ParquetWriter(sink, schema, compression="snappy", use_dictionary=dictionary_columns)
+
+    def extend(self, rows: list[dict]) -> None:
+        for row in rows:
+            for name, values in self._columns.items():
+                values.append(row[name])
+            self._buffered += 1
+            if self._buffered == self.row_group_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if self._buffered == 0:
+            return
+        batch = pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        self.rows_written += self._buffered
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
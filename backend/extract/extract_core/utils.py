@@ -4,10 +4,13 @@ import logging
 import requests
 import time
 
+from typing import Iterable, Iterator
+
 import pyarrow as pa
-import pyarrow.parquet as pq
 
 from dts_utils.s3_utils import get_json_object
+from extract_core.rate_limit import RequestScheduler, is_retryable, get_backoff_delay
+from extract_core.snapshot import ParquetSnapshotWriter
 
 
 def get_search_queries(s3_client, bucket: str, path: str) -> list[str]:
@@ -20,14 +23,23 @@ def get_date_str(date_time: datetime) -> str:
     return date_time.strftime("%Y/%m/%d")
 
 
-def save_parquet_to_s3(s3_client, data: list[dict], bucket: str, path: str):
-    """Converts a list of dicts to a pyarrow table and saves it as a parquet file to S3."""
-    logging.debug(f"Converting data to pyarrow table. Rows: {len(data)}.")
-    table = pa.Table.from_pylist(data)
+def get_run_datetime(event: dict | None) -> datetime:
+    """
+    Returns the run date passed in the event as {"run_date": "YYYY-MM-DD"} or the current datetime.
+    Passing the run date lets a re-invocation resume the checkpoints of an earlier run.
+    """
+    if event and event.get("run_date"):
+        return datetime.strptime(event["run_date"], "%Y-%m-%d")
+    return datetime.now()
+
 
+def save_parquet_to_s3(s3_client, data: Iterable[dict], bucket: str, path: str, schema: pa.Schema, dictionary_columns: list[str], row_group_size: int):
+    """Streams rows into a parquet file with a fixed schema and saves it to S3."""
     buffer = BytesIO()
-    logging.debug("Writing pyarrow table to buffer.")
-    pq.write_table(table, buffer, compression="snappy")
+    logging.debug("Writing rows to parquet buffer.")
+    with ParquetSnapshotWriter(buffer, schema, dictionary_columns, row_group_size) as writer:
+        writer.extend(data)
+    logging.debug(f"Wrote {writer.rows_written} rows to parquet buffer.")
     buffer.seek(0)
 
     logging.info(f"Uploading parquet data to {path}.")
@@ -35,19 +47,41 @@ def save_parquet_to_s3(s3_client, data: list[dict], bucket: str, path: str):
     logging.debug(f"Successfully uploaded parquet data to {path}.")
 
 
-def make_get_request(url: str, headers: dict, retries: int = 0, max_retries: int = 5) -> requests.Response:
-    """Makes a get request. Sleeps and retries if status code is not 200. Fails if max_retries = retries."""
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        if retries < max_retries:
+def make_request(method: str, url: str, session: requests.Session, scheduler: RequestScheduler, resource: str = "core", headers: dict | None = None, json: dict | None = None, timeout: tuple[float, float] | None = None, max_retries: int = 5) -> requests.Response:
+    """
+    Makes a request on the session paced by the scheduler with the token it selects. 304 responses to conditional requests count as successful.
+    Rate limited (403/429), server error (5xx) and connection error responses are retried up to {max_retries} times,
+    other errors fail fast.
+    """
+    for attempt in range(max_retries + 1):
+        token = scheduler.acquire(resource)
+        request_headers = {"Authorization": f"Bearer {token}", **(headers or {})}
+        try:
+            response = session.request(method, url, headers=request_headers, json=json, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            logging.warning(f"Request to '{url}' failed: '{e}'. Retrying.")
+            time.sleep(get_backoff_delay(attempt))
+            continue
+        scheduler.update(resource, response, token)
+
+        if response.status_code in (200, 304):
+            logging.debug(f"Successfully fetched data from '{url}'.")
+            return response
+
+        if not is_retryable(response):
+            raise Exception(f"Request to '{url}' failed with status code {response.status_code}! Error message: '{response.text}'.")
+
+        if attempt < max_retries:
             logging.warning(f"Response code for '{url}': {response.status_code}! Error message: '{response.text}'. Retrying.")
-            time.sleep(retries)
-            return make_get_request(url=url, headers=headers, retries=retries + 1)
-        else:
-            raise Exception(f"Max retries ({max_retries}) reached for '{url}'!")
-    
-    logging.debug(f"Successfully fetched data from '{url}'.")
-    return response
+            scheduler.handle_retry(response, attempt, token)
+
+    raise Exception(f"Max retries ({max_retries}) reached for '{url}'!")
+
+
+def make_get_request(url: str, session: requests.Session, scheduler: RequestScheduler, **kwargs) -> requests.Response:
+    return make_request("GET", url, session, scheduler, **kwargs)
 
 
 def transform_lang_list_long(language_data: dict) -> list[dict]:
@@ -66,22 +100,7 @@ def transform_lang_list_long(language_data: dict) -> list[dict]:
     return rows
 
 
-def transform_lang_data(language_data: dict) -> list[dict]:
-    """Transforms language data rows into long format."""
-    logging.debug("Transforming language data into long format.")
-    language_data_long = []
+def iter_lang_data_long(language_data: list[dict]) -> Iterator[dict]:
+    """Yields language data rows in long format one repo at a time."""
     for row in language_data:
-        language_data_long.extend(transform_lang_list_long(row))
-
-    logging.debug("Successfully transformed language data into long format.")
-    return language_data_long
-
-
-def get_scaled_delay(per_page, max_delay=3.0, min_delay=0.0, max_per_page=100):
-    """
-    Retuns a delay based on results per page. Higher results per page => lower delay.
-    """
-    per_page = max(1, min(per_page, max_per_page))
-    factor = 1 - (per_page / max_per_page)
-    delay = min_delay + factor * (max_delay - min_delay)
-    return delay
+        yield from transform_lang_list_long(row)
@@ -1,17 +1,30 @@
 import logging
 from datetime import datetime
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 from dts_utils.s3_utils import (
-    running_on_lambda, setup_logging, create_s3_client, get_json_object, save_data_to_s3
+    running_on_lambda, setup_logging, create_s3_client, save_data_to_s3
 )
 from extract_core.utils import (
-    get_search_queries, save_parquet_to_s3, transform_lang_data
+    get_search_queries, save_parquet_to_s3, iter_lang_data_long, get_run_datetime
 )
 from extract_core.extract import (
     get_all_repos_data, deduplicate_repo_data, get_languages_data
 )
+from extract_core.graphql import get_all_repos_data_graphql
 from extract_core.config import Settings
-from extract_core.repo_registry import upsert_repo_registry
+from extract_core.repo_registry import upsert_repo_registry_table, load_repo_registry, save_repo_registry
+from extract_core.client import GitHubClient
+from extract_core.rate_limit import RequestScheduler
+from extract_core.etag_cache import load_etag_cache, save_etag_cache, merge_etag_caches
+from extract_core.checkpoint import CheckpointStore
+from extract_core.sharding import (
+    split_into_shards, get_shard_name, merge_shard_results, save_shard_result, load_shard_results
+)
+from extract_core.snapshot import (
+    REPOS_SCHEMA, REPOS_DICTIONARY_COLUMNS, LANGUAGES_SCHEMA, LANGUAGES_DICTIONARY_COLUMNS
+)
 
 
 if not running_on_lambda():
@@ -23,9 +36,115 @@ settings = Settings()
 setup_logging(settings.logging_level)
 
 
+def extract_github_data(
+    s3_client, search_queries: list[str], checkpoints: CheckpointStore | None,
+    shard_count: int = 1, etag_cache_output_path: str | None = None
+) -> tuple[list[dict], dict, list[dict]]:
+    """
+    Fetches repo data, repo counts and language data for the search queries with the configured backend.
+    Shards run concurrently with the same tokens, each one gets 1/{shard_count} of the request rates.
+    The ETag cache is loaded from the shared cache and saved to {etag_cache_output_path} (by default the shared cache).
+    """
+    client = GitHubClient(settings, RequestScheduler(settings, concurrent_runs=shard_count))
+    if settings.extraction_backend == "graphql":
+        data, repo_counts, language_data = get_all_repos_data_graphql(
+            topics=search_queries, settings=settings, client=client, checkpoints=checkpoints
+        )
+    else:
+        data, repo_counts = get_all_repos_data(topics=search_queries, settings=settings, client=client, checkpoints=checkpoints)
+
+        etag_cache = None
+        if settings.use_etag_cache:
+            etag_cache = load_etag_cache(s3_client, settings.bucket, settings.get_etag_cache_path())
+        language_data = get_languages_data(
+            data, settings=settings, client=client, etag_cache=etag_cache, checkpoints=checkpoints
+        )
+        if etag_cache is not None:
+            save_etag_cache(s3_client, settings.bucket, etag_cache_output_path or settings.get_etag_cache_path(), etag_cache)
+    client.close()
+    return data, repo_counts, language_data
+
+
+def save_snapshot(s3_client, run_datetime: datetime, data: list[dict], repo_counts: dict, language_data: list[dict]):
+    """Deduplicates repo data, upserts the repo registry and saves the daily snapshot files."""
+    data = deduplicate_repo_data(data)
+
+    repo_registry_path = settings.get_repo_registry_parquet_path()
+    repo_registry_json_path = settings.get_repo_registry_path()
+    repo_registry = load_repo_registry(s3_client, settings.bucket, repo_registry_path, repo_registry_json_path)
+    repo_registry = upsert_repo_registry_table(run_datetime, data, repo_registry)
+    save_repo_registry(
+        s3_client, settings.bucket, repo_registry_path, repo_registry,
+        json_path=repo_registry_json_path if settings.export_registry_json else None
+    )
+
+    repos_output_path = settings.get_repos_path(run_datetime)
+    save_parquet_to_s3(
+        s3_client=s3_client, data=data, bucket=settings.bucket, path=repos_output_path,
+        schema=REPOS_SCHEMA, dictionary_columns=REPOS_DICTIONARY_COLUMNS, row_group_size=settings.parquet_row_group_size
+    )
+
+    languages_output_path = settings.get_languages_path(run_datetime)
+    save_parquet_to_s3(
+        s3_client=s3_client, data=iter_lang_data_long(language_data), bucket=settings.bucket, path=languages_output_path,
+        schema=LANGUAGES_SCHEMA, dictionary_columns=LANGUAGES_DICTIONARY_COLUMNS, row_group_size=settings.parquet_row_group_size
+    )
+
+    counts_output_path = settings.get_repo_counts_path(run_datetime)
+    save_data_to_s3(s3_client=s3_client, body=repo_counts, bucket=settings.bucket, path=counts_output_path)
+
+
+def get_shard_checkpoints(s3_client, run_datetime: datetime, shard_name: str, keys: list[str] = ()) -> CheckpointStore:
+    """Checkpoint store of a shard, {keys} are checkpoints already known to exist (e.g. from a worker process)."""
+    checkpoints = CheckpointStore(s3_client, settings.bucket, settings.get_checkpoints_prefix(run_datetime, shard_name))
+    checkpoints.keys.update(keys)
+    return checkpoints
+
+
+def extract_shard(search_queries: list[str], shard_index: int, shard_count: int, run_datetime: datetime) -> tuple[tuple[list[dict], dict, list[dict]], list[str]]:
+    """
+    Extracts one shard of the search queries with its own checkpoints.
+    Returns the shard result and the keys of its checkpoints. The checkpoints are kept,
+    the caller clears them once the shard result (or the merged snapshot) is saved.
+    """
+    shard_name = get_shard_name(shard_index, shard_count)
+    shard_queries = split_into_shards(search_queries, shard_count)[shard_index]
+    logging.info(f"Extracting {shard_name} with search queries: {shard_queries}.")
+
+    s3_client = create_s3_client(profile=settings.profile, region=settings.region)
+    checkpoints = get_shard_checkpoints(s3_client, run_datetime, shard_name) if settings.use_checkpoints else None
+
+    etag_cache_path = settings.get_shard_etag_cache_path(run_datetime, shard_name)
+    result = extract_github_data(s3_client, shard_queries, checkpoints, shard_count, etag_cache_path)
+    return result, sorted(checkpoints.keys) if checkpoints is not None else []
+
+
+def merge_shards(s3_client, run_datetime: datetime, shard_count: int, shard_results: list[dict]) -> None:
+    """Saves the snapshot of the merged shard results and folds the shard ETag caches into the shared cache."""
+    data, repo_counts, language_data = merge_shard_results(shard_results)
+    save_snapshot(s3_client, run_datetime, data, repo_counts, language_data)
+
+    if settings.use_etag_cache and settings.extraction_backend == "rest":
+        shard_etag_cache_paths = [
+            settings.get_shard_etag_cache_path(run_datetime, get_shard_name(shard_index, shard_count))
+            for shard_index in range(shard_count)
+        ]
+        merge_etag_caches(s3_client, settings.bucket, shard_etag_cache_paths, settings.get_etag_cache_path())
+
+
 def lambda_handler(event, context):
+    """
+    Modes selected by event["mode"]:
+    - "single" (default): extracts all search queries and saves the snapshot.
+    - "shard": extracts shard event["shard_index"] of event["shard_count"] and saves the shard result.
+    - "merge": merges the results of all event["shard_count"] shards and saves the snapshot.
+    - "local_sharded": runs {shard_count} shards in a local process pool, then merges them.
+    Sharded invocations of one run must pass the same event["run_date"].
+    """
     logging.info("Starting extraction lambda.")
-    run_datetime = datetime.now()
+    event = event or {}
+    mode = event.get("mode", "single")
+    run_datetime = get_run_datetime(event)
 
     s3_client = create_s3_client(profile=settings.profile, region=settings.region)
     search_queries_path = settings.get_search_queries_path()
@@ -33,25 +152,53 @@ def lambda_handler(event, context):
         s3_client=s3_client, bucket=settings.bucket, path=search_queries_path
     )
     logging.info(f"Search queries: {search_queries}.")
-    data, repo_counts = get_all_repos_data(topics=search_queries, settings=settings)
-    language_data = get_languages_data(data, settings=settings)
-    data = deduplicate_repo_data(data)
 
-    language_data_long = transform_lang_data(language_data)
+    if mode == "shard":
+        shard_index, shard_count = event["shard_index"], event["shard_count"]
+        shard_name = get_shard_name(shard_index, shard_count)
+        (data, repo_counts, language_data), checkpoint_keys = extract_shard(search_queries, shard_index, shard_count, run_datetime)
+        shard_result_path = settings.get_shard_result_path(run_datetime, shard_name)
+        save_shard_result(s3_client, settings.bucket, shard_result_path, data, repo_counts, language_data)
+        # Only after the save, a failed save is resumed from the checkpoints
+        if settings.use_checkpoints:
+            get_shard_checkpoints(s3_client, run_datetime, shard_name, checkpoint_keys).clear()
 
-    repo_registry_path = settings.get_repo_registry_path()
-    repo_registry_data = get_json_object(s3_client, settings.bucket, repo_registry_path)
-    repo_registry_data = upsert_repo_registry(run_datetime, data, repo_registry_data)
-    save_data_to_s3(s3_client, settings.bucket, repo_registry_path, repo_registry_data)
+    elif mode == "merge":
+        shard_count = event["shard_count"]
+        shard_result_paths = [
+            settings.get_shard_result_path(run_datetime, get_shard_name(shard_index, shard_count))
+            for shard_index in range(shard_count)
+        ]
+        shard_results = load_shard_results(s3_client, settings.bucket, shard_result_paths)
+        merge_shards(s3_client, run_datetime, shard_count, shard_results)
 
-    repos_output_path = settings.get_repos_path(run_datetime)
-    save_parquet_to_s3(s3_client=s3_client, data=data, bucket=settings.bucket, path=repos_output_path)
+    elif mode == "local_sharded":
+        shard_count = event.get("shard_count", settings.shard_count)
+        with ProcessPoolExecutor(max_workers=shard_count) as executor:
+            shard_outputs = list(executor.map(
+                extract_shard, repeat(search_queries), range(shard_count), repeat(shard_count), repeat(run_datetime)
+            ))
+        shard_results = [
+            {"repos": data, "repo_counts": repo_counts, "languages": language_data}
+            for (data, repo_counts, language_data), _ in shard_outputs
+        ]
+        merge_shards(s3_client, run_datetime, shard_count, shard_results)
 
-    languages_output_path = settings.get_languages_path(run_datetime)
-    save_parquet_to_s3(s3_client=s3_client, data=language_data_long, bucket=settings.bucket, path=languages_output_path)
+        # Only after the merged snapshot is saved, a failed save is resumed from the checkpoints
+        if settings.use_checkpoints:
+            for shard_index, (_, checkpoint_keys) in enumerate(shard_outputs):
+                get_shard_checkpoints(s3_client, run_datetime, get_shard_name(shard_index, shard_count), checkpoint_keys).clear()
 
-    counts_output_path = settings.get_repo_counts_path(run_datetime)
-    save_data_to_s3(s3_client=s3_client, body=repo_counts, bucket=settings.bucket, path=counts_output_path)
+    else:
+        checkpoints = None
+        if settings.use_checkpoints:
+            checkpoints = CheckpointStore(s3_client, settings.bucket, settings.get_checkpoints_prefix(run_datetime))
+
+        data, repo_counts, language_data = extract_github_data(s3_client, search_queries, checkpoints)
+        save_snapshot(s3_client, run_datetime, data, repo_counts, language_data)
+
+        if checkpoints is not None:
+            checkpoints.clear()
     logging.info("Extraction lambda finished.")
 
 
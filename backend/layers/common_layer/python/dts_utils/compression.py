@@ -0,0 +1,49 @@
+import functools
+import gzip
+import logging
+from collections.abc import Sequence
+
+try:
+    import brotli
+except ImportError:
+    # Optional, brotli variants are skipped (and stale ones deleted) without it
+    brotli = None
+
+
+# Content-Encoding of a pre-compressed variant and the suffix of its S3 key
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+GZIP_LEVEL = 9
+# Quality 11 is several times slower on multi-megabyte outputs for a few percent smaller files
+BROTLI_QUALITY = 9
+
+
+def get_encoded_path(path: str, encoding: str) -> str:
+    """Key of the {encoding} variant of the object at {path} (e.g. repo_counts/weekly.json.gz)."""
+    return f"{path}{ENCODING_SUFFIXES[encoding]}"
+
+
+@functools.cache
+def _warn_brotli_unavailable() -> None:
+    logging.warning("The brotli package isn't installed, skipping brotli variants.")
+
+
+def get_supported_encodings(encodings: Sequence[str]) -> list[str]:
+    """Drops the encodings that can't be produced here (brotli without the brotli package)."""
+    supported = []
+    for encoding in encodings:
+        if encoding not in ENCODING_SUFFIXES:
+            raise Exception(f"Unknown content encoding '{encoding}'!")
+        if encoding == "br" and brotli is None:
+            _warn_brotli_unavailable()
+            continue
+        supported.append(encoding)
+    return supported
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        # mtime=0 keeps the bytes (and the S3 ETag) identical for identical outputs
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise Exception(f"Unknown content encoding '{encoding}'!")
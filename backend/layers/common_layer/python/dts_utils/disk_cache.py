@@ -0,0 +1,92 @@
+import os
+import hashlib
+import logging
+import threading
+
+
+class DiskCache:
+    """
+    Size bounded LRU cache of S3 objects on local disk (/tmp on Lambda).
+    Entries are keyed by bucket, key and ETag, so a changed object is a different entry and stale entries age out.
+    Warm Lambda containers keep /tmp and module state, a module level cache lets them skip downloads of unchanged objects.
+    {variant} separates derived entries of the same object (e.g. a column projection of a parquet file).
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild the index from disk, a new cache object may find entries of an earlier one
+        self._sizes = {}
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+            else:
+                self._sizes[name] = os.path.getsize(path)
+
+    @staticmethod
+    def get_entry_name(bucket: str, key: str, etag: str, variant: str = "") -> str:
+        return hashlib.sha256("\n".join([bucket, key, etag, variant]).encode()).hexdigest()
+
+    def get_path(self, bucket: str, key: str, etag: str, variant: str = "") -> str | None:
+        """Returns the path of the cached entry (marking it as recently used) or None."""
+        name = self.get_entry_name(bucket, key, etag, variant)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._sizes:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # The modification time orders the entries for eviction
+            os.utime(path)
+        return path
+
+    def record_evicted_read(self) -> None:
+        """Counts a hit as a miss, its file was evicted by a concurrent put between get_path and opening it."""
+        with self._lock:
+            self.hits -= 1
+            self.misses += 1
+
+    def get(self, bucket: str, key: str, etag: str, variant: str = "") -> bytes | None:
+        path = self.get_path(bucket, key, etag, variant)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            self.record_evicted_read()
+            return None
+
+    def put(self, bucket: str, key: str, etag: str, body: bytes, variant: str = "") -> None:
+        if len(body) > self.max_bytes:
+            logging.debug(f"Not caching '{key}' ({len(body)} bytes), it is larger than the cache.")
+            return
+        name = self.get_entry_name(bucket, key, etag, variant)
+        path = os.path.join(self.directory, name)
+        # Written under a temporary name so concurrent readers never see a partial file
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(body)
+        with self._lock:
+            os.replace(temp_path, path)
+            self._sizes[name] = len(body)
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        entries = sorted(self._sizes, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+        for name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= self._sizes.pop(name)
+
+    def get_size(self) -> int:
+        return sum(self._sizes.values())
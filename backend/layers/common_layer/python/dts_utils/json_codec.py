@@ -0,0 +1,111 @@
+import json
+import math
+import os
+from datetime import date
+
+try:
+    import orjson
+except ImportError:
+    # Optional, the stdlib codec is used without it
+    orjson = None
+
+
+def _default(obj):
+    """Encodes the types the aggregation produces that JSON doesn't know (numpy / pandas scalars and arrays, dates)."""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Type '{type(obj).__name__}' is not JSON serializable")
+
+
+def _normalize(obj):
+    """
+    Converts what neither codec encodes as is: NaN and infinite floats become None (orjson writes null),
+    numpy keys and values become Python values. Only run when the first encoding attempt fails.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {_normalize(key): _normalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(value) for value in obj]
+    if hasattr(obj, "tolist"):
+        return _normalize(obj.tolist())
+    return obj
+
+
+class StdlibCodec:
+    """Compact UTF-8 JSON with the stdlib json module."""
+    name = "json"
+
+    def __init__(self):
+        # allow_nan=False raises instead of writing NaN (invalid JSON), the retry writes null like orjson
+        self._encoder = json.JSONEncoder(default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+    def dumps(self, obj) -> bytes:
+        try:
+            return self._encoder.encode(obj).encode()
+        except (TypeError, ValueError):
+            return self._encoder.encode(_normalize(obj)).encode()
+
+    def loads(self, data: bytes | str):
+        return json.loads(data)
+
+    def dump(self, obj, fileobj) -> None:
+        # iterencode would stream chunks, but it runs in pure Python and is ~3-4x slower than the C encoder
+        fileobj.write(self.dumps(obj))
+
+
+class OrjsonCodec:
+    """
+    Compact UTF-8 JSON with orjson, which serializes numpy arrays and scalars natively.
+    The output matches StdlibCodec except for the spelling of some floats (1e-7 vs 1e-07).
+    Both write NaN and infinity as null and int, float, bool and numpy keys as strings.
+    """
+    name = "orjson"
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_default, option=self.options)
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. for numpy keys
+            return orjson.dumps(_normalize(obj), default=_default, option=self.options)
+
+    def loads(self, data: bytes | str):
+        return orjson.loads(data)
+
+    def dump(self, obj, fileobj) -> None:
+        # Encodes straight to bytes, there is no intermediate str to copy
+        fileobj.write(self.dumps(obj))
+
+
+def get_codec(name: str | None = None):
+    """Returns the codec called {name} ("orjson" / "json"), by default orjson if it is installed."""
+    if name is None:
+        name = "orjson" if orjson is not None else "json"
+    if name == "json":
+        return StdlibCodec()
+    if name == "orjson":
+        if orjson is None:
+            raise Exception("The orjson package isn't installed!")
+        return OrjsonCodec()
+    raise Exception(f"Unknown JSON codec '{name}'!")
+
+
+# Shared by all S3 reads and writes, DTS_JSON_CODEC=json forces the stdlib codec
+codec = get_codec(os.environ.get("DTS_JSON_CODEC"))
+
+
+def dumps(obj) -> bytes:
+    return codec.dumps(obj)
+
+
+def loads(data: bytes | str):
+    return codec.loads(data)
+
+
+def dump(obj, fileobj) -> None:
+    """Encodes {obj} into a binary file object, e.g. the buffer of an S3 upload."""
+    codec.dump(obj, fileobj)
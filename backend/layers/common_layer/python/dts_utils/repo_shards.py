@@ -0,0 +1,10 @@
+import zlib
+
+
+def get_repo_shard(repo_id: int | str, shard_count: int) -> int:
+    """
+    Returns the shard of a repo in the sharded repo comparison outputs.
+    Shared by the aggregation (writer) and the API (reader), so it must stay stable. CRC32 of the decimal id
+    spreads repos evenly regardless of how GitHub assigns ids.
+    """
+    return zlib.crc32(str(int(repo_id)).encode()) % shard_count
@@ -1,7 +1,20 @@
+import io
 import os
 import logging
-import json
+import re
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import TypeVar
+
 import boto3
+from botocore.config import Config
+
+from dts_utils import json_codec
+from dts_utils.compression import ENCODING_SUFFIXES, compress_body, get_encoded_path, get_supported_encodings
+
+
+T = TypeVar("T")
 
 
 def running_on_lambda() -> bool:
@@ -14,9 +27,15 @@ def create_boto3_session(profile: str = "default", region: str = None):
     return boto3.Session(profile_name=profile, region_name=region)
 
 
-def create_s3_client(profile: str = "default", region: str = None):
+def create_s3_client(profile: str = "default", region: str = None, max_pool_connections: int | None = None):
+    """
+    Creates an S3 client. Boto3 clients are thread safe, so one client with a connection pool of
+    {max_pool_connections} (botocore default 10) can be shared by all threads fetching objects.
+    """
     session = create_boto3_session(profile=profile, region=region)
-    return session.client("s3")
+    if max_pool_connections is None:
+        return session.client("s3")
+    return session.client("s3", config=Config(max_pool_connections=max_pool_connections))
 
 
 def setup_logging(logging_level) -> None:
@@ -33,15 +52,93 @@ def setup_logging(logging_level) -> None:
         logging.getLogger(logger_name).setLevel(logging.WARNING)
 
 
-def get_all_objects(s3_client, bucket: str, prefix: str):
+def to_object_record(obj: dict) -> dict:
+    """Keeps only the key, ETag and size of a listed object."""
+    return {"Key": obj["Key"], "ETag": obj["ETag"], "Size": obj["Size"]}
+
+
+def get_all_objects(s3_client, bucket: str, prefix: str, start_after: str | None = None) -> list[dict]:
+    """
+    Lists all objects under the prefix, following continuation tokens past the 1000 keys per call limit.
+    Keys up to and including {start_after} are skipped by S3. Folder placeholder keys (ending with '/') are dropped.
+    """
     logging.debug(f"Listing objects with prefix '{prefix}'.")
-    objects = s3_client.list_objects_v2(
-        Bucket=bucket,
-        Prefix=prefix
-    )["Contents"][1:]
+    paginator = s3_client.get_paginator("list_objects_v2")
+    params = {"Bucket": bucket, "Prefix": prefix}
+    if start_after is not None:
+        params["StartAfter"] = start_after
+
+    objects = []
+    for page in paginator.paginate(**params):
+        objects.extend(to_object_record(obj) for obj in page.get("Contents", []) if not obj["Key"].endswith("/"))
     return objects
 
 
+def get_common_prefixes(s3_client, bucket: str, prefix: str) -> list[str]:
+    """Lists the 'folders' directly under the prefix."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    prefixes = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        prefixes.extend(common_prefix["Prefix"] for common_prefix in page.get("CommonPrefixes", []))
+    return prefixes
+
+
+def get_months(start_date: date, end_date: date) -> list[tuple[int, int]]:
+    """Returns the (year, month) pairs of all months between the dates."""
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def get_month_prefixes(prefix: str, start_date: date, end_date: date) -> list[str]:
+    """Builds the {prefix}/YYYY/MM/ prefixes of all months between the dates."""
+    return [f"{prefix}/{year}/{month:02}/" for year, month in get_months(start_date, end_date)]
+
+
+def get_dated_objects(
+    s3_client, bucket: str, prefix: str, start_date: date | None = None, end_date: date | None = None, max_workers: int = 8
+) -> list[dict]:
+    """
+    Lists objects stored under {prefix}/YYYY/MM/DD/ keys, one paginated listing per month run in parallel.
+    Only the months between the dates are listed and keys dated before {start_date} are skipped with StartAfter,
+    so the listing cost depends on the date range instead of the whole history.
+    Without a start date the existing months are discovered from the year / month prefixes.
+    Objects are returned in key order.
+    """
+    prefix = prefix.rstrip("/")
+    end_date = end_date or date.today()
+    if start_date is None:
+        month_prefixes = [
+            month_prefix
+            for year_prefix in get_common_prefixes(s3_client, bucket, f"{prefix}/")
+            for month_prefix in get_common_prefixes(s3_client, bucket, year_prefix)
+        ]
+        month_prefixes = [
+            month_prefix for month_prefix in month_prefixes
+            if month_prefix <= f"{prefix}/{end_date.year}/{end_date.month:02}/"
+        ]
+    else:
+        month_prefixes = get_month_prefixes(prefix, start_date, end_date)
+    if not month_prefixes:
+        return []
+
+    # Keys of the start date sort after this, keys of earlier days before it
+    start_after = f"{prefix}/{start_date:%Y/%m/%d}" if start_date is not None else None
+
+    def list_month(month_prefix: str) -> list[dict]:
+        return get_all_objects(s3_client, bucket, month_prefix, start_after=start_after)
+
+    logging.info(f"Listing {len(month_prefixes)} month prefixes under '{prefix}'.")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        objects = [obj for month_objects in executor.map(list_month, month_prefixes) for obj in month_objects]
+
+    end_key = f"{prefix}/{end_date + timedelta(days=1):%Y/%m/%d}"
+    return [obj for obj in objects if obj["Key"] < end_key]
+
+
 def get_object(s3_client, bucket: str, key: str):
     obj = s3_client.get_object(
         Bucket=bucket,
@@ -50,16 +147,137 @@ def get_object(s3_client, bucket: str, key: str):
     return obj
 
 
-def get_json_object(s3_client, bucket: str, key: str):
+def get_object_tail(s3_client, bucket: str, key: str, length: int) -> tuple[bytes, int]:
+    """Downloads the last {length} bytes of the object (the whole object if smaller). Returns (tail, object size)."""
+    obj = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=-{length}")
+    tail = obj["Body"].read()
+    # Content-Range is "bytes {first}-{last}/{size}", it is missing when the whole object is returned
+    content_range = obj.get("ContentRange")
+    size = int(re.search(r"/(\d+)$", content_range).group(1)) if content_range else len(tail)
+    return tail, size
+
+
+class S3RangeFile(io.RawIOBase):
+    """
+    Read-only seekable file over an S3 object, every read is a ranged GET.
+    Lets readers that only need some byte ranges (e.g. parquet footers and column chunks) skip the rest of the object.
+    A known {tail} of the object is served from memory.
+    """
+    def __init__(self, s3_client, bucket: str, key: str, size: int, tail: bytes = b""):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.tail = tail
+        self.position = 0
+        self.range_requests = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        start = self.position
+        end = min(start + len(buffer), self.size)
+        if start >= end:
+            return 0
+
+        tail_start = self.size - len(self.tail)
+        if start >= tail_start:
+            data = self.tail[start - tail_start:end - tail_start]
+        else:
+            obj = self.s3_client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{end - 1}")
+            data = obj["Body"].read()
+            self.range_requests += 1
+
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+def get_object_body(s3_client, bucket: str, key: str, etag: str | None = None, disk_cache=None) -> bytes:
+    """
+    Downloads the object body. With a DiskCache an unchanged object is read from disk instead,
+    it is validated with the {etag} from a listing or with a HEAD request if the ETag isn't known.
+    """
+    if disk_cache is None:
+        return get_object(s3_client, bucket, key)["Body"].read()
+
+    if etag is None:
+        etag = s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+    body = disk_cache.get(bucket, key, etag)
+    if body is not None:
+        logging.debug(f"Read '{key}' from the disk cache.")
+        return body
+
     obj = get_object(s3_client, bucket, key)
-    return json.load(obj["Body"])
+    body = obj["Body"].read()
+    disk_cache.put(bucket, key, obj["ETag"], body)
+    return body
+
+
+def get_json_object(s3_client, bucket: str, key: str, disk_cache=None):
+    return json_codec.loads(get_object_body(s3_client, bucket, key, disk_cache=disk_cache))
+
+
+def iter_mapped_objects(read_object: Callable[[str], T], keys: list[str], max_workers: int = 16) -> Iterator[tuple[str, T]]:
+    """
+    Calls {read_object} for every key with a bounded thread pool and yields (key, result) pairs as they complete,
+    so the total time is bounded by the slowest downloads instead of the sum of all round trips.
+    The completion order is arbitrary, callers needing a stable order should index the results by key.
+    Keep {max_workers} at or below the client's max_pool_connections to avoid discarding connections.
+    """
+    if not keys:
+        return
+    logging.debug(f"Fetching {len(keys)} objects with {max_workers} workers.")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        futures = {executor.submit(read_object, key): key for key in keys}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
 
-def save_data_to_s3(s3_client, bucket: str, path: str, body: dict[str, str]):
+def iter_object_bodies(s3_client, bucket: str, keys: list[str], max_workers: int = 16) -> Iterator[tuple[str, bytes]]:
+    """Downloads the objects in parallel (see iter_mapped_objects) and yields (key, body) pairs as they complete."""
+    def read_body(key: str) -> bytes:
+        return get_object(s3_client, bucket, key)["Body"].read()
+
+    return iter_mapped_objects(read_body, keys, max_workers)
+
+
+def save_data_to_s3(s3_client, bucket: str, path: str, body: dict[str, str], encodings: Sequence[str] | None = None):
+    """
+    Saves the body as JSON, encoded by the shared JSON codec straight into the upload buffer.
+    Outputs served with pre-compressed variants pass their content {encodings} ("gzip" / "br", possibly none):
+    a variant is saved next to the JSON (see get_encoded_path) with its Content-Encoding for each one that can be
+    produced, and the variants of all other encodings are deleted so readers never serve a stale one.
+    The variants are saved first, a reader never finds a plain object newer than its variants after a complete save.
+    """
     logging.info(f"Saving data to '{path}'.")
-    s3_client.put_object(
-        Bucket=bucket,
-        Key=path,
-        Body=json.dumps(body)
-    )
+    buffer = io.BytesIO()
+    json_codec.dump(body, buffer)
+    if encodings is not None:
+        written = get_supported_encodings(encodings)
+        for encoding in written:
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=get_encoded_path(path, encoding),
+                Body=compress_body(buffer.getvalue(), encoding),
+                ContentType="application/json",
+                ContentEncoding=encoding,
+            )
+        for encoding in sorted(ENCODING_SUFFIXES.keys() - set(written)):
+            # Deleting a missing key succeeds, no need to check whether an older variant exists
+            s3_client.delete_object(Bucket=bucket, Key=get_encoded_path(path, encoding))
+    buffer.seek(0)
+    s3_client.upload_fileobj(Bucket=bucket, Key=path, Fileobj=buffer)
     logging.debug(f"Successfully saved data to '{path}'.")
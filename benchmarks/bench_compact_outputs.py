@@ -0,0 +1,64 @@
+"""
+Compares the payload size and JSON parse time of the record shaped repo comparison output
+with the compact (struct of arrays) variants on synthetic daily histories.
+
+Usage: python benchmarks/bench_compact_outputs.py [repos] [periods]
+"""
+import gzip
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "backend" / "aggregate"), str(ROOT / "backend" / "layers" / "common_layer" / "python")]
+
+import numpy as np
+
+from agg_core.compact import to_compact_repo_comparison, from_compact_repo_comparison
+
+
+def make_repo_comparison_data(repos: int, periods: int) -> dict:
+    rng = np.random.default_rng(0)
+    dates = [(date(2024, 1, 1) + timedelta(days=i)).isoformat() for i in range(periods)]
+    # Stars and forks grow slowly, size and open issues fluctuate
+    stars = np.cumsum(rng.integers(0, 50, (repos, periods)), axis=1) + rng.integers(1_000, 200_000, (repos, 1))
+    forks = np.cumsum(rng.integers(0, 10, (repos, periods)), axis=1) + rng.integers(100, 20_000, (repos, 1))
+    size = rng.integers(10_000, 2_000_000, (repos, 1)) + rng.integers(-500, 500, (repos, periods))
+    open_issues = rng.integers(0, 2_000, (repos, 1)) + rng.integers(0, 20, (repos, periods))
+    return {
+        repo_id: {
+            "name": f"owner-{repo_id}/repo-{repo_id}",
+            "history": [
+                {"date": dates[i], "stars": int(stars[repo_id, i]), "forks": int(forks[repo_id, i]),
+                 "size": int(size[repo_id, i]), "open_issues": int(open_issues[repo_id, i])}
+                for i in range(periods)
+            ],
+        }
+        for repo_id in range(repos)
+    }
+
+
+def measure(label: str, data) -> None:
+    body = json.dumps(data).encode()
+    start = time.perf_counter()
+    json.loads(body)
+    parse_time = time.perf_counter() - start
+    print(f"{label:<20} {len(body) / 1e6:8.2f} MB {len(gzip.compress(body)) / 1e6:8.2f} MB gzip {parse_time:8.3f}s parse")
+
+
+def main(repos: int, periods: int):
+    data = make_repo_comparison_data(repos, periods)
+    print(f"Repos: {repos:,}, periods: {periods:,}")
+
+    compact = to_compact_repo_comparison(data)
+    measure("records", data)
+    measure("compact", to_compact_repo_comparison(data, delta=False))
+    measure("compact + delta", compact)
+
+    print(f"Round trip identical: {from_compact_repo_comparison(compact) == json.loads(json.dumps(data))}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000, int(sys.argv[2]) if len(sys.argv) > 2 else 365)
@@ -0,0 +1,60 @@
+"""
+Compares the stdlib JSON path used before the JSON codec with the codecs of dts_utils.json_codec
+on a synthetic repo comparison output: encoding for the S3 upload, decoding a download and the API path
+(decode, FastAPI's jsonable_encoder, JSONResponse rendering vs decode and codec encode into a raw Response).
+
+Usage: python benchmarks/bench_json_codec.py [repos] [periods]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "backend" / "aggregate"), str(ROOT / "backend" / "layers" / "common_layer" / "python")]
+
+from fastapi.encoders import jsonable_encoder
+
+from dts_utils.json_codec import StdlibCodec, OrjsonCodec
+from bench_compact_outputs import make_repo_comparison_data
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<45} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def encode_previous(data) -> bytes:
+    # save_data_to_s3 before the codec
+    return json.dumps(data).encode()
+
+
+def api_previous(body: bytes) -> bytes:
+    # get_json_object, then FastAPI's response serialization and JSONResponse.render
+    content = jsonable_encoder(json.loads(body))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def main(repos: int, periods: int):
+    data = make_repo_comparison_data(repos, periods)
+    print(f"Repos: {repos:,}, periods: {periods:,}")
+
+    body = timed("encode: json.dumps (previous)", encode_previous, data)
+    print(f"Payload: {len(body) / 1e6:.1f} MB")
+    for codec in [StdlibCodec(), OrjsonCodec()]:
+        timed(f"encode: {codec.name} codec", codec.dumps, data)
+
+    timed("decode: json.loads (previous)", json.loads, body)
+    for codec in [StdlibCodec(), OrjsonCodec()]:
+        timed(f"decode: {codec.name} codec", codec.loads, body)
+
+    previous = timed("api: loads + jsonable_encoder + render", api_previous, body)
+    for codec in [StdlibCodec(), OrjsonCodec()]:
+        current = timed(f"api: {codec.name} codec loads + dumps", lambda: codec.dumps(codec.loads(body)))
+        print(f"Identical response: {json.loads(current) == json.loads(previous)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000, int(sys.argv[2]) if len(sys.argv) > 2 else 365)
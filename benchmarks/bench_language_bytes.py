@@ -0,0 +1,66 @@
+"""
+Compares a pandas group by with the Arrow group by of the language byte shares aggregate
+on a synthetic long format languages snapshot (repo_id, language, bytes).
+
+Usage: python benchmarks/bench_language_bytes.py [rows]
+"""
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "backend" / "aggregate"), str(ROOT / "backend" / "layers" / "common_layer" / "python")]
+
+import numpy as np
+import pyarrow as pa
+
+from agg_core.language_bytes import get_language_byte_stats
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def make_languages_table(rows: int) -> pa.Table:
+    rng = np.random.default_rng(0)
+    languages = np.array([f"Language{i}" for i in range(500)], dtype=object)
+    # Skewed language popularity like the real distribution, 8 distinct languages per repo
+    repo_base = np.minimum(rng.zipf(1.5, rows // 8 + 1) - 1, len(languages) - 1)
+    positions = np.arange(rows)
+    language_index = (repo_base[positions // 8] + positions % 8) % len(languages)
+    return pa.table({
+        "repo_id": positions // 8,
+        "language": pa.array(languages[language_index], type=pa.string()),
+        "bytes": rng.integers(1, 10_000_000, rows),
+    })
+
+
+def get_stats_pandas(table: pa.Table) -> dict[str, list]:
+    df = table.to_pandas()
+    df = df[df["language"].notna()]
+    grouped = df.groupby("language", sort=False).agg(bytes=("bytes", "sum"), repo_counts=("repo_id", "count")).reset_index()
+    grouped = grouped.sort_values(["bytes", "language"], ascending=[False, True])
+    shares = (grouped["bytes"] / grouped["bytes"].sum()).round(6)
+    return {
+        "languages": grouped["language"].tolist(),
+        "bytes": grouped["bytes"].tolist(),
+        "shares": shares.tolist(),
+        "repo_counts": grouped["repo_counts"].tolist(),
+    }
+
+
+def main(rows: int):
+    table = timed("generate table", make_languages_table, rows)
+    print(f"Rows: {rows:,}, languages: {len(set(table['language'].unique().to_pylist()))}")
+
+    pandas_stats = timed("pandas group by (incl. to_pandas)", get_stats_pandas, table)
+    arrow_stats = timed("arrow group by", get_language_byte_stats, table)
+
+    print(f"Identical output: {pandas_stats == arrow_stats}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000_000)
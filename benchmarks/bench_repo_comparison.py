@@ -0,0 +1,63 @@
+"""
+Compares the row by row repo comparison builder with the vectorized one.
+
+Usage: python benchmarks/bench_repo_comparison.py [repos] [periods]
+"""
+import sys
+import json
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "backend" / "aggregate"), str(ROOT / "backend" / "layers" / "common_layer" / "python")]
+
+import numpy as np
+import pandas as pd
+
+from agg_core.repo_comparison import get_repo_comparison_data, build_repo_comparison_data
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def make_period_dfs(repos: int, periods: int) -> list[tuple[str, pd.DataFrame]]:
+    rng = np.random.default_rng(0)
+    period_dfs = []
+    for period in range(periods):
+        # Most repos are present in every period, a few drop out and come back
+        ids = rng.permutation(repos)[: int(repos * 0.95)]
+        period_dfs.append((f"P{period:04}", pd.DataFrame({
+            "id": ids.astype("int64"),
+            "name": [f"repo-{repo_id}" for repo_id in ids],
+            "stars": rng.integers(0, 100_000, len(ids)),
+            "forks": rng.integers(0, 10_000, len(ids)),
+            "size": rng.integers(0, 1_000_000, len(ids)),
+            "open_issues": rng.integers(0, 1_000, len(ids)),
+        })))
+    return period_dfs
+
+
+def build_row_by_row(period_dfs: list[tuple[str, pd.DataFrame]]) -> dict:
+    data = {}
+    for date, df in period_dfs:
+        get_repo_comparison_data(data, df, date)
+    return data
+
+
+def main(repos: int, periods: int):
+    period_dfs = make_period_dfs(repos, periods)
+    print(f"Repos: {repos:,}, periods: {periods:,}")
+
+    row_by_row = timed("itertuples builder", build_row_by_row, period_dfs)
+    vectorized = timed("vectorized builder", build_repo_comparison_data, period_dfs)
+
+    identical = json.dumps(row_by_row) == json.dumps(vectorized)
+    print(f"Identical JSON output: {identical}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]) if len(sys.argv) > 2 else (10_000, 200))
@@ -0,0 +1,59 @@
+"""
+Compares the dict (JSON) registry upsert with the columnar parquet registry upsert.
+
+Usage: python benchmarks/bench_repo_registry.py [registry_size] [repos_per_run]
+"""
+import sys
+import json
+import time
+from io import BytesIO
+from pathlib import Path
+from datetime import datetime
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "backend" / "extract"), str(ROOT / "backend" / "layers" / "common_layer" / "python")]
+
+import pyarrow.parquet as pq
+
+from extract_core.repo_registry import upsert_repo_registry, upsert_repo_registry_table, registry_dict_to_table
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main(registry_size: int, repos_per_run: int):
+    registry = {
+        str(repo_id): {"name": f"repo-{repo_id}", "first_seen": "2024-01-01", "last_seen": "2024-01-01"}
+        for repo_id in range(registry_size)
+    }
+    # Half of the repos of the run are already known, half are new
+    repos = [{"id": registry_size - repos_per_run // 2 + i, "name": f"repo-{i}"} for i in range(repos_per_run)]
+    run_date = datetime(2024, 6, 1)
+    print(f"Registry size: {registry_size:,}, repos per run: {repos_per_run:,}")
+
+    json_body = json.dumps(registry)
+    timed("json: load", json.loads, json_body)
+    updated = timed("json: upsert", upsert_repo_registry, run_date, repos, registry)
+    json_body = timed("json: dump", json.dumps, updated)
+    print(f"{'json: size':<40} {len(json_body) / 1e6:8.1f}MB")
+
+    table = registry_dict_to_table(registry)
+    buffer = BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    parquet_body = buffer.getvalue()
+
+    table = timed("parquet: load", lambda: pq.read_table(BytesIO(parquet_body)))
+    updated_table = timed("parquet: upsert", upsert_repo_registry_table, run_date, repos, table)
+    buffer = BytesIO()
+    timed("parquet: dump", pq.write_table, updated_table, buffer)
+    print(f"{'parquet: size':<40} {len(buffer.getvalue()) / 1e6:8.1f}MB")
+
+
+if __name__ == "__main__":
+    registry_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repos_per_run = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    main(registry_size, repos_per_run)
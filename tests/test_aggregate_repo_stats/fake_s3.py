@@ -0,0 +1,87 @@
+import hashlib
+from io import BytesIO
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+class FakePaginator:
+    """Mimics list_objects_v2 pagination with small pages."""
+    def __init__(self, s3_client, page_size: int = 2):
+        self.s3_client = s3_client
+        self.page_size = page_size
+
+    def paginate(self, Bucket, Prefix, StartAfter="", Delimiter=None):
+        self.s3_client.list_calls.append({"Prefix": Prefix, "StartAfter": StartAfter, "Delimiter": Delimiter})
+        keys = [key for key in sorted(self.s3_client.objects) if key.startswith(Prefix) and key > StartAfter]
+        if Delimiter is not None:
+            prefixes = sorted({Prefix + key[len(Prefix):].split(Delimiter)[0] + Delimiter for key in keys if Delimiter in key[len(Prefix):]})
+            yield {"CommonPrefixes": [{"Prefix": prefix} for prefix in prefixes]}
+            return
+        for i in range(0, len(keys), self.page_size):
+            yield {"Contents": [
+                {"Key": key, "ETag": self.s3_client.get_etag(key), "Size": len(self.s3_client.objects[key]), "StorageClass": "STANDARD"}
+                for key in keys[i:i + self.page_size]
+            ]}
+
+
+class FakeS3Client:
+    """In memory stand-in for the subset of the boto3 S3 client used by the aggregation."""
+    class exceptions:
+        NoSuchKey = NoSuchKey
+
+    def __init__(self, objects: dict[str, bytes] | None = None):
+        self.objects = dict(objects or {})
+        self.get_calls = []
+        self.list_calls = []
+        self.head_calls = []
+        self.bytes_sent = 0
+        # Extra put_object arguments (ContentType, ContentEncoding, ...) per key
+        self.put_params = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode() if isinstance(Body, str) else bytes(Body)
+        self.put_params[Key] = kwargs
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, **kwargs):
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj.read())
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self.objects.pop(Key, None)
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self.get_calls.append(Key)
+        if Key not in self.objects:
+            raise NoSuchKey(Key)
+        body = self.objects[Key]
+        response = {"ETag": self.get_etag(Key)}
+        if Range is not None:
+            first, last = Range.removeprefix("bytes=").split("-")
+            if first == "":
+                first, last = max(0, len(body) - int(last)), len(body) - 1
+            first, last = int(first), min(int(last), len(body) - 1)
+            if (first, last) != (0, len(body) - 1):
+                response["ContentRange"] = f"bytes {first}-{last}/{len(body)}"
+            body = body[first:last + 1]
+        self.bytes_sent += len(body)
+        return {**response, "Body": BytesIO(body)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.head_calls.append(Key)
+        if Key not in self.objects:
+            raise NoSuchKey(Key)
+        return {"ETag": self.get_etag(Key), "ContentLength": len(self.objects[Key])}
+
+    def get_etag(self, key: str) -> str:
+        return f'"{hashlib.md5(self.objects[key]).hexdigest()}"'
+
+    def get_paginator(self, operation_name: str):
+        assert operation_name == "list_objects_v2"
+        return FakePaginator(self)
+
+    def list_objects(self, prefix: str) -> list[dict]:
+        return [
+            {"Key": key, "ETag": self.get_etag(key), "Size": len(body)}
+            for key, body in sorted(self.objects.items()) if key.startswith(prefix)
+        ]
@@ -0,0 +1,50 @@
+import json
+
+from aggregate.agg_core.compact import (
+    delta_encode, delta_decode, to_compact_period_counts, from_compact_period_counts,
+    to_compact_repo_comparison, from_compact_repo_comparison
+)
+
+
+def test_delta_round_trip():
+    assert delta_encode([10, 12, 12, 9]) == [10, 2, 0, -3]
+    assert delta_decode([10, 2, 0, -3]) == [10, 12, 12, 9]
+    assert delta_encode([]) == []
+    assert delta_encode([None, 5, None, 7]) == [None, 5, None, 2]
+    assert delta_decode([None, 5, None, 2]) == [None, 5, None, 7]
+
+
+def test_compact_period_counts():
+    data = [
+        {"date": "2025-W01", "counts": {"python": 10, "rust": 3}},
+        {"date": "2025-W02", "counts": {"python": 12, "go": 1, "rust": 0}},
+    ]
+
+    compact = to_compact_period_counts(data)
+
+    assert compact["dates"] == ["2025-W01", "2025-W02"]
+    assert compact["series"] == {"go": [None, 1], "python": [10, 2], "rust": [3, -3]}
+    assert from_compact_period_counts(compact) == data
+    assert to_compact_period_counts(data, delta=False)["series"]["python"] == [10, 12]
+
+
+def test_compact_repo_comparison_shares_date_axis():
+    data = {
+        1: {"name": "a/one", "history": [
+            {"date": "2025-01", "stars": 5, "forks": 1, "size": 100, "open_issues": 2},
+            {"date": "2025-03", "stars": 9, "forks": 1, "size": 90, "open_issues": 0},
+        ]},
+        2: {"name": "b/two", "history": [
+            {"date": "2025-02", "stars": 7, "forks": 0, "size": 10, "open_issues": 1},
+        ]},
+    }
+
+    compact = to_compact_repo_comparison(data)
+
+    assert compact["dates"] == ["2025-01", "2025-02", "2025-03"]
+    assert compact["repos"]["1"] == {
+        "name": "a/one", "date_index": [0, 2], "stars": [5, 4], "forks": [1, 0], "size": [100, -10], "open_issues": [2, -2]
+    }
+    assert compact["repos"]["2"]["date_index"] == [1]
+    assert from_compact_repo_comparison(compact) == json.loads(json.dumps(data))
+    assert from_compact_repo_comparison(to_compact_repo_comparison(data, delta=False)) == json.loads(json.dumps(data))
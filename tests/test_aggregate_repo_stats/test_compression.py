@@ -0,0 +1,32 @@
+import gzip
+
+import pytest
+
+from dts_utils import compression
+from dts_utils.compression import compress_body, get_encoded_path, get_supported_encodings
+
+
+def test_get_encoded_path():
+    assert get_encoded_path("aggregated_data/repo_counts/weekly.json", "gzip") == "aggregated_data/repo_counts/weekly.json.gz"
+    assert get_encoded_path("aggregated_data/repo_counts/weekly.json", "br") == "aggregated_data/repo_counts/weekly.json.br"
+
+
+def test_gzip_variant_is_deterministic():
+    body = b'{"a": 1}' * 100
+
+    assert compress_body(body, "gzip") == compress_body(body, "gzip")
+    assert gzip.decompress(compress_body(body, "gzip")) == body
+
+
+def test_get_supported_encodings_skips_brotli_without_package(monkeypatch, caplog):
+    monkeypatch.setattr(compression, "brotli", None)
+    compression._warn_brotli_unavailable.cache_clear()
+
+    assert get_supported_encodings(["br", "gzip"]) == ["gzip"]
+    assert get_supported_encodings(("br",)) == []
+    assert caplog.text.count("brotli package isn't installed") == 1
+
+
+def test_get_supported_encodings_rejects_unknown_encoding():
+    with pytest.raises(Exception, match="Unknown content encoding"):
+        get_supported_encodings(["zstd"])
@@ -0,0 +1,115 @@
+import json
+import os
+
+from dts_utils.disk_cache import DiskCache
+from dts_utils.s3_utils import get_json_object
+from aggregate.agg_core.snapshot_cache import SnapshotCache
+from aggregate.agg_core.utils import read_parquet_columns
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+from test_aggregate_repo_stats.test_incremental import make_repos_parquet, make_settings
+
+
+def test_disk_cache_keys_entries_by_etag(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    cache.put("bucket", "key", '"1"', b"old")
+
+    assert cache.get("bucket", "key", '"1"') == b"old"
+    assert cache.get("bucket", "key", '"2"') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.put("bucket", "a", "e", b"aaaa")
+    cache.put("bucket", "b", "e", b"bbbb")
+    os.utime(cache.get_path("bucket", "b", "e"), (1, 1))
+    os.utime(cache.get_path("bucket", "a", "e"), (2, 2))
+
+    cache.put("bucket", "c", "e", b"cccc")
+
+    assert cache.get("bucket", "b", "e") is None
+    assert cache.get("bucket", "a", "e") == b"aaaa"
+    assert cache.get("bucket", "c", "e") == b"cccc"
+    assert cache.get_size() == 8
+
+    cache.put("bucket", "huge", "e", b"x" * 11)
+    assert cache.get("bucket", "huge", "e") is None
+
+
+def test_disk_cache_survives_new_instance(tmp_path):
+    DiskCache(str(tmp_path), max_bytes=1000).put("bucket", "key", "e", b"body")
+
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+
+    assert cache.get_size() == 4
+    assert cache.get("bucket", "key", "e") == b"body"
+
+
+def evict_after_get_path(monkeypatch, cache: DiskCache):
+    """Makes a concurrent put evict every entry right after get_path released the lock."""
+    get_path = cache.get_path
+
+    def racing_get_path(*args):
+        path = get_path(*args)
+        cache.put("bucket", "other", "e", b"x" * cache.max_bytes)
+        return path
+
+    monkeypatch.setattr(cache, "get_path", racing_get_path)
+
+
+def test_disk_cache_get_of_evicted_entry_is_miss(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.put("bucket", "key", "e", b"body")
+    evict_after_get_path(monkeypatch, cache)
+
+    assert cache.get("bucket", "key", "e") is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_read_parquet_columns_of_evicted_entry_reads_s3(tmp_path, monkeypatch):
+    s3_client = FakeS3Client({"repos.parquet": make_repos_parquet({1: 10, 2: 20})})
+    etag = s3_client.list_objects("")[0]["ETag"]
+    cache = DiskCache(str(tmp_path), max_bytes=10_000)
+    expected = read_parquet_columns(s3_client, "bucket", "repos.parquet", ["id", "stars"], etag=etag, disk_cache=cache)
+    evict_after_get_path(monkeypatch, cache)
+
+    result = read_parquet_columns(s3_client, "bucket", "repos.parquet", ["id", "stars"], etag=etag, disk_cache=cache)
+
+    assert result.equals(expected)
+    assert s3_client.get_calls == ["repos.parquet", "repos.parquet"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_get_json_object_validates_disk_cache_with_head(tmp_path):
+    s3_client = FakeS3Client({"data.json": json.dumps({"a": 1}).encode()})
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+
+    assert get_json_object(s3_client, "bucket", "data.json", disk_cache=cache) == {"a": 1}
+    assert get_json_object(s3_client, "bucket", "data.json", disk_cache=cache) == {"a": 1}
+    assert s3_client.get_calls == ["data.json"]
+
+    s3_client.objects["data.json"] = json.dumps({"a": 2}).encode()
+    assert get_json_object(s3_client, "bucket", "data.json", disk_cache=cache) == {"a": 2}
+    assert s3_client.get_calls == ["data.json", "data.json"]
+    assert len(s3_client.head_calls) == 3
+
+
+def test_snapshots_are_not_downloaded_twice_by_warm_container(tmp_path):
+    s3_client = FakeS3Client({
+        "github_data/2025/01/06/repos.parquet": make_repos_parquet({1: 10, 2: 20}),
+        "github_data/2025/01/06/repo_counts.json": b'{"etl": 30}',
+    })
+    snapshots = [{"key": obj["Key"], "etag": obj["ETag"]} for obj in s3_client.list_objects("github_data")]
+    disk_cache = DiskCache(str(tmp_path), max_bytes=10_000_000)
+
+    first = SnapshotCache(s3_client, make_settings(False), disk_cache=disk_cache)
+    first.load(snapshots)
+    s3_client.get_calls.clear()
+
+    second = SnapshotCache(s3_client, make_settings(False), disk_cache=disk_cache)
+    second.load(snapshots)
+
+    assert s3_client.get_calls == []
+    assert s3_client.head_calls == []
+    assert second.get(snapshots[0]) == {"etl": 30}
+    assert second.get(snapshots[1]).equals(first.get(snapshots[1]))
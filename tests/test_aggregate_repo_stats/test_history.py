@@ -0,0 +1,107 @@
+from datetime import date
+from io import BytesIO
+
+import pyarrow.parquet as pq
+
+from aggregate.agg_core.history import compact_history, read_history
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+from test_aggregate_repo_stats.test_incremental import make_repos_parquet, make_settings
+
+
+def make_history_settings():
+    settings = make_settings(True)
+    settings.history_row_group_size = 2
+    settings.get_history_partition_path = lambda year, month: f"history/repos/year={year}/month={month:02}/part-0.parquet"
+    settings.get_history_manifest_path = lambda: "history/repos/_manifest.json"
+    return settings
+
+
+def add_repos_snapshot(s3_client: FakeS3Client, snapshot_date: str, stars: dict[int, int]):
+    s3_client.objects[f"github_data/{snapshot_date}/repos.parquet"] = make_repos_parquet(stars)
+
+
+def read_partition(s3_client: FakeS3Client, year: int, month: int):
+    return pq.read_table(BytesIO(s3_client.objects[f"history/repos/year={year}/month={month:02}/part-0.parquet"]))
+
+
+def test_compact_history_writes_sorted_monthly_partitions():
+    s3_client = FakeS3Client()
+    add_repos_snapshot(s3_client, "2025/01/02", {2: 20, 1: 10})
+    add_repos_snapshot(s3_client, "2025/01/01", {1: 9, 3: 30})
+    add_repos_snapshot(s3_client, "2025/02/01", {1: 11})
+
+    compacted = compact_history(s3_client, make_history_settings(), s3_client.list_objects("github_data"))
+
+    assert compacted == ["2025-01", "2025-02"]
+    january = read_partition(s3_client, 2025, 1)
+    assert january.column("id").to_pylist() == [1, 1, 2, 3]
+    assert january.column("date").to_pylist() == [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 2), date(2025, 1, 1)]
+    assert january.column("stars").to_pylist() == [9, 10, 20, 30]
+    assert pq.ParquetFile(BytesIO(s3_client.objects["history/repos/year=2025/month=01/part-0.parquet"])).metadata.num_row_groups == 2
+
+
+def test_compact_history_is_idempotent():
+    s3_client = FakeS3Client()
+    add_repos_snapshot(s3_client, "2025/01/01", {1: 9})
+    settings = make_history_settings()
+    compact_history(s3_client, settings, s3_client.list_objects("github_data"))
+    partition = s3_client.objects["history/repos/year=2025/month=01/part-0.parquet"]
+
+    assert compact_history(s3_client, settings, s3_client.list_objects("github_data")) == []
+
+    add_repos_snapshot(s3_client, "2025/01/02", {1: 10})
+    assert compact_history(s3_client, settings, s3_client.list_objects("github_data")) == ["2025-01"]
+    assert s3_client.objects["history/repos/year=2025/month=01/part-0.parquet"] != partition
+
+
+def test_compact_history_relists_partly_listed_month():
+    s3_client = FakeS3Client()
+    add_repos_snapshot(s3_client, "2025/01/01", {1: 9})
+    settings = make_history_settings()
+    compact_history(s3_client, settings, s3_client.list_objects("github_data"))
+
+    add_repos_snapshot(s3_client, "2025/01/20", {1: 10})
+    listed = [obj for obj in s3_client.list_objects("github_data") if obj["Key"] >= "github_data/2025/01/20"]
+    compact_history(s3_client, settings, listed, listed_from=date(2025, 1, 20))
+
+    assert read_partition(s3_client, 2025, 1).column("stars").to_pylist() == [9, 10]
+
+
+
+def test_compact_history_redoes_month_of_failed_run_after_month_boundary():
+    s3_client = FakeS3Client()
+    add_repos_snapshot(s3_client, "2024/12/31", {1: 8})
+    settings = make_history_settings()
+    compact_history(s3_client, settings, s3_client.list_objects("github_data"))
+
+    # The runs of January aggregated their snapshots but their compaction failed
+    add_repos_snapshot(s3_client, "2025/01/15", {1: 9})
+    add_repos_snapshot(s3_client, "2025/01/31", {1: 10})
+    # The next run lists from the latest aggregated snapshot, in February
+    add_repos_snapshot(s3_client, "2025/02/01", {1: 11})
+    listed = [obj for obj in s3_client.list_objects("github_data") if obj["Key"] >= "github_data/2025/02/01"]
+
+    assert compact_history(s3_client, settings, listed, listed_from=date(2025, 2, 1)) == ["2025-01", "2025-02"]
+    assert read_partition(s3_client, 2025, 1).column("stars").to_pylist() == [9, 10]
+    assert read_partition(s3_client, 2025, 2).column("stars").to_pylist() == [11]
+
+    add_repos_snapshot(s3_client, "2025/02/02", {1: 12})
+    listed = [obj for obj in s3_client.list_objects("github_data") if obj["Key"] >= "github_data/2025/02/02"]
+    assert compact_history(s3_client, settings, listed, listed_from=date(2025, 2, 2)) == ["2025-02"]
+    assert read_partition(s3_client, 2025, 2).column("stars").to_pylist() == [11, 12]
+
+
+def test_read_history_pushes_down_filters():
+    s3_client = FakeS3Client()
+    add_repos_snapshot(s3_client, "2025/01/01", {repo_id: repo_id for repo_id in range(10)})
+    add_repos_snapshot(s3_client, "2025/02/01", {repo_id: repo_id + 100 for repo_id in range(10)})
+    settings = make_history_settings()
+    compact_history(s3_client, settings, s3_client.list_objects("github_data"))
+
+    repo_history = read_history(s3_client, settings, date(2025, 1, 1), date(2025, 3, 31), repo_ids=[3], columns=["id", "date", "stars"])
+    assert repo_history.to_dict(orient="list") == {"id": [3, 3], "date": [date(2025, 1, 1), date(2025, 2, 1)], "stars": [3, 103]}
+
+    period_repos = read_history(s3_client, settings, date(2025, 2, 1), date(2025, 2, 28))
+    assert period_repos["stars"].tolist() == list(range(100, 110))
+
+    assert read_history(s3_client, settings, date(2024, 1, 1), date(2024, 1, 31), columns=["id"]).empty
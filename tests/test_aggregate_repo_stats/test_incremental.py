@@ -0,0 +1,255 @@
+import json
+from datetime import datetime
+from io import BytesIO
+from types import SimpleNamespace
+
+import pandas as pd
+
+from aggregate.agg_core.incremental import (
+    get_changed_periods, get_removed_periods, merge_period_series, merge_repo_comparison_data,
+    get_listing_start_date, plan_interval, run_interval_plan, get_daily_snapshots, roll_up_snapshots
+)
+from aggregate.agg_core.snapshot_cache import SnapshotCache
+from aggregate.agg_core.compact import from_compact_period_counts, from_compact_repo_comparison
+from dts_utils.s3_utils import get_dated_objects
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+
+
+def make_repos_parquet(stars: dict[int, int]) -> bytes:
+    df = pd.DataFrame({
+        "id": list(stars),
+        "name": [f"repo-{repo_id}" for repo_id in stars],
+        "stars": list(stars.values()),
+        "forks": [1] * len(stars),
+        "size": [10] * len(stars),
+        "open_issues": [0] * len(stars),
+        "main_language": ["Python"] * len(stars)
+    })
+    buffer = BytesIO()
+    df.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def make_languages_parquet(stars: dict[int, int]) -> bytes:
+    df = pd.DataFrame({
+        "repo_id": [repo_id for repo_id in stars for _ in range(2)],
+        "repo_name": [f"repo-{repo_id}" for repo_id in stars for _ in range(2)],
+        "language": ["Python", "Shell"] * len(stars),
+        "bytes": [value for repo_id, value in stars.items() for value in (value * 100, repo_id)],
+    })
+    buffer = BytesIO()
+    df.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def add_snapshot(s3_client: FakeS3Client, date: str, stars: dict[int, int]):
+    s3_client.objects[f"github_data/{date}/repos.parquet"] = make_repos_parquet(stars)
+    s3_client.objects[f"github_data/{date}/languages.parquet"] = make_languages_parquet(stars)
+    s3_client.objects[f"github_data/{date}/repo_counts.json"] = json.dumps({"etl": sum(stars.values())}).encode()
+
+
+def make_settings(incremental: bool) -> SimpleNamespace:
+    return SimpleNamespace(
+        bucket="bucket",
+        github_data_prefix="github_data",
+        s3_list_workers=2,
+        s3_fetch_workers=4,
+        parquet_footer_read_size=64 * 1024,
+        incremental_aggregation=incremental,
+        get_manifest_path=lambda interval: f"aggregated_data/manifest/{interval}.json",
+        get_repo_counts_path=lambda interval: f"aggregated_data/repo_counts/{interval}.json",
+        get_primary_langs_path=lambda interval: f"aggregated_data/primary_langs_counts/{interval}.json",
+        get_repo_comparison_path=lambda interval: f"aggregated_data/repo_comparison/{interval}.json",
+        get_language_bytes_path=lambda interval: f"aggregated_data/language_bytes/{interval}.json",
+        get_repo_comparison_shard_path=lambda interval, shard, shard_count: (
+            f"aggregated_data/repo_comparison_shards/{interval}/shard_{shard:04}_of_{shard_count:04}.json"
+        ),
+        get_repo_comparison_index_path=lambda interval: f"aggregated_data/repo_comparison_shards/{interval}/index.json",
+        repo_comparison_shard_count=4,
+        save_compact_outputs=True,
+        output_encodings=["gzip"],
+        compact_delta_encoding=True,
+        get_compact_repo_counts_path=lambda interval: f"aggregated_data/compact/repo_counts/{interval}.json",
+        get_compact_primary_langs_path=lambda interval: f"aggregated_data/compact/primary_langs_counts/{interval}.json",
+        get_compact_repo_comparison_path=lambda interval: f"aggregated_data/compact/repo_comparison/{interval}.json",
+    )
+
+
+def get_outputs(s3_client: FakeS3Client) -> dict[str, bytes]:
+    return {key: body for key, body in s3_client.objects.items() if key.startswith("aggregated_data/") and "manifest" not in key}
+
+
+def run_aggregation(s3_client, settings, objects: list[dict], intervals: list[str], listed_from=None) -> SnapshotCache:
+    """Plans and runs the intervals with one shared snapshot cache, like the aggregation lambda."""
+    daily_snapshots = get_daily_snapshots(objects)
+    plans = [plan_interval(s3_client, settings, objects, interval, listed_from, daily_snapshots) for interval in intervals]
+    snapshot_cache = SnapshotCache(s3_client, settings)
+    snapshot_cache.load([snapshot for plan in plans for snapshot in plan.get_needed_snapshots()])
+    for plan in plans:
+        run_interval_plan(s3_client, settings, plan, snapshot_cache)
+    return snapshot_cache
+
+
+def test_get_changed_and_removed_periods():
+    processed = {"2025-01": {"key": "a", "etag": "1"}, "2025-02": {"key": "b", "etag": "2"}, "2025-03": {"key": "c", "etag": "3"}}
+    current = {"2025-01": {"key": "a", "etag": "1"}, "2025-02": {"key": "b2", "etag": "4"}, "2025-04": {"key": "d", "etag": "5"}}
+
+    assert get_changed_periods(current, processed) == {"2025-02", "2025-04"}
+    assert get_removed_periods(current, processed) == {"2025-03"}
+
+
+def test_merge_period_series():
+    existing = [{"date": "2025-01", "counts": {"a": 1}}, {"date": "2025-02", "counts": {"a": 2}}]
+    new = [{"date": "2025-02", "counts": {"a": 3}}, {"date": "2025-03", "counts": {"a": 4}}]
+
+    assert merge_period_series(existing, new, {"2025-02", "2025-03"}) == [
+        {"date": "2025-01", "counts": {"a": 1}},
+        {"date": "2025-02", "counts": {"a": 3}},
+        {"date": "2025-03", "counts": {"a": 4}}
+    ]
+
+
+def test_merge_repo_comparison_data():
+    existing = {
+        "1": {"name": "repo-1", "history": [{"date": "2025-01", "stars": 1}, {"date": "2025-02", "stars": 2}]},
+        "2": {"name": "repo-2", "history": [{"date": "2025-02", "stars": 5}]}
+    }
+    new = {
+        1: {"name": "repo-1", "history": [{"date": "2025-02", "stars": 3}]},
+        3: {"name": "repo-3", "history": [{"date": "2025-02", "stars": 7}]}
+    }
+
+    assert merge_repo_comparison_data(existing, new, {"2025-02"}) == {
+        "1": {"name": "repo-1", "history": [{"date": "2025-01", "stars": 1}, {"date": "2025-02", "stars": 3}]},
+        "3": {"name": "repo-3", "history": [{"date": "2025-02", "stars": 7}]}
+    }
+
+
+def test_incremental_aggregation_matches_full_aggregation():
+    incremental_client = FakeS3Client()
+    full_client = FakeS3Client()
+    snapshots = [
+        ("2025/01/06", {1: 10, 2: 20}),
+        ("2025/01/14", {1: 11, 2: 21}),
+        ("2025/01/15", {1: 12, 3: 30}),
+        ("2025/02/03", {1: 13, 3: 31}),
+    ]
+
+    for date, stars in snapshots:
+        add_snapshot(incremental_client, date, stars)
+        run_aggregation(incremental_client, make_settings(True), incremental_client.list_objects("github_data"), ["weekly", "monthly"])
+
+    for date, stars in snapshots:
+        add_snapshot(full_client, date, stars)
+    run_aggregation(full_client, make_settings(False), full_client.list_objects("github_data"), ["weekly", "monthly"])
+
+    assert get_outputs(incremental_client) == get_outputs(full_client)
+
+
+def test_compact_outputs_match_record_outputs():
+    s3_client = FakeS3Client()
+    add_snapshot(s3_client, "2025/01/06", {1: 10, 2: 20})
+    add_snapshot(s3_client, "2025/01/14", {1: 11, 3: 30})
+    run_aggregation(s3_client, make_settings(True), s3_client.list_objects("github_data"), ["weekly"])
+
+    def load(key: str):
+        return json.loads(s3_client.objects[f"aggregated_data/{key}/weekly.json"])
+
+    assert from_compact_period_counts(load("compact/repo_counts")) == load("repo_counts")
+    assert from_compact_period_counts(load("compact/primary_langs_counts")) == load("primary_langs_counts")
+    assert from_compact_repo_comparison(load("compact/repo_comparison")) == load("repo_comparison")
+
+
+def test_incremental_aggregation_only_reads_changed_periods():
+    s3_client = FakeS3Client()
+    add_snapshot(s3_client, "2025/01/06", {1: 10})
+    add_snapshot(s3_client, "2025/01/14", {1: 11})
+    run_aggregation(s3_client, make_settings(True), s3_client.list_objects("github_data"), ["weekly"])
+
+    add_snapshot(s3_client, "2025/01/15", {1: 12})
+    s3_client.get_calls.clear()
+    run_aggregation(s3_client, make_settings(True), s3_client.list_objects("github_data"), ["weekly"])
+
+    snapshot_reads = [key for key in s3_client.get_calls if key.startswith("github_data/")]
+    assert sorted(snapshot_reads) == [
+        "github_data/2025/01/15/languages.parquet", "github_data/2025/01/15/repo_counts.json", "github_data/2025/01/15/repos.parquet"
+    ]
+
+
+def test_incremental_aggregation_with_date_pruned_listing():
+    pruned_client = FakeS3Client()
+    full_client = FakeS3Client()
+    snapshots = [
+        ("2025/01/06", {1: 10, 2: 20}),
+        ("2025/01/14", {1: 11, 2: 21}),
+        ("2025/02/03", {1: 12, 3: 30}),
+        ("2025/02/04", {1: 13, 3: 31}),
+    ]
+    intervals = ["daily", "weekly", "monthly", "quarterly", "yearly"]
+
+    for date, stars in snapshots:
+        add_snapshot(pruned_client, date, stars)
+        listed_from = get_listing_start_date(pruned_client, make_settings(True), intervals)
+        objects = get_dated_objects(pruned_client, "bucket", "github_data", start_date=listed_from, end_date=datetime(2025, 2, 28).date())
+        run_aggregation(pruned_client, make_settings(True), objects, intervals, listed_from=listed_from)
+
+    # Listing starts at the latest processed snapshot, not at the start of its (possibly yearly) period
+    assert listed_from == datetime(2025, 2, 3).date()
+    assert min(obj["Key"] for obj in objects) == "github_data/2025/02/03/languages.parquet"
+
+    for date, stars in snapshots:
+        add_snapshot(full_client, date, stars)
+    run_aggregation(full_client, make_settings(False), full_client.list_objects("github_data"), intervals)
+
+    assert get_outputs(pruned_client) == get_outputs(full_client)
+
+
+def test_aggregation_output_order_does_not_depend_on_download_order():
+    s3_client = FakeS3Client()
+    for day in range(1, 29):
+        add_snapshot(s3_client, f"2025/02/{day:02}", {1: day, 2: 2 * day})
+    objects = s3_client.list_objects("github_data")
+
+    run_aggregation(s3_client, make_settings(False), objects, ["weekly"])
+
+    repo_counts = json.loads(s3_client.objects["aggregated_data/repo_counts/weekly.json"])
+    repo_comparison = json.loads(s3_client.objects["aggregated_data/repo_comparison/weekly.json"])
+    weeks = ["2025-W05", "2025-W06", "2025-W07", "2025-W08", "2025-W09"]
+    assert [entry["date"] for entry in repo_counts] == weeks
+    assert [record["date"] for record in repo_comparison["1"]["history"]] == weeks
+
+
+def test_intervals_share_snapshot_cache():
+    s3_client = FakeS3Client()
+    for date, stars in [("2025/01/06", {1: 10}), ("2025/01/14", {1: 11}), ("2025/01/31", {1: 12})]:
+        add_snapshot(s3_client, date, stars)
+    objects = s3_client.list_objects("github_data")
+
+    snapshot_cache = run_aggregation(s3_client, make_settings(False), objects, ["weekly", "monthly"])
+
+    # The monthly snapshot (01/31) is also the latest of its week, every snapshot is read once
+    snapshot_reads = [key for key in s3_client.get_calls if key.startswith("github_data/")]
+    assert sorted(snapshot_reads) == sorted(obj["Key"] for obj in objects)
+    assert len(snapshot_cache) == 9
+
+
+def test_roll_up_snapshots_picks_latest_day_per_period():
+    s3_client = FakeS3Client()
+    for date in ["2024/12/30", "2024/12/31", "2025/01/02", "2025/03/31", "2025/04/01"]:
+        add_snapshot(s3_client, date, {1: 1})
+    daily_snapshots = get_daily_snapshots(s3_client.list_objects("github_data"))["repos"]
+
+    def rolled_up_keys(interval):
+        return {period: snapshot["key"] for period, snapshot in roll_up_snapshots(daily_snapshots, interval).items()}
+
+    assert list(daily_snapshots) == ["2024-12-30", "2024-12-31", "2025-01-02", "2025-03-31", "2025-04-01"]
+    assert rolled_up_keys("weekly") == {
+        "2025-W01": "github_data/2025/01/02/repos.parquet",
+        "2025-W14": "github_data/2025/04/01/repos.parquet",
+    }
+    assert rolled_up_keys("quarterly") == {
+        "2024-Q4": "github_data/2024/12/31/repos.parquet",
+        "2025-Q1": "github_data/2025/03/31/repos.parquet",
+        "2025-Q2": "github_data/2025/04/01/repos.parquet",
+    }
+    assert rolled_up_keys("yearly") == {"2024": "github_data/2024/12/31/repos.parquet", "2025": "github_data/2025/04/01/repos.parquet"}
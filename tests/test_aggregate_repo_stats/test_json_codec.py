@@ -0,0 +1,64 @@
+import json
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dts_utils.json_codec import StdlibCodec, OrjsonCodec, get_codec
+
+
+DATA = {
+    1: {"name": "ünïcode/repo", "history": [{"date": "2025-W01", "stars": np.int64(5), "share": np.float64(0.25)}]},
+    "counts": pd.Series([1, 2]).to_numpy(),
+    "day": date(2025, 1, 6),
+    "empty": None,
+}
+EXPECTED = {
+    "1": {"name": "ünïcode/repo", "history": [{"date": "2025-W01", "stars": 5, "share": 0.25}]},
+    "counts": [1, 2],
+    "day": "2025-01-06",
+    "empty": None,
+}
+
+
+@pytest.mark.parametrize("codec", [StdlibCodec(), OrjsonCodec()], ids=["json", "orjson"])
+def test_codec_encodes_numpy_and_dates(codec):
+    encoded = codec.dumps(DATA)
+
+    assert json.loads(encoded) == EXPECTED
+    assert codec.loads(encoded) == EXPECTED
+
+    buffer = BytesIO()
+    codec.dump(DATA, buffer)
+    assert buffer.getvalue() == encoded
+
+
+def test_codecs_produce_identical_bytes():
+    assert StdlibCodec().dumps(DATA) == OrjsonCodec().dumps(DATA)
+
+
+@pytest.mark.parametrize("codec", [StdlibCodec(), OrjsonCodec()], ids=["json", "orjson"])
+def test_codec_writes_non_finite_floats_as_null_and_numpy_keys(codec):
+    data = {
+        np.int64(7): {"nan": float("nan"), "inf": np.float64("inf"), "array": np.array([1.5, np.nan]), "single": np.float32("nan")},
+        "ok": 0.5,
+    }
+
+    encoded = codec.dumps(data)
+
+    assert encoded == b'{"7":{"nan":null,"inf":null,"array":[1.5,null],"single":null},"ok":0.5}'
+    assert codec.loads(encoded) == {"7": {"nan": None, "inf": None, "array": [1.5, None], "single": None}, "ok": 0.5}
+
+
+@pytest.mark.parametrize("codec", [StdlibCodec(), OrjsonCodec()], ids=["json", "orjson"])
+def test_codec_rejects_unknown_types(codec):
+    with pytest.raises(TypeError):
+        codec.dumps({"a": object()})
+
+
+def test_get_codec():
+    assert get_codec("json").name == "json"
+    with pytest.raises(Exception, match="Unknown JSON codec"):
+        get_codec("yaml")
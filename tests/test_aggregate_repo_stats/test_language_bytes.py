@@ -0,0 +1,24 @@
+import pyarrow as pa
+
+from aggregate.agg_core.language_bytes import get_language_byte_stats
+
+
+def test_get_language_byte_stats():
+    table = pa.table({
+        "repo_id": [1, 1, 2, 2, 3, 3],
+        "language": ["Python", "Shell", "Python", "Go", "Go", None],
+        "bytes": [600, 100, 200, 50, 50, 999],
+    })
+
+    assert get_language_byte_stats(table) == {
+        "languages": ["Python", "Go", "Shell"],
+        "bytes": [800, 100, 100],
+        "shares": [0.8, 0.1, 0.1],
+        "repo_counts": [2, 2, 1],
+    }
+
+
+def test_get_language_byte_stats_empty_snapshot():
+    table = pa.table({"repo_id": pa.array([], pa.int64()), "language": pa.array([], pa.string()), "bytes": pa.array([], pa.int64())})
+
+    assert get_language_byte_stats(table) == {"languages": [], "bytes": [], "shares": [], "repo_counts": []}
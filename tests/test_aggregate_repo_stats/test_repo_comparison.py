@@ -1,5 +1,12 @@
+import json
+from types import SimpleNamespace
+
 import pandas as pd
-from aggregate.agg_core.repo_comparison import append_to_repo_history, get_repo_comparison_data
+from aggregate.agg_core.repo_comparison import (
+    append_to_repo_history, get_repo_comparison_data, build_repo_comparison_data, save_agg_repo_comparison_shards
+)
+from dts_utils.repo_shards import get_repo_shard
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
 
 
 def test_append_to_repo_history_new_repo():
@@ -102,4 +109,72 @@ def test_get_repo_comparison_data_multiple_days():
         }
     }
     
-    assert agg_data == expected_data
\ No newline at end of file
+    assert agg_data == expected_data
+
+
+def test_build_repo_comparison_data_matches_row_by_row_builder():
+    period_dfs = [
+        ("2023-01", pd.DataFrame({
+            "id": [2, 1], "name": ["repo2", "repo1"], "stars": [20, 10], "forks": [2, 1], "size": [200, 100], "open_issues": [1, 0],
+            "main_language": ["Go", "Python"]
+        })),
+        ("2023-02", pd.DataFrame({
+            "id": [3, 1], "name": ["repo3", "repo1-renamed"], "stars": [30, 11], "forks": [3, 1], "size": [300, 101], "open_issues": [0, 2],
+            "main_language": ["Rust", "Python"]
+        })),
+        ("2023-03", pd.DataFrame({
+            "id": [1, 2], "name": ["repo1", "repo2"], "stars": [12, 21], "forks": [1, 2], "size": [102, 201], "open_issues": [2, 1],
+            "main_language": ["Python", "Go"]
+        })),
+    ]
+    expected = {}
+    for date, df in period_dfs:
+        get_repo_comparison_data(expected, df, date)
+
+    result = build_repo_comparison_data(period_dfs)
+
+    assert json.dumps(result) == json.dumps(expected)
+    assert list(result) == [2, 1, 3]
+    assert result[1]["name"] == "repo1"
+
+
+def test_build_repo_comparison_data_without_periods():
+    assert build_repo_comparison_data([]) == {}
+
+
+def make_shard_settings(shard_count: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        bucket="bucket", repo_comparison_shard_count=shard_count, s3_fetch_workers=2,
+        get_repo_comparison_shard_path=lambda interval, shard, shard_count: f"shards/{interval}/shard_{shard:04}_of_{shard_count:04}.json",
+        get_repo_comparison_index_path=lambda interval: f"shards/{interval}/index.json",
+    )
+
+
+def test_save_agg_repo_comparison_shards():
+    s3_client = FakeS3Client()
+    data = {repo_id: {"name": f"repo{repo_id}", "history": [{"date": "2023-01", "stars": repo_id}]} for repo_id in range(20)}
+
+    save_agg_repo_comparison_shards(s3_client, make_shard_settings(4), "weekly", data)
+
+    assert json.loads(s3_client.objects["shards/weekly/index.json"]) == {"shard_count": 4, "repo_count": 20}
+    merged = {}
+    for shard in range(4):
+        shard_data = json.loads(s3_client.objects[f"shards/weekly/shard_{shard:04}_of_0004.json"])
+        assert all(get_repo_shard(repo_id, 4) == shard for repo_id in shard_data)
+        merged.update(shard_data)
+    assert merged == json.loads(json.dumps(data))
+
+
+def test_save_agg_repo_comparison_shards_deletes_previous_shard_count():
+    s3_client = FakeS3Client()
+    data = {repo_id: {"name": f"repo{repo_id}", "history": [{"date": "2023-01", "stars": repo_id}]} for repo_id in range(20)}
+    save_agg_repo_comparison_shards(s3_client, make_shard_settings(4), "weekly", data)
+    save_agg_repo_comparison_shards(s3_client, make_shard_settings(4), "weekly", data)
+    assert len(s3_client.objects) == 5
+
+    save_agg_repo_comparison_shards(s3_client, make_shard_settings(2), "weekly", data)
+
+    assert json.loads(s3_client.objects["shards/weekly/index.json"])["shard_count"] == 2
+    assert sorted(s3_client.objects) == [
+        "shards/weekly/index.json", "shards/weekly/shard_0000_of_0002.json", "shards/weekly/shard_0001_of_0002.json"
+    ]
@@ -0,0 +1,107 @@
+import gzip
+import json
+from datetime import date
+
+from dts_utils.s3_utils import (
+    get_all_objects, get_dated_objects, get_month_prefixes, get_months, iter_mapped_objects, iter_object_bodies, save_data_to_s3
+)
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+
+
+def make_client() -> FakeS3Client:
+    keys = [
+        "github_data/",
+        "github_data/2024/12/30/repos.parquet",
+        "github_data/2025/01/06/repo_counts.json",
+        "github_data/2025/01/06/repos.parquet",
+        "github_data/2025/01/14/repos.parquet",
+        "github_data/2025/02/03/repos.parquet",
+        "github_data/2025/03/01/repos.parquet",
+    ]
+    return FakeS3Client({key: b"data" for key in keys})
+
+
+def test_get_all_objects_paginates_and_drops_folder_keys():
+    s3_client = make_client()
+
+    objects = get_all_objects(s3_client, "bucket", "github_data")
+
+    assert [obj["Key"] for obj in objects] == sorted(s3_client.objects)[1:]
+    assert set(objects[0]) == {"Key", "ETag", "Size"}
+
+
+def test_get_months():
+    assert get_months(date(2024, 11, 5), date(2025, 1, 1)) == [(2024, 11), (2024, 12), (2025, 1)]
+
+
+def test_get_month_prefixes():
+    assert get_month_prefixes("github_data", date(2024, 11, 20), date(2025, 2, 1)) == [
+        "github_data/2024/11/", "github_data/2024/12/", "github_data/2025/01/", "github_data/2025/02/"
+    ]
+
+
+def test_get_dated_objects_without_start_date_lists_everything():
+    s3_client = make_client()
+
+    objects = get_dated_objects(s3_client, "bucket", "github_data", end_date=date(2025, 3, 1))
+
+    assert [obj["Key"] for obj in objects] == sorted(s3_client.objects)[1:]
+
+
+def test_get_dated_objects_prunes_by_date_range():
+    s3_client = make_client()
+
+    objects = get_dated_objects(s3_client, "bucket", "github_data", start_date=date(2025, 1, 14), end_date=date(2025, 2, 28))
+
+    assert [obj["Key"] for obj in objects] == ["github_data/2025/01/14/repos.parquet", "github_data/2025/02/03/repos.parquet"]
+    assert sorted(call["Prefix"] for call in s3_client.list_calls) == ["github_data/2025/01/", "github_data/2025/02/"]
+
+
+def test_iter_mapped_objects_reads_all_keys():
+    s3_client = FakeS3Client({f"key_{i}": f"body_{i}".encode() for i in range(20)})
+
+    def read_body(key: str) -> bytes:
+        return s3_client.get_object(Bucket="bucket", Key=key)["Body"].read()
+
+    bodies = dict(iter_mapped_objects(read_body, list(s3_client.objects), max_workers=4))
+
+    assert bodies == s3_client.objects
+    assert sorted(s3_client.get_calls) == sorted(s3_client.objects)
+    assert list(iter_mapped_objects(read_body, [])) == []
+
+
+def test_iter_object_bodies_fetches_all_keys():
+    s3_client = FakeS3Client({f"key_{i}": f"body_{i}".encode() for i in range(20)})
+
+    bodies = dict(iter_object_bodies(s3_client, "bucket", list(s3_client.objects), max_workers=4))
+
+    assert bodies == s3_client.objects
+    assert sorted(s3_client.get_calls) == sorted(s3_client.objects)
+    assert list(iter_object_bodies(s3_client, "bucket", [])) == []
+
+
+def test_save_data_to_s3_writes_pre_compressed_variants():
+    s3_client = FakeS3Client()
+    data = {"2025-01": [1, 2, 3]}
+
+    save_data_to_s3(s3_client, "bucket", "out/weekly.json", data, encodings=["gzip"])
+
+    assert json.loads(s3_client.objects["out/weekly.json"]) == data
+    assert gzip.decompress(s3_client.objects["out/weekly.json.gz"]) == s3_client.objects["out/weekly.json"]
+    assert s3_client.put_params["out/weekly.json.gz"] == {"ContentType": "application/json", "ContentEncoding": "gzip"}
+
+
+def test_save_data_to_s3_deletes_variants_that_were_not_written():
+    s3_client = FakeS3Client({"out/weekly.json.gz": b"stale", "out/weekly.json.br": b"stale"})
+
+    save_data_to_s3(s3_client, "bucket", "out/weekly.json", {"a": 1}, encodings=[])
+
+    assert list(s3_client.objects) == ["out/weekly.json"]
+
+
+def test_save_data_to_s3_without_encodings_leaves_other_objects_alone():
+    s3_client = FakeS3Client({"out/weekly.json.gz": b"unrelated"})
+
+    save_data_to_s3(s3_client, "bucket", "out/weekly.json", {"a": 1})
+
+    assert sorted(s3_client.objects) == ["out/weekly.json", "out/weekly.json.gz"]
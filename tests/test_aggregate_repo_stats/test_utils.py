@@ -1,9 +1,13 @@
 from datetime import datetime
+from io import BytesIO
+
+import pandas as pd
 
 from aggregate.agg_core.utils import (
     get_date_from_key, group_keys_by_interval, pick_latest_key_per_period,
-    get_latest_date_key, get_iso_year_week
+    get_latest_date_key, get_iso_year_week, read_parquet_columns, get_period, get_period_start_date
 )
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
 
 def test_get_date_from_key():
     key = "prefix/2025/11/28/object.json"
@@ -130,4 +134,47 @@ def test_get_latest_date_key_mixed_dates():
         "prefix/2024/01/01/data.json",
         "prefix/2022/01/01/data.json"
     ]
-    assert get_latest_date_key(keys, "data.json") == "prefix/2024/01/01/data.json"
\ No newline at end of file
+    assert get_latest_date_key(keys, "data.json") == "prefix/2024/01/01/data.json"
+
+def test_read_parquet_columns_only_downloads_needed_columns():
+    df = pd.DataFrame({
+        "id": range(20_000),
+        "name": [f"repo-{i}" for i in range(20_000)],
+        "stars": range(20_000),
+        "topics": [[f"topic-{i}", f"other-{i}"] for i in range(20_000)],
+        "languages_url": [f"https://api.github.com/repos/owner/repo-{i}/languages" for i in range(20_000)],
+    })
+    buffer = BytesIO()
+    df.to_parquet(buffer)
+    s3_client = FakeS3Client({"github_data/2025/01/01/repos.parquet": buffer.getvalue()})
+
+    result = read_parquet_columns(s3_client, "bucket", "github_data/2025/01/01/repos.parquet", ["id", "stars"], footer_read_size=4096)
+
+    pd.testing.assert_frame_equal(result, df[["id", "stars"]])
+    assert s3_client.bytes_sent < len(buffer.getvalue()) / 2
+
+
+def test_read_parquet_columns_small_object_single_request():
+    df = pd.DataFrame({"id": [1, 2], "main_language": ["Python", "Go"]})
+    buffer = BytesIO()
+    df.to_parquet(buffer)
+    s3_client = FakeS3Client({"repos.parquet": buffer.getvalue()})
+
+    result = read_parquet_columns(s3_client, "bucket", "repos.parquet", ["main_language"])
+
+    pd.testing.assert_frame_equal(result, df[["main_language"]])
+    assert s3_client.get_calls == ["repos.parquet"]
+
+
+def test_get_period_and_start_date():
+    day = datetime(2025, 11, 28).date()
+    expected = {
+        "daily": ("2025-11-28", datetime(2025, 11, 28).date()),
+        "weekly": ("2025-W48", datetime(2025, 11, 24).date()),
+        "monthly": ("2025-11", datetime(2025, 11, 1).date()),
+        "quarterly": ("2025-Q4", datetime(2025, 10, 1).date()),
+        "yearly": ("2025", datetime(2025, 1, 1).date()),
+    }
+    for interval, (period, start_date) in expected.items():
+        assert get_period(day, interval) == period
+        assert get_period_start_date(period, interval) == start_date
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from extract.extract_core.checkpoint import CheckpointStore
+from extract.extract_core.utils import get_run_datetime
+
+
+def test_checkpoint_keys():
+    checkpoints = CheckpointStore(s3_client=None, bucket="bucket", prefix="checkpoints/2025/01/02/")
+
+    assert checkpoints.get_topic_key("data-engineering") == "checkpoints/2025/01/02/topics/data-engineering.json"
+    assert checkpoints.get_topic_key("a/b c") == "checkpoints/2025/01/02/topics/a%2Fb%20c.json"
+    assert checkpoints.get_language_batch_key(3) == "checkpoints/2025/01/02/languages/batch_00003.json"
+
+
+def test_get_run_datetime():
+    assert get_run_datetime({"run_date": "2025-01-02"}) == datetime(2025, 1, 2)
+    assert get_run_datetime(None).date() == datetime.now().date()
@@ -0,0 +1,55 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from extract.extract_core.client import GitHubClient
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    authorization_headers = []
+
+    def do_GET(self):
+        self.authorization_headers.append(self.headers["Authorization"])
+        body = b'{"Python": 100}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_settings() -> SimpleNamespace:
+    return SimpleNamespace(
+        get_github_api_tokens=lambda: ["token"], http_pool_size=4, connect_timeout=1.0, read_timeout=1.0,
+        search_requests_per_minute=30, core_requests_per_second=100.0, graphql_requests_per_second=100.0,
+        secondary_rate_limit_cooldown=1.0
+    )
+
+
+def test_github_client_session_headers():
+    client = GitHubClient(make_settings())
+
+    assert "Authorization" not in client.session.headers
+    assert client.session.headers["Accept-Encoding"] == "gzip"
+    assert client.get_connection_stats() == {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+
+def test_github_client_reuses_connections():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JSONHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GitHubClient(make_settings())
+    client.session.mount("http://", client.session.get_adapter("https://"))
+    url = f"http://127.0.0.1:{server.server_address[1]}/repos/owner/repo/languages"
+
+    try:
+        for _ in range(3):
+            assert client.get(url).json() == {"Python": 100}
+        assert client.get_connection_stats() == {"requests": 3, "new_connections": 1, "reused_connections": 2}
+        assert JSONHandler.authorization_headers == ["Bearer token"] * 3
+    finally:
+        client.close()
+        server.shutdown()
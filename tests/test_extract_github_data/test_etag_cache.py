@@ -0,0 +1,86 @@
+import json
+
+import requests
+
+from dts_utils.s3_utils import get_json_object
+from extract.extract_core.etag_cache import ETagCache, load_etag_cache, merge_etag_caches, save_etag_cache
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+
+
+def make_response(status_code: int, headers: dict | None = None, body: dict | None = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = json.dumps(body).encode() if body is not None else b""
+    return response
+
+
+def test_get_conditional_headers():
+    cache = ETagCache({
+        "url-1": {"etag": 'W/"abc"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT", "body": {}},
+        "url-2": {"etag": '"def"', "last_modified": None, "body": {}}
+    })
+
+    assert cache.get_conditional_headers("url-1") == {
+        "If-None-Match": 'W/"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"
+    }
+    assert cache.get_conditional_headers("url-2") == {"If-None-Match": '"def"'}
+    assert cache.get_conditional_headers("missing") == {}
+
+
+def test_resolve_not_modified_reuses_cached_body():
+    cache = ETagCache({"url": {"etag": '"abc"', "last_modified": None, "body": {"Python": 100}}})
+
+    assert cache.resolve("url", make_response(304)) == {"Python": 100}
+    assert cache.hits == 1
+    assert cache.misses == 0
+
+
+def test_resolve_modified_stores_new_body():
+    cache = ETagCache({"url": {"etag": '"abc"', "last_modified": None, "body": {"Python": 100}}})
+    response = make_response(200, {"ETag": '"def"'}, {"Python": 150})
+
+    assert cache.resolve("url", response) == {"Python": 150}
+    assert cache.entries["url"] == {"etag": '"def"', "last_modified": None, "body": {"Python": 150}}
+    assert cache.misses == 1
+
+
+def test_to_dict_drops_unused_entries():
+    cache = ETagCache({
+        "used": {"etag": '"abc"', "last_modified": None, "body": {"Go": 1}},
+        "unused": {"etag": '"def"', "last_modified": None, "body": {"Rust": 1}}
+    })
+    cache.resolve("used", make_response(304))
+
+    assert list(cache.to_dict()) == ["used"]
+
+
+def run_shards(s3_client: FakeS3Client, urls_per_shard: list[list[str]]) -> None:
+    """Every shard resolves its URLs against the shared cache, then the caches are merged like the merge stage."""
+    shard_paths = [f"shards/shard_{index}_etag_cache.json" for index in range(len(urls_per_shard))]
+    for shard_path, urls in zip(shard_paths, urls_per_shard):
+        cache = load_etag_cache(s3_client, "bucket", "languages_etag_cache.json")
+        for url in urls:
+            cache.resolve(url, make_response(304) if url in cache.entries else make_response(200, {"ETag": f'"{url}"'}, {"Go": 1}))
+        save_etag_cache(s3_client, "bucket", shard_path, cache)
+    merge_etag_caches(s3_client, "bucket", shard_paths, "languages_etag_cache.json")
+
+
+def test_merged_cache_survives_shard_count_change():
+    s3_client = FakeS3Client()
+    run_shards(s3_client, [["url-1", "url-2"], ["url-3"]])
+    assert sorted(get_json_object(s3_client, "bucket", "languages_etag_cache.json")) == ["url-1", "url-2", "url-3"]
+
+    # The queries move between shards, every URL is still answered from the shared cache
+    cache = load_etag_cache(s3_client, "bucket", "languages_etag_cache.json")
+    assert all(cache.get_conditional_headers(url) for url in ["url-1", "url-2", "url-3"])
+    run_shards(s3_client, [["url-1"], ["url-2"], ["url-3"]])
+    assert sorted(get_json_object(s3_client, "bucket", "languages_etag_cache.json")) == ["url-1", "url-2", "url-3"]
+
+
+def test_merge_etag_caches_keeps_shared_cache_without_shard_caches():
+    s3_client = FakeS3Client({"languages_etag_cache.json": json.dumps({"url": {"etag": '"abc"', "body": {}}}).encode()})
+
+    merge_etag_caches(s3_client, "bucket", ["shards/shard_0_etag_cache.json"], "languages_etag_cache.json")
+
+    assert list(get_json_object(s3_client, "bucket", "languages_etag_cache.json")) == ["url"]
@@ -0,0 +1,84 @@
+import time
+from types import SimpleNamespace
+
+from extract.extract_core import extract
+from dts_utils.s3_utils import get_json_object
+from extract.extract_core.etag_cache import ETagCache, save_etag_cache
+from test_aggregate_repo_stats.fake_s3 import FakeS3Client
+
+
+def test_fetch_language_data_keeps_order(monkeypatch):
+    def fake_get_languages(languages_url, settings, client, etag_cache=None):
+        # Earlier repos finish later to force out of order completion
+        repo_id = int(languages_url.split("/")[-1])
+        time.sleep((5 - repo_id) * 0.01)
+        return {"Python": repo_id}
+
+    monkeypatch.setattr(extract, "get_languages", fake_get_languages)
+    settings = SimpleNamespace(language_fetch_workers=5, language_batch_size=2)
+    repo_data = [{"id": i, "name": f"repo-{i}", "languages_url": f"http://api/{i}"} for i in range(5)]
+
+    result = extract.fetch_language_data(repo_data, settings, client=None)
+
+    assert [row["repo_id"] for row in result] == [0, 1, 2, 3, 4]
+    assert result[3] == {"repo_id": 3, "repo_name": "repo-3", "languages": {"Python": 3}}
+
+
+class FakeCheckpointStore:
+    def __init__(self, language_batches: dict[int, list[dict]] | None = None):
+        self.language_batches = language_batches or {}
+        self.saved_batches = []
+
+    def load_language_batch(self, batch_index):
+        return self.language_batches.get(batch_index)
+
+    def save_language_batch(self, batch_index, language_data):
+        self.saved_batches.append(batch_index)
+        self.language_batches[batch_index] = language_data
+
+
+def test_fetch_language_data_resumes_from_checkpoints(monkeypatch):
+    fetched_urls = []
+
+    def fake_get_languages(languages_url, settings, client, etag_cache=None):
+        fetched_urls.append(languages_url)
+        return {"Python": 1}
+
+    monkeypatch.setattr(extract, "get_languages", fake_get_languages)
+    settings = SimpleNamespace(language_fetch_workers=2, language_batch_size=2)
+    repo_data = [{"id": i, "name": f"repo-{i}", "languages_url": f"http://api/{i}"} for i in range(5)]
+    checkpoints = FakeCheckpointStore({
+        0: [{"repo_id": 0, "repo_name": "repo-0", "languages": {"Go": 1}},
+            {"repo_id": 1, "repo_name": "repo-1", "languages": {"Go": 1}}],
+        # Checkpoint of different repos is ignored
+        1: [{"repo_id": 9, "repo_name": "repo-9", "languages": {"Go": 1}}]
+    })
+
+    result = extract.fetch_language_data(repo_data, settings, client=None, checkpoints=checkpoints)
+
+    assert [row["repo_id"] for row in result] == [0, 1, 2, 3, 4]
+    assert result[0]["languages"] == {"Go": 1}
+    assert fetched_urls == ["http://api/2", "http://api/3", "http://api/4"]
+    assert checkpoints.saved_batches == [1, 2]
+
+
+def test_resumed_batches_keep_their_etag_cache_entries(monkeypatch):
+    def fake_get_languages(languages_url, settings, client, etag_cache=None):
+        etag_cache.used_urls.add(languages_url)
+        return {"Python": 1}
+
+    monkeypatch.setattr(extract, "get_languages", fake_get_languages)
+    settings = SimpleNamespace(language_fetch_workers=2, language_batch_size=2)
+    repo_data = [{"id": i, "name": f"repo-{i}", "languages_url": f"http://api/{i}"} for i in range(3)]
+    etag_cache = ETagCache({f"http://api/{i}": {"etag": f'"{i}"', "last_modified": None, "body": {"Go": 1}} for i in range(4)})
+    checkpoints = FakeCheckpointStore({
+        0: [{"repo_id": 0, "repo_name": "repo-0", "languages": {"Go": 1}},
+            {"repo_id": 1, "repo_name": "repo-1", "languages": {"Go": 1}}],
+    })
+
+    extract.fetch_language_data(repo_data, settings, client=None, etag_cache=etag_cache, checkpoints=checkpoints)
+    s3_client = FakeS3Client()
+    save_etag_cache(s3_client, "bucket", "languages_etag_cache.json", etag_cache)
+
+    saved = get_json_object(s3_client, "bucket", "languages_etag_cache.json")
+    assert sorted(saved) == ["http://api/0", "http://api/1", "http://api/2"]
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from extract.extract_core import extract
+
+
+def make_item(repo_id: int) -> dict:
+    return {
+        "id": repo_id, "name": f"repo-{repo_id}", "languages_url": "", "size": 1, "stargazers_count": 1,
+        "language": "Python", "forks_count": 0, "license": None, "open_issues_count": 0, "topics": []
+    }
+
+
+def test_is_last_page():
+    # Short page
+    assert extract.is_last_page(page_items=40, fetched_items=140, total_count=5000, results_per_page=100)
+    # Total count used up
+    assert extract.is_last_page(page_items=100, fetched_items=200, total_count=200, results_per_page=100)
+    # Search API result cap
+    assert extract.is_last_page(page_items=100, fetched_items=1000, total_count=5000, results_per_page=100)
+    assert not extract.is_last_page(page_items=100, fetched_items=200, total_count=5000, results_per_page=100)
+
+
+def test_fetch_repos_per_topic_stops_after_last_result(monkeypatch):
+    requested_pages = []
+
+    def fake_get_repos_from_page(topic, page, settings, client):
+        requested_pages.append(page)
+        ids = range((page - 1) * 2, min(page * 2, 3))
+        return {"total_count": 3, "items": [make_item(repo_id) for repo_id in ids]}
+
+    monkeypatch.setattr(extract, "get_repos_from_page", fake_get_repos_from_page)
+    settings = SimpleNamespace(pages_per_topic=10, results_per_page=2)
+
+    repo_data, repo_counts = extract.fetch_repos_per_topic("etl", settings, client=None)
+
+    assert requested_pages == [1, 2]
+    assert [repo["id"] for repo in repo_data] == [0, 1, 2]
+    assert repo_counts == 3
+
+
+def test_get_all_repos_data_keeps_topic_order(monkeypatch):
+    def fake_fetch_repos_per_topic(topic, settings, client):
+        return [{"id": topic}], len(topic)
+
+    monkeypatch.setattr(extract, "fetch_repos_per_topic", fake_fetch_repos_per_topic)
+    settings = SimpleNamespace(topic_fetch_workers=3)
+
+    repos_data, repo_counts = extract.get_all_repos_data(["etl", "dbt", "airflow"], settings, client=None)
+
+    assert [repo["id"] for repo in repos_data] == ["etl", "dbt", "airflow"]
+    assert list(repo_counts.items()) == [("etl", 3), ("dbt", 3), ("airflow", 7)]
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+from extract.extract_core.extract import parse_repo_data
+from extract.extract_core.graphql import to_rest_repo_item, get_language_dict, get_node_languages, get_all_repos_data_graphql
+
+
+def make_node(repo_id: int, languages: dict[str, int] | None = None, more_languages: bool = False) -> dict:
+    node = {
+        "databaseId": repo_id,
+        "name": f"repo-{repo_id}",
+        "nameWithOwner": f"owner/repo-{repo_id}",
+        "diskUsage": 123,
+        "stargazerCount": 10,
+        "forkCount": 2,
+        "primaryLanguage": {"name": "Python"},
+        "licenseInfo": {"spdxId": "MIT"},
+        "issues": {"totalCount": 3},
+        "pullRequests": {"totalCount": 1},
+        "repositoryTopics": {"nodes": [{"topic": {"name": "etl"}}, {"topic": {"name": "data"}}]}
+    }
+    if languages is not None:
+        node["languages"] = {
+            "pageInfo": {"hasNextPage": more_languages},
+            "edges": [{"size": size, "node": {"name": name}} for name, size in languages.items()]
+        }
+    return node
+
+
+class FakeClient:
+    def __init__(self, pages: dict[str, list[dict]], rest_languages: dict[str, dict[str, int]] | None = None):
+        self.pages = pages
+        self.rest_languages = rest_languages or {}
+        self.calls = []
+        self.get_calls = []
+
+    def get(self, url, resource="core", headers=None):
+        self.get_calls.append(url)
+        return SimpleNamespace(json=lambda: self.rest_languages[url])
+
+    def post_graphql(self, query, variables):
+        self.calls.append(variables)
+        topic = variables["query"].split()[0].removeprefix("topic:")
+        return {"search": self.pages[topic][len([c for c in self.calls if c["query"] == variables["query"]]) - 1]}
+
+
+def test_to_rest_repo_item_matches_rest_parsing():
+    rest_item = {
+        "id": 1,
+        "name": "repo-1",
+        "languages_url": "https://api.github.com/repos/owner/repo-1/languages",
+        "size": 123,
+        "stargazers_count": 10,
+        "watchers_count": 10,
+        "language": "Python",
+        "forks_count": 2,
+        "license": {"key": "mit", "spdx_id": "MIT"},
+        "open_issues_count": 4,
+        "topics": ["etl", "data"]
+    }
+
+    assert parse_repo_data([to_rest_repo_item(make_node(1))], "etl") == parse_repo_data([rest_item], "etl")
+
+
+def test_to_rest_repo_item_missing_license_and_language():
+    node = make_node(1)
+    node["licenseInfo"] = None
+    node["primaryLanguage"] = None
+
+    parsed = parse_repo_data([to_rest_repo_item(node)], "etl")[0]
+
+    assert parsed["license"] == ""
+    assert parsed["main_language"] is None
+
+
+def test_get_language_dict():
+    node = make_node(1, {"Python": 1500, "Shell": 20})
+    assert get_language_dict(node) == {"Python": 1500, "Shell": 20}
+
+
+def test_get_node_languages_falls_back_to_rest_beyond_first_page():
+    url = "https://api.github.com/repos/owner/repo-1/languages"
+    all_languages = {f"Language-{i}": 1000 - i for i in range(101)}
+    client = FakeClient({}, rest_languages={url: all_languages})
+
+    assert get_node_languages(make_node(2, {"Python": 10}), None, client) == {"Python": 10}
+    assert client.get_calls == []
+    node = make_node(1, dict(list(all_languages.items())[:100]), more_languages=True)
+    assert get_node_languages(node, None, client) == all_languages
+    assert client.get_calls == [url]
+
+
+def test_get_all_repos_data_graphql():
+    settings = SimpleNamespace(pages_per_topic=2, results_per_page=2, languages_per_topic=1, topic_fetch_workers=2)
+    client = FakeClient({
+        "etl": [
+            {"repositoryCount": 3, "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+             "nodes": [make_node(1, {"Python": 10}), make_node(2, {"Go": 5})]},
+            {"repositoryCount": 3, "pageInfo": {"hasNextPage": False, "endCursor": "c2"},
+             "nodes": [make_node(3)]}
+        ],
+        "data": [
+            {"repositoryCount": 1, "pageInfo": {"hasNextPage": False, "endCursor": "c3"},
+             "nodes": [make_node(1, {"Python": 10})]}
+        ]
+    })
+
+    repos_data, repo_counts, language_data = get_all_repos_data_graphql(["etl", "data"], settings, client)
+
+    assert [repo["id"] for repo in repos_data] == [1, 2, 3, 1]
+    assert repo_counts == {"etl": 3, "data": 1}
+    assert language_data == [{"repo_id": 1, "repo_name": "repo-1", "languages": {"Python": 10}}]
+    assert [(call["first"], call["after"], call["withLanguages"]) for call in client.calls] == [
+        (4, None, True), (2, "c1", False), (4, None, True)
+    ]
@@ -0,0 +1,270 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from extract.extract_core import rate_limit
+from extract.extract_core.client import GitHubClient
+from extract.extract_core.utils import make_request
+from extract.extract_core.rate_limit import (
+    get_retry_after, is_secondary_rate_limited, is_retryable, get_backoff_delay, RateLimitQuota, TokenBucket,
+    TokenPool, RequestScheduler
+)
+
+
+class FakeClock:
+    """Stands in for the time module, sleeping advances the clock instead of blocking."""
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds == float("inf"):
+            # time.sleep raises OverflowError too
+            raise OverflowError("Sleeping forever")
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def make_scheduler(tokens: list[str] | None = None, cooldown: float = 60.0, concurrent_runs: int = 1) -> RequestScheduler:
+    return RequestScheduler(SimpleNamespace(
+        get_github_api_tokens=lambda: tokens or ["token-1"],
+        search_requests_per_minute=30,
+        core_requests_per_second=10.0,
+        graphql_requests_per_second=10.0,
+        secondary_rate_limit_cooldown=cooldown,
+    ), concurrent_runs=concurrent_runs)
+
+
+def make_response(status_code: int, headers: dict | None = None, text: str = "") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = text.encode()
+    return response
+
+
+def test_get_retry_after():
+    assert get_retry_after(make_response(403, {"Retry-After": "60"})) == 60.0
+    assert get_retry_after(make_response(403)) is None
+    assert get_retry_after(make_response(403, {"Retry-After": "invalid"})) is None
+
+
+def test_is_secondary_rate_limited():
+    assert is_secondary_rate_limited(make_response(429, {"Retry-After": "30"}))
+    assert is_secondary_rate_limited(make_response(403, text="You have exceeded a secondary rate limit."))
+    assert not is_secondary_rate_limited(make_response(403, text="Bad credentials"))
+    assert not is_secondary_rate_limited(make_response(500, {"Retry-After": "30"}))
+
+
+def test_is_retryable():
+    assert is_retryable(make_response(502))
+    assert is_retryable(make_response(429, {"Retry-After": "1"}))
+    assert is_retryable(make_response(429))
+    assert is_retryable(make_response(403, {"X-RateLimit-Remaining": "0"}))
+    assert not is_retryable(make_response(403, {"X-RateLimit-Remaining": "10"}, text="Forbidden"))
+    assert not is_retryable(make_response(404))
+    assert not is_retryable(make_response(422))
+
+
+def test_get_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= get_backoff_delay(attempt, base_delay=1.0, max_delay=8.0) <= 8.0
+
+
+def test_rate_limit_quota_update():
+    quota = RateLimitQuota()
+    assert quota.seconds_until_available(now=100.0) == 0.0
+
+    quota.update({"X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})
+
+    assert quota.limit == 30
+    assert quota.remaining == 0
+    assert quota.seconds_until_available(now=100.0) == 60.0
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert 0.9 < bucket.reserve() <= 1.0
+
+
+def test_token_pool_selects_token_with_most_headroom():
+    pool = TokenPool(["token-1", "token-2"], ["core"])
+    pool.quotas["token-1"]["core"].update({"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "60"})
+    pool.quotas["token-2"]["core"].update({"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "60"})
+
+    assert pool.select("core", now=0.0, monotonic_now=0.0) == ("token-2", 0.0)
+
+
+def test_token_pool_tries_unknown_tokens_first():
+    pool = TokenPool(["token-1", "token-2"], ["core"])
+    pool.quotas["token-1"]["core"].update({"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "60"})
+
+    assert pool.select("core", now=0.0, monotonic_now=0.0) == ("token-2", 0.0)
+
+
+def test_token_pool_skips_exhausted_and_paused_tokens():
+    pool = TokenPool(["token-1", "token-2", "token-3"], ["search"])
+    pool.quotas["token-1"]["search"].update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "130"})
+    pool.quotas["token-2"]["search"].update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})
+    pool.quotas["token-3"]["search"].update({"X-RateLimit-Remaining": "30", "X-RateLimit-Reset": "160"})
+    pool.paused_until["token-3"] = 50.0
+
+    assert pool.select("search", now=100.0, monotonic_now=0.0) == (None, 30.0)
+    assert pool.select("search", now=100.0, monotonic_now=60.0) == ("token-3", 0.0)
+
+
+def test_rate_limit_quota_expires_after_reset():
+    quota = RateLimitQuota()
+    quota.update({"X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "160"})
+
+    assert quota.seconds_until_available(now=160.0) == 0.0
+    assert quota.remaining is None
+
+
+def test_token_pool_raises_instead_of_waiting_forever():
+    pool = TokenPool(["token-1"], ["search"])
+    pool.tokens.clear()
+
+    with pytest.raises(Exception, match="No GitHub API token"):
+        pool.select("search", now=0.0, monotonic_now=0.0)
+
+
+def test_scheduler_acquire_across_quota_reset(clock):
+    scheduler = make_scheduler()
+    scheduler.update("search", make_response(200, {
+        "X-RateLimit-Resource": "search", "X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1050"
+    }), "token-1")
+
+    # Waits for the reset, then keeps handing out the token while the new quota is unknown
+    assert scheduler.acquire("search") == "token-1"
+    assert clock.now == 1050.0
+    assert scheduler.acquire("search") == "token-1"
+    assert scheduler.acquire("search") == "token-1"
+    assert clock.sleeps == [50.0]
+
+
+def test_scheduler_splits_rates_between_concurrent_runs():
+    scheduler = make_scheduler(["token-1", "token-2"])
+    shard_scheduler = make_scheduler(["token-1", "token-2"], concurrent_runs=4)
+
+    for resource in ["search", "core", "graphql"]:
+        assert shard_scheduler.buckets[resource].rate == pytest.approx(scheduler.buckets[resource].rate / 4)
+    assert shard_scheduler.buckets["search"].capacity == 15
+
+
+class FakeSession:
+    """Returns the queued responses in order and records the requests."""
+    def __init__(self, responses: list[requests.Response]):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        self.requests.append({"method": method, "url": url, "headers": headers})
+        return self.responses.pop(0)
+
+
+def test_make_request_fails_fast_on_client_error(clock):
+    session = FakeSession([make_response(404, text="Not Found")])
+
+    with pytest.raises(Exception, match="status code 404"):
+        make_request("GET", "https://api.github.com/repos/a/b", session, make_scheduler())
+
+    assert len(session.requests) == 1
+    assert session.requests[0]["headers"]["Authorization"] == "Bearer token-1"
+
+
+def test_make_request_retries_server_errors(clock):
+    session = FakeSession([make_response(502), make_response(200, text="{}")])
+
+    response = make_request("GET", "https://api.github.com/repos/a/b", session, make_scheduler())
+
+    assert response.status_code == 200
+    assert len(session.requests) == 2
+    # One backoff sleep between the attempts
+    assert len(clock.sleeps) == 1 and 0 <= clock.sleeps[0] <= 1.0
+
+
+def test_make_request_backs_off_on_too_many_requests(clock):
+    session = FakeSession([make_response(429, text="Too Many Requests"), make_response(200, text="{}")])
+
+    response = make_request("GET", "https://api.github.com/repos/a/b", session, make_scheduler())
+
+    assert response.status_code == 200
+    assert len(session.requests) == 2
+    assert len(clock.sleeps) == 1 and 0 <= clock.sleeps[0] <= 1.0
+
+
+def test_make_request_honors_retry_after(clock):
+    session = FakeSession([make_response(403, {"Retry-After": "30"}), make_response(200, text="{}")])
+
+    response = make_request("GET", "https://api.github.com/search/repositories", session, make_scheduler(), resource="search")
+
+    assert response.status_code == 200
+    assert clock.sleeps == [30.0]
+
+
+def test_make_request_waits_for_primary_rate_limit_reset(clock):
+    exhausted = make_response(403, {
+        "X-RateLimit-Resource": "core", "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1120"
+    }, text="API rate limit exceeded")
+    session = FakeSession([exhausted, make_response(200, text="{}")])
+
+    response = make_request("GET", "https://api.github.com/repos/a/b", session, make_scheduler())
+
+    assert response.status_code == 200
+    assert clock.sleeps == [120.0]
+    assert clock.now == 1120.0
+
+
+def test_make_request_gives_up_after_max_retries(clock):
+    session = FakeSession([make_response(503) for _ in range(3)])
+
+    with pytest.raises(Exception, match="Max retries"):
+        make_request("GET", "https://api.github.com/repos/a/b", session, make_scheduler(), max_retries=2)
+
+    assert len(session.requests) == 3
+
+
+def make_graphql_client(session: FakeSession) -> GitHubClient:
+    client = GitHubClient(SimpleNamespace(http_pool_size=1, connect_timeout=1.0, read_timeout=1.0), make_scheduler())
+    client.session = session
+    return client
+
+
+def test_post_graphql_waits_for_rate_limit_reset(clock):
+    rate_limited = make_response(200, {
+        "X-RateLimit-Resource": "graphql", "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1300"
+    }, text='{"data": null, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}')
+    session = FakeSession([rate_limited, make_response(200, text='{"data": {"search": {}}}')])
+
+    assert make_graphql_client(session).post_graphql("query", {}) == {"search": {}}
+    assert len(session.requests) == 2
+    assert clock.sleeps == [300.0]
+
+
+def test_post_graphql_backs_off_without_exhausted_quota(clock):
+    rate_limited = make_response(200, text='{"errors": [{"type": "RATE_LIMITED", "message": "Slow down"}]}')
+    session = FakeSession([rate_limited, rate_limited, make_response(200, text='{"data": {"search": {}}}')])
+
+    assert make_graphql_client(session).post_graphql("query", {}) == {"search": {}}
+    assert len(clock.sleeps) == 2
+
+    with pytest.raises(Exception, match="Max retries"):
+        make_graphql_client(FakeSession([rate_limited, rate_limited])).post_graphql("query", {}, max_retries=1)
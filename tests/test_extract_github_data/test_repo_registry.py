@@ -1,5 +1,7 @@
 from datetime import datetime
-from extract.extract_core.repo_registry import upsert_repo_registry
+from extract.extract_core.repo_registry import (
+    upsert_repo_registry, upsert_repo_registry_table, registry_dict_to_table, registry_table_to_dict, REGISTRY_SCHEMA
+)
 
 
 def test_upsert_repo_registry_new_repo():
@@ -57,4 +59,48 @@ def test_upsert_repo_registry_mixed():
     assert updated_registry["1"]["last_seen"] == expected_date_str
     assert "2" in updated_registry
     assert updated_registry["2"]["first_seen"] == expected_date_str
-    assert updated_registry["2"]["last_seen"] == expected_date_str
\ No newline at end of file
+    assert updated_registry["2"]["last_seen"] == expected_date_str
+
+def test_upsert_repo_registry_does_not_mutate_input():
+    run_date = datetime(2024, 2, 1)
+    repos = [{"id": 1, "name": "existing-repo"}]
+    registry = {
+        "1": {
+            "name": "existing-repo",
+            "first_seen": "2024-01-01",
+            "last_seen": "2024-01-01"
+        }
+    }
+
+    upsert_repo_registry(run_date, repos, registry)
+
+    assert registry["1"]["last_seen"] == "2024-01-01"
+
+
+def test_upsert_repo_registry_table_matches_dict_upsert():
+    run_date = datetime(2024, 3, 1)
+    repos = [
+        {"id": 1, "name": "existing-repo"},
+        {"id": 3, "name": "new-repo"}
+    ]
+    registry = {
+        "1": {"name": "existing-repo", "first_seen": "2024-01-01", "last_seen": "2024-01-01"},
+        "2": {"name": "unseen-repo", "first_seen": "2024-01-01", "last_seen": "2024-02-01"}
+    }
+
+    updated_table = upsert_repo_registry_table(run_date, repos, registry_dict_to_table(registry))
+
+    assert updated_table.schema == REGISTRY_SCHEMA
+    assert updated_table["id"].to_pylist() == [1, 2, 3]
+    assert registry_table_to_dict(updated_table) == upsert_repo_registry(run_date, repos, registry)
+
+
+def test_upsert_repo_registry_table_empty_registry():
+    run_date = datetime(2024, 1, 1)
+    repos = [{"id": 1, "name": "new-repo"}]
+
+    updated_table = upsert_repo_registry_table(run_date, repos, registry_dict_to_table({}))
+
+    assert registry_table_to_dict(updated_table) == {
+        "1": {"name": "new-repo", "first_seen": "2024-01-01", "last_seen": "2024-01-01"}
+    }
@@ -0,0 +1,48 @@
+from extract.extract_core.extract import keep_n_repos_per_topic, deduplicate_repo_data
+from extract.extract_core.sharding import split_into_shards, get_shard_name, merge_shard_results
+
+
+def test_split_into_shards():
+    queries = ["a", "b", "c", "d", "e"]
+
+    assert split_into_shards(queries, 2) == [["a", "b", "c"], ["d", "e"]]
+    assert split_into_shards(queries, 1) == [queries]
+    assert split_into_shards(["a"], 3) == [["a"], [], []]
+
+
+def test_get_shard_name():
+    assert get_shard_name(2, 10) == "shard_002_of_010"
+
+
+def get_language_data(repo_data: list[dict]) -> list[dict]:
+    language_repos = deduplicate_repo_data(keep_n_repos_per_topic(repo_data, n=2))
+    return [{"repo_id": repo["id"], "repo_name": repo["name"], "languages": {}} for repo in language_repos]
+
+
+def test_merge_shard_results_matches_single_run():
+    repo_data = [
+        {"id": 1, "name": "repo-1", "topic_queried": "etl"},
+        {"id": 2, "name": "repo-2", "topic_queried": "etl"},
+        {"id": 3, "name": "repo-3", "topic_queried": "etl"},
+        {"id": 2, "name": "repo-2", "topic_queried": "dbt"},
+        {"id": 4, "name": "repo-4", "topic_queried": "dbt"},
+    ]
+    repo_counts = {"etl": 30, "dbt": 40}
+    shards = [
+        [repo for repo in repo_data if repo["topic_queried"] == "etl"],
+        [repo for repo in repo_data if repo["topic_queried"] == "dbt"]
+    ]
+    shard_results = [
+        {
+            "repos": shard,
+            "repo_counts": {topic: repo_counts[topic] for topic in {repo["topic_queried"] for repo in shard}},
+            "languages": get_language_data(shard)
+        }
+        for shard in shards
+    ]
+
+    data, merged_repo_counts, language_data = merge_shard_results(shard_results)
+
+    assert data == repo_data
+    assert merged_repo_counts == repo_counts
+    assert language_data == get_language_data(repo_data)
@@ -0,0 +1,54 @@
+from io import BytesIO
+
+import pyarrow.parquet as pq
+
+from extract.extract_core.snapshot import (
+    ParquetSnapshotWriter, REPOS_SCHEMA, REPOS_DICTIONARY_COLUMNS, LANGUAGES_SCHEMA, LANGUAGES_DICTIONARY_COLUMNS
+)
+
+
+def make_repo(repo_id: int, main_language: str | None) -> dict:
+    return {
+        "id": repo_id, "name": f"repo-{repo_id}", "languages_url": "http://api/languages", "size": 10,
+        "stars": 5, "main_language": main_language, "forks": 1, "license": "", "open_issues": 0,
+        "topics": ["etl"], "topic_queried": "etl"
+    }
+
+
+def test_parquet_snapshot_writer_row_groups():
+    buffer = BytesIO()
+    with ParquetSnapshotWriter(buffer, REPOS_SCHEMA, REPOS_DICTIONARY_COLUMNS, row_group_size=2) as writer:
+        writer.extend([make_repo(1, "Python"), make_repo(2, "Go")])
+        writer.extend([make_repo(3, None)])
+    buffer.seek(0)
+
+    parquet_file = pq.ParquetFile(buffer)
+    table = parquet_file.read()
+
+    assert writer.rows_written == 3
+    assert parquet_file.metadata.num_row_groups == 2
+    assert table.schema == REPOS_SCHEMA
+    assert table.column("main_language").to_pylist() == ["Python", "Go", None]
+
+
+def test_parquet_snapshot_writer_keeps_schema_for_null_columns():
+    buffer = BytesIO()
+    with ParquetSnapshotWriter(buffer, REPOS_SCHEMA, REPOS_DICTIONARY_COLUMNS, row_group_size=10) as writer:
+        writer.extend([make_repo(1, None)])
+    buffer.seek(0)
+
+    assert pq.read_table(buffer).schema == REPOS_SCHEMA
+
+
+def test_parquet_snapshot_writer_dictionary_encoding():
+    buffer = BytesIO()
+    rows = [{"repo_id": 1, "repo_name": "repo-1", "language": "Python", "bytes": 100}]
+    with ParquetSnapshotWriter(buffer, LANGUAGES_SCHEMA, LANGUAGES_DICTIONARY_COLUMNS, row_group_size=10) as writer:
+        writer.extend(rows)
+    buffer.seek(0)
+
+    row_group = pq.ParquetFile(buffer).metadata.row_group(0)
+    encodings = {row_group.column(i).path_in_schema: row_group.column(i).encodings for i in range(row_group.num_columns)}
+
+    assert "RLE_DICTIONARY" in encodings["language"]
+    assert "RLE_DICTIONARY" not in encodings["repo_name"]